@@ -4,8 +4,6 @@ import json
 from pathlib import Path
 from typing import Any
 
-from langchain_core.messages import HumanMessage, SystemMessage
-
 from app.core.config import settings
 
 
@@ -28,17 +26,20 @@ class FieldConfig:
 
 
 class ConfigLoader:
+    """Plik konfiguracji czytany przy pierwszym użyciu albo jawnie w lifespan (load())."""
+
     def __init__(self, path: Path):
         self.path = path
-        self.system_prompt: str = ""
-        self.fields: dict[str, FieldConfig] = {}
-        self.field_mapping: dict[str, str] = {}
-        self._load()
+        self._loaded = False
+        self._system_prompt: str = ""
+        self._fields: dict[str, FieldConfig] = {}
+        self._field_mapping: dict[str, str] = {}
 
-    def _load(self) -> None:
+    def load(self) -> None:
         data = json.loads(self.path.read_text(encoding="utf-8"))
-        self.system_prompt = data.get("system_prompt", "")
-        self.field_mapping = data.get("field_mapping", {})
+        self._system_prompt = data.get("system_prompt", "")
+        self._field_mapping = data.get("field_mapping", {})
+        self._fields = {}
         for item in data.get("fields", []):
             cfg = FieldConfig(
                 name=item["name"],
@@ -48,7 +49,27 @@ class ConfigLoader:
                 allowed_terms=item.get("allowed_terms", []),
                 example_context=item.get("example_context"),
             )
-            self.fields[cfg.name] = cfg
+            self._fields[cfg.name] = cfg
+        self._loaded = True
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    @property
+    def system_prompt(self) -> str:
+        self._ensure_loaded()
+        return self._system_prompt
+
+    @property
+    def fields(self) -> dict[str, FieldConfig]:
+        self._ensure_loaded()
+        return self._fields
+
+    @property
+    def field_mapping(self) -> dict[str, str]:
+        self._ensure_loaded()
+        return self._field_mapping
 
     def get_field(self, field_type: str) -> FieldConfig | None:
         return self.fields.get(field_type)
@@ -57,6 +78,9 @@ class ConfigLoader:
         field = self.get_field(field_type)
         if not field:
             return []
+        # Import leniwy: langchain_core kosztuje ~0,1 s przy starcie, a potrzebny jest dopiero przy LLM.
+        from langchain_core.messages import HumanMessage, SystemMessage
+
         payload = {
             "field_type": field_type,
             "value": value,
@@ -1,13 +1,24 @@
 from __future__ import annotations
 # ruff: noqa: I001
 
+import asyncio
 import json
 import re
+import time
 from typing import Literal
 
 from app.agent.config_loader import config_loader
+from app.core.config import settings
 from app.core.llm import get_llm
-from app.core.logging import logger
+from app.core.logging import PAYLOAD, logger
+from app.core.metrics import (
+    LLM_PARSE_FALLBACKS,
+    LLM_REQUEST_SECONDS,
+    VALIDATION_DECISIONS,
+    field_type_label,
+)
+from app.core.tracing import tracer
+from opentelemetry.trace import Span, SpanKind
 from pydantic import BaseModel, ValidationError
 
 class AgentResult(BaseModel):
@@ -17,6 +28,49 @@ class AgentResult(BaseModel):
 
 async def run_validation_agent(field_type: str, value: str, context: str | None = None) -> AgentResult:
     """Uruchamia agenta LangChain i zwraca wynik walidacji."""
+    with tracer.start_as_current_span(
+        "validator.run", attributes={"validation.field_type": field_type}
+    ) as span:
+        result = deterministic_result(field_type, value)
+        path = "deterministic"
+        if result is None:
+            result = await _llm_result(field_type, value, context)
+            path = "llm"
+        _record_decision(span, field_type, path, result)
+        return result
+
+
+def run_deterministic_validation(field_type: str, value: str) -> AgentResult | None:
+    """Tryb bez czekania na LLM: tylko reguły deterministyczne; None = werdykt dokończy model w tle."""
+    with tracer.start_as_current_span(
+        "validator.run", attributes={"validation.field_type": field_type}
+    ) as span:
+        result = deterministic_result(field_type, value)
+        if result is None:
+            span.set_attribute("validation.path", "pending")
+            return None
+        _record_decision(span, field_type, "deterministic", result)
+        return result
+
+
+async def run_llm_validation(field_type: str, value: str, context: str | None = None) -> AgentResult:
+    """Werdykt LLM dla pola odłożonego przez run_deterministic_validation."""
+    with tracer.start_as_current_span(
+        "validator.run", attributes={"validation.field_type": field_type}
+    ) as span:
+        result = await _llm_result(field_type, value, context)
+        _record_decision(span, field_type, "llm", result)
+        return result
+
+
+def _record_decision(span: Span, field_type: str, path: str, result: AgentResult) -> None:
+    span.set_attribute("validation.path", path)
+    span.set_attribute("validation.status", result.status)
+    VALIDATION_DECISIONS.labels(field_type_label(field_type), path, result.status).inc()
+
+
+def deterministic_result(field_type: str, value: str) -> AgentResult | None:
+    """Reguły rozstrzygane bez LLM; None oznacza, że decyzję musi podjąć model."""
     field_cfg = config_loader.get_field(field_type)
     if not field_cfg:
         return AgentResult(status="objection", justification="Unsupported field type.")
@@ -118,32 +172,58 @@ async def run_validation_agent(field_type: str, value: str, context: str | None
                 justification=field_cfg.description or "Wartość ma nieprawidłowy format.",
             )
 
+    return None
+
+
+async def _llm_result(field_type: str, value: str, context: str | None) -> AgentResult:
+    field_cfg = config_loader.get_field(field_type)
     llm = get_llm()
     messages = config_loader.build_messages(field_type, value, context)
-    if not messages:
+    if field_cfg is None or not messages:
         return AgentResult(status="objection", justification="Unsupported field type.")
 
-    logger.debug("LLM payload: %s", messages[-1].content)
-    response = await llm.ainvoke(messages)
+    logger.debug("LLM payload: %s", messages[-1].content, extra=PAYLOAD)
+    started = time.perf_counter()
+    outcome = "error"
+    with tracer.start_as_current_span(
+        "llm.request",
+        kind=SpanKind.CLIENT,
+        attributes={"gen_ai.request.model": settings.openrouter_model, "validation.field_type": field_type},
+    ) as span:
+        try:
+            response = await llm.ainvoke(messages)
+            outcome = "ok"
+        except asyncio.CancelledError:
+            # Anulowanie zadania zamyka też połączenie HTTP z dostawcą (httpx).
+            outcome = "cancelled"
+            raise
+        finally:
+            span.set_attribute("llm.outcome", outcome)
+            LLM_REQUEST_SECONDS.labels(field_type_label(field_type), settings.openrouter_model, outcome).observe(
+                time.perf_counter() - started
+            )
     raw_content = response.content
     if not isinstance(raw_content, str):
         try:
             raw_content = json.dumps(raw_content)
         except Exception:  # noqa: BLE001
             raw_content = str(raw_content)
-    logger.debug("LLM raw response: %s", raw_content[:500])
+    logger.debug("LLM raw response: %s", raw_content, extra=PAYLOAD)
 
     try:
         parsed = json.loads(raw_content)
         if not isinstance(parsed, dict):
             raise TypeError("LLM response is not an object")
-        logger.debug("LLM parsed response dict: %s", parsed)
+        logger.debug("LLM parsed response dict: %s", parsed, extra=PAYLOAD)
         result = AgentResult(**parsed)
     except (json.JSONDecodeError, ValidationError, TypeError):
         fallback_message = (raw_content or "Brak odpowiedzi modelu. Zwracam objection.").strip()
         if len(fallback_message) > 200:
             fallback_message = fallback_message[:197] + "..."
-        logger.debug("LLM parse fallback used. raw_content=%s fallback=%s", raw_content, fallback_message)
+        logger.debug(
+            "LLM parse fallback used. raw_content=%s fallback=%s", raw_content, fallback_message, extra=PAYLOAD
+        )
+        LLM_PARSE_FALLBACKS.labels(field_type_label(field_type)).inc()
         result = AgentResult(status="objection", justification=fallback_message)
 
     # Enforce niepusty komunikat tylko dla objection; przy success
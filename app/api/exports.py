@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import secrets
+import uuid
+from collections.abc import Sequence
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import get_current_session_readonly
+from app.db.session import get_read_session, get_session
+from app.models.session import PdfExportRequest, PdfTemplate
+from app.services.form_service import list_export_targets
+from app.services.pdf_bulk import stream_pdf_zip
+
+router = APIRouter()
+
+
+def _zip_response(
+    targets: list[tuple[uuid.UUID, int]], templates: Sequence[str], filename: str
+) -> StreamingResponse:
+    if len(targets) * len(templates) > settings.pdf_export_max_documents:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Export limited to {settings.pdf_export_max_documents} documents",
+        )
+    if not targets:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No versions to export")
+    return StreamingResponse(
+        stream_pdf_zip(targets, list(dict.fromkeys(templates))),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/sessions/{session_id}/pdf-export")
+async def export_session_pdfs(
+    session_id: uuid.UUID,
+    template: list[PdfTemplate] = Query(["ewyp"]),  # noqa: B008
+    version: list[int] | None = Query(None),  # noqa: B008
+    _session=Depends(get_current_session_readonly),  # noqa: B008
+    db: AsyncSession = Depends(get_read_session),  # noqa: B008
+) -> StreamingResponse:
+    targets = await list_export_targets(
+        db, settings.pdf_export_max_documents, session_ids=[session_id], versions=version
+    )
+    return _zip_response(targets, template, f"{session_id}.zip")
+
+
+@router.post("/exports/pdf")
+async def export_pdfs(
+    payload: PdfExportRequest,
+    x_export_key: str | None = Header(None),
+    db: AsyncSession = Depends(get_session),  # noqa: B008
+) -> StreamingResponse:
+    expected = settings.pdf_export_api_key
+    if not expected or not x_export_key or not secrets.compare_digest(x_export_key, expected):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid export key")
+    targets = await list_export_targets(
+        db,
+        settings.pdf_export_max_documents,
+        session_ids=payload.session_ids,
+        created_from=payload.created_from,
+        created_to=payload.created_to,
+    )
+    return _zip_response(targets, payload.templates, "export.zip")
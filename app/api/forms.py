@@ -1,29 +1,33 @@
 from __future__ import annotations
 
 import uuid
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_session, get_session
-from app.models.ewyp import EWYPFormSchema
+from app.core.config import settings
+from app.core.http_cache import IMMUTABLE_CACHE_CONTROL, etag_matches, version_etag
+from app.core.responses import OrjsonResponse, raw_json
+from app.core.security import get_current_session, get_current_session_readonly, get_session
+from app.db.session import get_read_session
 from app.models.session import (
-    FieldValidationResult,
     FormSnapshotResponse,
     FormSubmitRequest,
     FormSubmitResponse,
     FormValidateRequest,
     FormValidateResponse,
     HistoryResponse,
-    VersionSummary,
 )
 from app.services.form_service import (
     get_history,
-    get_version,
+    get_version_snapshot,
     submit_form,
     validate_form,
 )
-from app.services.pdf_export import generate_ewyp_pdf, generate_notification_pdf
+from app.services.pdf_pool import PdfQueueFullError, PdfRenderTimeoutError
+from app.services.pdf_service import get_version_pdf, pdf_etag, version_pdf_key
+from app.services.validation_upgrades import PENDING
 
 router = APIRouter()
 
@@ -46,54 +50,62 @@ async def submit_form_endpoint(
     return FormSubmitResponse(version=version.version, created_at=version.created_at)
 
 
+def _validation_dict(item: Any) -> dict[str, Any]:
+    return {"field_path": item.field_path, "status": item.status, "justification": item.justification}
+
+
+# Poniższe trasy zwracają OrjsonResponse ze słowników zbudowanych z danych z bazy/agenta
+# (już zwalidowanych) - bez tworzenia modeli Pydantic; response_model służy dokumentacji.
 @router.post("/sessions/{session_id}/validate", response_model=FormValidateResponse)
 async def validate_form_endpoint(
     session_id: uuid.UUID,
     payload: FormValidateRequest,
     _session=Depends(get_current_session),  # noqa: B008
     db: AsyncSession = Depends(get_session),  # noqa: B008
-) -> FormValidateResponse:
+) -> Response:
     try:
         version, validations = await validate_form(
-            db, session_id, payload.payload, payload.fields_to_validate
+            db, session_id, payload.payload, payload.fields_to_validate, defer_llm=payload.defer_llm
         )
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
     summary = {"success": 0, "objection": 0}
-    results: list[FieldValidationResult] = []
+    results = []
     for item in validations:
         summary[item.status] = summary.get(item.status, 0) + 1
-        results.append(
-            FieldValidationResult(
-                field_path=item.field_path,
-                status=item.status,  # type: ignore[arg-type]
-                justification=item.justification,
-            )
-        )
-    return FormValidateResponse(version=version.version, results=results, summary=summary)
+        results.append(_validation_dict(item))
+    return OrjsonResponse({"version": version.version, "results": results, "summary": summary})
 
 
 @router.get("/sessions/{session_id}/history", response_model=HistoryResponse)
 async def get_history_endpoint(
     session_id: uuid.UUID,
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    _session=Depends(get_current_session),  # noqa: B008
-    db: AsyncSession = Depends(get_session),  # noqa: B008
-) -> HistoryResponse:
-    total, versions = await get_history(db, session_id, limit, offset)
-    return HistoryResponse(
-        session_id=session_id,
-        total_versions=total,
-        versions=[
-            VersionSummary(
-                version=v.version,
-                source=v.source,
-                created_at=v.created_at,
-                comment=v.comment,
-            )
-            for v in versions
-        ],
+    cursor: int | None = Query(
+        None, ge=1, description="next_cursor z poprzedniej strony (zwraca wersje starsze niż cursor)"
+    ),
+    offset: int = Query(
+        0, ge=0, deprecated=True, description="Przestarzałe - użyj cursor; ignorowane, gdy podano cursor"
+    ),
+    _session=Depends(get_current_session_readonly),  # noqa: B008
+    db: AsyncSession = Depends(get_read_session),  # noqa: B008
+) -> Response:
+    total, versions, next_cursor = await get_history(db, session_id, limit, cursor, offset)
+    return OrjsonResponse(
+        {
+            "session_id": session_id,
+            "total_versions": total,
+            "versions": [
+                {
+                    "version": v.version,
+                    "source": v.source,
+                    "created_at": v.created_at,
+                    "comment": v.comment,
+                }
+                for v in versions
+            ],
+            "next_cursor": next_cursor,
+        }
     )
 
 
@@ -101,61 +113,83 @@ async def get_history_endpoint(
 async def get_form_version(
     session_id: uuid.UUID,
     version: int,
-    _session=Depends(get_current_session),  # noqa: B008
-    db: AsyncSession = Depends(get_session),  # noqa: B008
-) -> FormSnapshotResponse:
-    record = await get_version(db, session_id, version)
-    if not record:
+    if_none_match: str | None = Header(None),
+    _session=Depends(get_current_session_readonly),  # noqa: B008
+    db: AsyncSession = Depends(get_read_session),  # noqa: B008
+) -> Response:
+    etag = version_etag(session_id, version)
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        # Klient ma już tę niezmienną wersję - bez zapytania o payload i walidacje.
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    snapshot = await get_version_snapshot(db, session_id, version)
+    if snapshot is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Version not found")
-    return FormSnapshotResponse(
-        version=record.version,
-        source=record.source,
-        payload=record.payload,
-        validations=[
-            FieldValidationResult(
-                field_path=v.field_path,
-                status=v.status,  # type: ignore[arg-type]
-                justification=v.justification,
-            )
-            for v in record.validations
-        ],
-        created_at=record.created_at,
+    record, validations = snapshot
+    if any(v.status == PENDING for v in validations):
+        # Werdykty LLM jeszcze spływają - wersja nie jest jeszcze niezmienna.
+        headers = {"Cache-Control": "no-store"}
+    return OrjsonResponse(
+        {
+            "version": record.version,
+            "source": record.source,
+            # JSONB jako tekst trafia do odpowiedzi bez dekodowania i ponownego kodowania.
+            "payload": raw_json(record.payload_json),
+            "validations": [_validation_dict(v) for v in validations],
+            "created_at": record.created_at,
+        },
+        headers=headers,
     )
 
 
-@router.get("/sessions/{session_id}/forms/{version}/pdf")
-async def get_form_pdf(
+async def _render_version_pdf(
+    db: AsyncSession,
     session_id: uuid.UUID,
     version: int,
-    db: AsyncSession = Depends(get_session),
+    template: str,
+    if_none_match: str | None,
 ) -> Response:
-    record = await get_version(db, session_id, version)
-    if not record:
+    key = await version_pdf_key(db, session_id, version, template)
+    if key is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Version not found")
+    etag = pdf_etag(key)
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     try:
-        pdf_bytes = generate_ewyp_pdf(EWYPFormSchema(**record.payload))
+        result = await get_version_pdf(db, session_id, version, template)
+    except PdfQueueFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+        ) from exc
+    except PdfRenderTimeoutError as exc:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)
         ) from exc
-    return Response(content=pdf_bytes, media_type="application/pdf")
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Version not found")
+    return Response(content=result[1], media_type="application/pdf", headers=headers)
 
 
-@router.get("/sessions/{session_id}/forms/{version}/pdf-notification")
-async def get_form_notification_pdf(
+@router.get("/sessions/{session_id}/forms/{version}/pdf")
+async def get_form_pdf(
     session_id: uuid.UUID,
     version: int,
-    db: AsyncSession = Depends(get_session),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_session),  # noqa: B008
 ) -> Response:
-    record = await get_version(db, session_id, version)
-    if not record:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Version not found")
-    try:
-        pdf_bytes = generate_notification_pdf(EWYPFormSchema(**record.payload))
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)
-        ) from exc
-    return Response(content=pdf_bytes, media_type="application/pdf")
+    return await _render_version_pdf(db, session_id, version, "ewyp", if_none_match)
 
 
+@router.get("/sessions/{session_id}/forms/{version}/pdf-notification")
+async def get_form_notification_pdf(
+    session_id: uuid.UUID,
+    version: int,
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_session),  # noqa: B008
+) -> Response:
+    return await _render_version_pdf(db, session_id, version, "notification", if_none_match)
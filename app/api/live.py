@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+import orjson
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+
+from app.agent.config_loader import config_loader
+from app.core.config import settings
+from app.core.security import authenticate_token, session_denylist
+from app.db.models import FormSession
+from app.db.session import AsyncSessionLocal
+from app.services.live_validation import LiveValidationChannel
+
+router = APIRouter()
+
+
+async def _receive_json(websocket: WebSocket) -> dict[str, Any] | None:
+    """Obiekt JSON z ramki tekstowej; None dla ramki binarnej lub niepoprawnego JSON."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    if text is None:
+        return None
+    try:
+        data = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _session_revoked(session: FormSession) -> tuple[int, str] | None:
+    """Kod zamknięcia, gdy token wygasł, został zastąpiony przez refresh albo sesję zamknięto."""
+    if session.token_expires_at <= datetime.now(timezone.utc):
+        return 4000 + status.HTTP_401_UNAUTHORIZED, "Token expired"
+    if session.id in session_denylist:
+        return 4000 + status.HTTP_403_FORBIDDEN, "Session is closed"
+    if session_denylist.is_superseded(session.id, session.token_generation or 0):
+        return 4000 + status.HTTP_401_UNAUTHORIZED, "Token revoked"
+    return None
+
+
+@router.websocket("/sessions/{session_id}/live")
+async def live_validation_endpoint(websocket: WebSocket, session_id: uuid.UUID) -> None:
+    """Walidacja pól w trakcie pisania przez jedno połączenie zamiast żądania na zmianę.
+
+    Pierwsza wiadomość: {"token": "..."}; kolejne: {"field_path": "...", "value": "..."}.
+    Odpowiedzi: {"type": "ready"}, {"type": "result", "field_path", "status", "justification"}
+    albo {"type": "error", ...}. Błędy autoryzacji zamykają połączenie kodem 4000 + status HTTP.
+    """
+    await websocket.accept()
+    async with AsyncSessionLocal() as db:
+        try:
+            first = await asyncio.wait_for(
+                _receive_json(websocket), settings.live_validation_auth_timeout_seconds
+            )
+            token = first.get("token") if first else None
+            if not isinstance(token, str):
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid token")
+            session = await authenticate_token(session_id, token, db)
+        except asyncio.TimeoutError:
+            await websocket.close(code=4000 + status.HTTP_401_UNAUTHORIZED, reason="Authentication timeout")
+            return
+        except HTTPException as exc:
+            await websocket.close(code=4000 + exc.status_code, reason=str(exc.detail))
+            return
+        except WebSocketDisconnect:
+            return
+        # Koniec transakcji odczytu po autoryzacji - połączenie z puli nie czeka na klienta.
+        await db.rollback()
+
+        async def _send(message: dict[str, Any]) -> None:
+            await websocket.send_text(orjson.dumps(message).decode())
+
+        mapping = config_loader.field_mapping or {}
+        channel = LiveValidationChannel(
+            session_id, _send, db, settings.live_validation_debounce_ms / 1000
+        )
+        await channel.send({"type": "ready", "session_id": session_id, "expires_at": session.token_expires_at})
+        try:
+            while True:
+                message = await _receive_json(websocket)
+                revoked = _session_revoked(session)
+                if revoked is not None:
+                    await websocket.close(code=revoked[0], reason=revoked[1])
+                    return
+                field_path = message.get("field_path") if message else None
+                value = message.get("value") if message else None
+                if not isinstance(field_path, str) or field_path not in mapping or value is None:
+                    await channel.send(
+                        {"type": "error", "field_path": field_path, "detail": "Expected a known field_path and a value"}
+                    )
+                    continue
+                channel.update(field_path, mapping[field_path], str(value))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await channel.close()
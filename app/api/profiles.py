@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.core.profiling import key_matches, list_profiles, profile_path
+
+router = APIRouter(prefix="/debug/profiles")
+
+
+def _require_key(x_profile_key: str | None) -> None:
+    if not key_matches(x_profile_key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profile key")
+
+
+@router.get("")
+async def get_profiles(x_profile_key: str | None = Header(None)) -> list[dict[str, object]]:
+    _require_key(x_profile_key)
+    return [{"name": path.name, "size": path.stat().st_size} for path in list_profiles()]
+
+
+@router.get("/{name}")
+async def download_profile(name: str, x_profile_key: str | None = Header(None)) -> FileResponse:
+    _require_key(x_profile_key)
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    # pstats: python -m pstats <plik> albo snakeviz/speedscope po konwersji.
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
@@ -1,26 +1,83 @@
-from fastapi import APIRouter, Depends
+import uuid
+from functools import partial
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.agent.validator import run_validation_agent
+from app.agent.validator import run_deterministic_validation, run_validation_agent
+from app.api import exports, forms, live, profiles, sessions
 from app.core.logging import logger
+from app.core.security import authenticate_header
 from app.db.session import get_session
 from app.models.schemas import ValidationRequest, ValidationResponse
-from app.services.validation_log import log_validation
-from app.api import sessions, forms
+from app.services.inflight_validations import ValidationSuperseded, inflight_validations
+from app.services.validation_log import (
+    complete_validation,
+    get_validation,
+    log_pending_validation,
+    log_validation,
+)
+from app.services.validation_upgrades import validation_upgrader
 
 router = APIRouter()
 router.include_router(sessions.router)
 router.include_router(forms.router)
+router.include_router(exports.router)
+router.include_router(profiles.router)
+router.include_router(live.router)
 
 
-@router.post("/validate", response_model=ValidationResponse)
+@router.post("/validate", response_model=ValidationResponse, response_model_exclude_none=True)
 async def validate_field(
     payload: ValidationRequest,
+    authorization: str | None = Header(None),
     session: AsyncSession = Depends(get_session),  # noqa: B008 FastAPI dependency injection
 ) -> ValidationResponse:
     logger.info("API /validate field=%s", payload.field_type)
-    result = await run_validation_agent(payload.field_type, payload.value, payload.context)
+    if payload.session_id is not None:
+        # Klucz anulowania to (sesja, pole) - tylko właściciel tokenu sesji może go użyć.
+        await authenticate_header(payload.session_id, authorization, session)
+        # Koniec transakcji odczytu tokenu - połączenie z puli nie czeka na LLM (jak w live.py).
+        await session.rollback()
+    if payload.defer_llm and validation_upgrader.has_room(1):
+        quick = run_deterministic_validation(payload.field_type, payload.value)
+        if quick is None:
+            log_id = await log_pending_validation(session, payload.field_type, payload.value)
+            validation_upgrader.schedule(
+                payload.field_type,
+                payload.value,
+                payload.context,
+                partial(complete_validation, log_id),
+            )
+            return ValidationResponse(status="pending", justification="", validation_id=log_id)
+        result = quick
+    elif payload.session_id is not None and payload.field_path:
+        # Nowsza wartość tego pola (np. dalsze pisanie) anuluje tę walidację razem z wywołaniem LLM.
+        try:
+            result = await inflight_validations.run(
+                (payload.session_id, payload.field_path),
+                payload.field_type,
+                run_validation_agent(payload.field_type, payload.value, payload.context),
+            )
+        except ValidationSuperseded as exc:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail="Superseded by a newer validation of this field"
+            ) from exc
+    else:
+        result = await run_validation_agent(payload.field_type, payload.value, payload.context)
     await log_validation(session, payload.field_type, payload.value, result)
     return ValidationResponse(status=result.status, justification=result.justification)
 
 
+@router.get("/validate/{validation_id}", response_model=ValidationResponse)
+async def get_validation_result(
+    validation_id: uuid.UUID,
+    session: AsyncSession = Depends(get_session),  # noqa: B008
+) -> ValidationResponse:
+    """Stan walidacji zwróconej jako "pending"; klient odpytuje, aż status się zmieni."""
+    found = await get_validation(session, validation_id)
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Validation not found")
+    return ValidationResponse(status=found[0], justification=found[1], validation_id=validation_id)
+
+
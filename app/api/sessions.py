@@ -5,7 +5,7 @@ import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_session, get_session
+from app.core.security import get_current_session, get_current_session_readonly, get_session
 from app.models.session import SessionCreateRequest, SessionResponse
 from app.services.session_service import close_session, create_session, refresh_token
 
@@ -29,7 +29,7 @@ async def create_session_endpoint(
 
 @router.get("/sessions/{session_id}", response_model=SessionResponse)
 async def get_session_status(
-    session=Depends(get_current_session),  # noqa: B008
+    session=Depends(get_current_session_readonly),  # noqa: B008
 ) -> SessionResponse:
     return SessionResponse(
         session_id=session.id,
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import ADMISSION_REJECTIONS
+from app.core.responses import OrjsonResponse
+
+# Klasy tras: validation i pdf są drogie (LLM / render) i podlegają odrzucaniu,
+# read i other przechodzą zawsze, podobnie jak sondy poniżej.
+EXEMPT_PATHS = frozenset({"/health", "/ready", "/metrics"})
+_PDF_SUFFIXES = ("/pdf", "/pdf-notification", "/pdf-export")
+
+
+def route_class(method: str, path: str) -> str | None:
+    """Klasa trasy z metody i ścieżki (middleware działa przed routingiem); None = bez kontroli."""
+    if path in EXEMPT_PATHS:
+        return None
+    if path.endswith(_PDF_SUFFIXES) or path == "/api/exports/pdf":
+        return "pdf"
+    if method == "POST" and path.endswith("/validate"):
+        return "validation"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "other"
+
+
+class LoopLagMonitor:
+    """Opóźnienie pętli zdarzeń: o ile później niż zaplanowano budzi się krótki sleep.
+
+    Wartość trzyma szczyt i wygasa o połowę na pomiar, więc pojedynczy skok nie
+    blokuje przyjmowania żądań na długo.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.lag_seconds = 0.0
+
+    async def run(self) -> None:
+        """Pętla lifespan."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_seconds)
+            observed = max(loop.time() - started - self.interval_seconds, 0.0)
+            self.lag_seconds = max(observed, self.lag_seconds / 2)
+
+
+loop_lag = LoopLagMonitor(settings.admission_lag_interval_seconds)
+
+
+class AdmissionController:
+    def __init__(self, limits: dict[str, int], max_lag_seconds: float):
+        self.limits = limits
+        self.max_lag_seconds = max_lag_seconds
+        self.in_flight: dict[str, int] = {name: 0 for name in ("validation", "pdf", "read", "other")}
+
+    def rejection_reason(self, route: str) -> str | None:
+        limit = self.limits.get(route)
+        if limit is None:
+            return None
+        if self.max_lag_seconds > 0 and loop_lag.lag_seconds > self.max_lag_seconds:
+            return "loop_lag"
+        if limit > 0 and self.in_flight[route] >= limit:
+            return "in_flight"
+        return None
+
+
+admission = AdmissionController(
+    limits={
+        "validation": settings.admission_max_inflight_validation,
+        "pdf": settings.admission_max_inflight_pdf,
+    },
+    max_lag_seconds=settings.admission_max_loop_lag_ms / 1000,
+)
+
+
+class AdmissionMiddleware:
+    """Odrzuca drogie żądania 503 + Retry-After, zanim zajmą LLM, pulę DB albo workera PDF.
+
+    Przy opóźnionej pętli albo limicie żądań w toku danej klasy lepiej szybko odmówić
+    niż przyjąć kolejne i wydłużyć czas wszystkich; /health i tanie odczyty przechodzą.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = route_class(scope["method"], scope["path"])
+        if route is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = admission.rejection_reason(route)
+        if reason is not None:
+            ADMISSION_REJECTIONS.labels(route, reason).inc()
+            response = OrjsonResponse(
+                {"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+            )
+            await response(scope, receive, send)
+            return
+
+        admission.in_flight[route] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.in_flight[route] -= 1
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -12,9 +14,91 @@ class Settings(BaseSettings):
     x_title: str = Field("Form Validation Agent", alias="OPENROUTER_X_TITLE")
 
     database_url: str = Field("postgresql+asyncpg://app:app@db:5432/app", alias="DATABASE_URL")
+    # Opcjonalna replika dla tras tylko do odczytu; brak = wszystko na primary.
+    database_replica_url: str | None = Field(None, alias="DATABASE_REPLICA_URL")
+    replica_max_lag_seconds: float = Field(5.0, alias="REPLICA_MAX_LAG_SECONDS")
+    replica_check_interval_seconds: float = Field(5.0, alias="REPLICA_CHECK_INTERVAL_SECONDS")
     base_dir: str = Field(default=".")
     log_level: str = Field("INFO", alias="LOG_LEVEL")
 
+    # "opaque": losowy token weryfikowany w bazie; "signed": JWT weryfikowany bez bazy.
+    session_token_mode: Literal["opaque", "signed"] = Field("opaque", alias="SESSION_TOKEN_MODE")
+    # "kid:sekret" rozdzielone przecinkami; pierwszy klucz podpisuje, wszystkie weryfikują.
+    session_signing_keys: str = Field("", alias="SESSION_SIGNING_KEYS")
+    session_token_ttl_hours: int = Field(2, alias="SESSION_TOKEN_TTL_HOURS")
+    session_denylist_refresh_seconds: float = Field(30.0, alias="SESSION_DENYLIST_REFRESH_SECONDS")
+
+    validation_log_retention_days: int = Field(90, alias="VALIDATION_LOG_RETENTION_DAYS")
+    validation_log_partitions_ahead: int = Field(3, alias="VALIDATION_LOG_PARTITIONS_AHEAD")
+    validation_log_maintenance_interval_seconds: float = Field(
+        3600.0, alias="VALIDATION_LOG_MAINTENANCE_INTERVAL_SECONDS"
+    )
+
+    # Renderowanie PDF w puli procesów; PDF_WORKERS=0 = wątek w procesie API.
+    pdf_workers: int = Field(2, alias="PDF_WORKERS")
+    pdf_queue_size: int = Field(8, alias="PDF_QUEUE_SIZE")
+    pdf_render_timeout_seconds: float = Field(30.0, alias="PDF_RENDER_TIMEOUT_SECONDS")
+
+    # Cache wyrenderowanych PDF: "disk", "db" albo "none".
+    pdf_cache_backend: Literal["disk", "db", "none"] = Field("disk", alias="PDF_CACHE_BACKEND")
+    pdf_cache_dir: str = Field("cache/pdf", alias="PDF_CACHE_DIR")
+    pdf_cache_max_bytes: int = Field(256 * 1024 * 1024, alias="PDF_CACHE_MAX_BYTES")
+    # Backend "db": co tyle sekund usuwane są najdawniej używane wpisy ponad limit.
+    pdf_cache_evict_interval_seconds: float = Field(60.0, alias="PDF_CACHE_EVICT_INTERVAL_SECONDS")
+
+    # Eksport ZIP wielu sesji; bez klucza endpoint /exports/pdf jest wyłączony.
+    pdf_export_api_key: str | None = Field(None, alias="PDF_EXPORT_API_KEY")
+    pdf_export_max_documents: int = Field(500, alias="PDF_EXPORT_MAX_DOCUMENTS")
+
+    # Pre-render PDF po utworzeniu wersji: "source:template" po przecinku, np. "corrected:ewyp".
+    pdf_prerender: str = Field("", alias="PDF_PRERENDER")
+    pdf_prerender_queue_size: int = Field(100, alias="PDF_PRERENDER_QUEUE_SIZE")
+    pdf_prerender_min_interval_seconds: float = Field(1.0, alias="PDF_PRERENDER_MIN_INTERVAL_SECONDS")
+
+    # Walidacja z defer_llm=true: pola wymagające LLM wracają jako "pending", a werdykty
+    # dokańcza w tle tyle wywołań naraz; powyżej limitu zaległości żądanie czeka na LLM.
+    validation_upgrade_concurrency: int = Field(4, alias="VALIDATION_UPGRADE_CONCURRENCY")
+    validation_upgrade_max_backlog: int = Field(200, alias="VALIDATION_UPGRADE_MAX_BACKLOG")
+    # "pending" starsze niż tyle sekund (zlecenie zgubione np. przy restarcie) dostaje objection.
+    validation_pending_timeout_seconds: float = Field(1800.0, alias="VALIDATION_PENDING_TIMEOUT_SECONDS")
+
+    # Kanał WebSocket walidacji na żywo: token w pierwszej wiadomości, walidacja pola
+    # dopiero po tylu ms bez kolejnej zmiany tego pola.
+    live_validation_debounce_ms: int = Field(300, alias="LIVE_VALIDATION_DEBOUNCE_MS")
+    live_validation_auth_timeout_seconds: float = Field(10.0, alias="LIVE_VALIDATION_AUTH_TIMEOUT_SECONDS")
+
+    # Endpoint /metrics (format Prometheus) i pomiar czasu żądań.
+    metrics_enabled: bool = Field(True, alias="METRICS_ENABLED")
+
+    # Tracing OpenTelemetry do lokalnego eksportera: "none", "console" albo "file" (JSON lines).
+    tracing_exporter: Literal["none", "console", "file"] = Field("none", alias="TRACING_EXPORTER")
+    tracing_file: str = Field("logs/traces.jsonl", alias="TRACING_FILE")
+
+    # Profil cProfile pojedynczego żądania: z nagłówkiem X-Profile-Key = PROFILING_KEY
+    # albo dla ułamka PROFILING_SAMPLE_RATE żądań; pliki .pstats w PROFILING_DIR.
+    profiling_key: str | None = Field(None, alias="PROFILING_KEY")
+    profiling_sample_rate: float = Field(0.0, alias="PROFILING_SAMPLE_RATE")
+    profiling_dir: str = Field("logs/profiles", alias="PROFILING_DIR")
+    profiling_max_files: int = Field(50, alias="PROFILING_MAX_FILES")
+
+    # Kontrola przyjęć: drogie żądania (walidacja, PDF) dostają 503 + Retry-After, gdy pętla
+    # zdarzeń jest opóźniona o więcej niż ADMISSION_MAX_LOOP_LAG_MS albo klasa ma komplet
+    # żądań w toku (0 = bez limitu).
+    admission_control: bool = Field(True, alias="ADMISSION_CONTROL")
+    admission_max_loop_lag_ms: float = Field(250.0, alias="ADMISSION_MAX_LOOP_LAG_MS")
+    admission_lag_interval_seconds: float = Field(0.1, alias="ADMISSION_LAG_INTERVAL_SECONDS")
+    admission_max_inflight_validation: int = Field(100, alias="ADMISSION_MAX_INFLIGHT_VALIDATION")
+    admission_max_inflight_pdf: int = Field(20, alias="ADMISSION_MAX_INFLIGHT_PDF")
+    admission_retry_after_seconds: int = Field(5, alias="ADMISSION_RETRY_AFTER_SECONDS")
+
+    # Kompresja gzip odpowiedzi większych niż GZIP_MINIMUM_SIZE bajtów (0 = wyłączona).
+    gzip_minimum_size: int = Field(1024, alias="GZIP_MINIMUM_SIZE")
+    gzip_compresslevel: int = Field(6, alias="GZIP_COMPRESSLEVEL")
+
+    # Rozgrzewka po starcie (pula DB, worker PDF, połączenie z LLM); /ready czeka na jej koniec.
+    startup_warmup: bool = Field(False, alias="STARTUP_WARMUP")
+    warmup_step_timeout_seconds: float = Field(60.0, alias="WARMUP_STEP_TIMEOUT_SECONDS")
+
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
 
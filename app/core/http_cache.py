@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import hashlib
+import uuid
+
+# Wersje formularza (i ich PDF) są niezmienne - przeglądarka może je trzymać bez rewalidacji.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# Podbij przy zmianie kształtu odpowiedzi GET /forms/{version}, by unieważnić stare ETagi.
+_SNAPSHOT_FORMAT = "1"
+
+
+def version_etag(session_id: uuid.UUID, version: int) -> str:
+    """Silny ETag migawki wersji, liczony bez czytania wiersza z bazy."""
+    raw = f"{session_id}:{version}:{_SNAPSHOT_FORMAT}"
+    return f'"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Porównanie słabe z If-None-Match (RFC 9110 13.1.2), obsługuje listę i "*"."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(",")
+    )
@@ -1,10 +1,20 @@
-from langchain_openai import ChatOpenAI
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 
+@lru_cache(maxsize=1)
 def get_llm() -> ChatOpenAI:
-    """Konfiguracja klienta OpenRouter kompatybilnego z OpenAI/ChatOpenAI."""
+    """Konfiguracja klienta OpenRouter kompatybilnego z OpenAI/ChatOpenAI (jeden na proces)."""
+    # Import leniwy: langchain_openai + SDK OpenAI to większość czasu importu aplikacji.
+    from langchain_openai import ChatOpenAI
+
     return ChatOpenAI(
         model=settings.openrouter_model,
         api_key=settings.openrouter_api_key,
@@ -19,3 +29,12 @@ def get_llm() -> ChatOpenAI:
     )
 
 
+async def warm_up_llm(timeout: float = 10) -> None:
+    """Zestawia połączenie (DNS + TLS) w puli klienta get_llm() bez wywołania modelu.
+
+    with_options współdzieli pulę połączeń klienta ChatOpenAI; lista modeli nie zużywa tokenów.
+    """
+    client = get_llm().root_async_client
+    if client is None:
+        return
+    await client.with_options(timeout=timeout, max_retries=0).models.list()
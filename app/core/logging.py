@@ -1,12 +1,160 @@
 from __future__ import annotations
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
 
 ROOT_DIR = Path(__file__).resolve().parents[2]
 LOG_DIR = ROOT_DIR / "logs"
-LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+# extra= dla dużych wpisów DEBUG (pełne prompty/odpowiedzi LLM) - próbkowane i przycinane.
+PAYLOAD: dict[str, Any] = {"payload": True}
+
+_RECORD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Jeden obiekt JSON na linię; pola z extra= trafiają jako dodatkowe klucze."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        import orjson
+
+        data: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        return orjson.dumps(data, default=str).decode()
+
+
+class PayloadSampler(logging.Filter):
+    """Dla wpisów z extra=PAYLOAD: próbkowanie, limit na sekundę i przycięcie argumentów.
+
+    Działa przed QueueHandler.prepare, więc odrzucony wpis nie jest nawet formatowany.
+    """
+
+    def __init__(self, sample_rate: float, per_second: float, max_chars: int):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.per_second = per_second
+        self.max_chars = max_chars
+        self.suppressed = 0
+        self._tokens = per_second
+        self._refilled = time.monotonic()
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.per_second, self._tokens + (now - self._refilled) * self.per_second)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _truncate(self, value: object) -> object:
+        text = str(value)
+        if len(text) <= self.max_chars:
+            return value
+        return f"{text[: self.max_chars]}... [+{len(text) - self.max_chars} chars]"
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "payload", False):
+            return True
+        if random.random() >= self.sample_rate or not self._take_token():
+            self.suppressed += 1
+            return False
+        if isinstance(record.args, tuple):
+            record.args = tuple(self._truncate(arg) for arg in record.args)
+        if self.suppressed:
+            record.payloads_suppressed = self.suppressed
+            self.suppressed = 0
+        return True
+
+
+class _RotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Katalog i plik tworzone przy pierwszym zapisie (delay=True), nie przy imporcie."""
+
+    _disabled = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._disabled:
+            return
+        if self.stream is None:
+            try:
+                Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+                self.stream = self._open()
+            except OSError as exc:
+                # Fall back silently if log file is not writable (e.g., mounted volume permissions)
+                self._disabled = True
+                sys.stderr.write(f"File logging disabled: {exc}\n")
+                return
+        super().emit(record)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Nie blokuje przy pełnej kolejce: wpis przepada, a licznik trafia do logu z następnym."""
+
+    def __init__(self, log_queue: queue.Queue[Any]):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        if self.dropped:
+            with self._lock:
+                dropped, self.dropped = self.dropped, 0
+            notice = logging.makeLogRecord(
+                {
+                    "name": record.name,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"Log queue full, dropped {dropped} records",
+                }
+            )
+            try:
+                self.queue.put_nowait(notice)
+            except queue.Full:
+                with self._lock:
+                    self.dropped += dropped
+
+
+def _target_handlers(fmt: logging.Formatter) -> list[logging.Handler]:
+    stream = logging.StreamHandler()
+    stream.setFormatter(fmt)
+    handlers: list[logging.Handler] = [stream]
+
+    if os.getenv("LOG_TO_FILE", "1") == "1":
+        file_handler = _RotatingFileHandler(
+            LOG_DIR / "app.log",
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+            encoding="utf-8",
+            delay=True,
+        )
+        file_handler.setFormatter(fmt)
+        handlers.append(file_handler)
+    return handlers
 
 
 def setup_logger() -> logging.Logger:
@@ -17,24 +165,28 @@ def setup_logger() -> logging.Logger:
     if logger.handlers:
         return logger
 
-    fmt = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s - %(message)s")
-
-    stream = logging.StreamHandler()
-    stream.setFormatter(fmt)
-    logger.addHandler(stream)
+    if os.getenv("LOG_FORMAT", "text") == "json":
+        fmt: logging.Formatter = JsonFormatter()
+    else:
+        fmt = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s - %(message)s")
 
-    if os.getenv("LOG_TO_FILE", "1") == "1":
-        try:
-            file_handler = logging.FileHandler(LOG_DIR / "app.log")
-            file_handler.setFormatter(fmt)
-            logger.addHandler(file_handler)
-        except OSError as exc:
-            # Fall back silently if log file is not writable (e.g., mounted volume permissions)
-            logger.warning("File logging disabled: %s", exc)
+    # Wywołanie loggera tylko wrzuca wpis do kolejki; zapis na konsolę i do pliku
+    # (z rotacją) robi wątek QueueListener - pętla zdarzeń nie czeka na dysk.
+    log_queue: queue.Queue[Any] = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(
+        PayloadSampler(
+            sample_rate=float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0")),
+            per_second=float(os.getenv("LOG_PAYLOAD_PER_SECOND", "5")),
+            max_chars=int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000")),
+        )
+    )
+    logger.addHandler(queue_handler)
 
+    listener = logging.handlers.QueueListener(log_queue, *_target_handlers(fmt), respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
     return logger
 
 
 logger = setup_logger()
-
-
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.agent.config_loader import config_loader
+
+# Buckety dopasowane do rozrzutu: ms dla tras/regexów, dziesiątki sekund dla darmowych modeli.
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Etykieta dla field_type spoza konfiguracji (np. dowolny tekst z /api/validate).
+UNSUPPORTED_FIELD_TYPE = "unsupported"
+
+
+def field_type_label(field_type: str) -> str:
+    """Tylko znane typy pól jako wartości etykiety - każda nowa wartość to seria trzymana do końca procesu."""
+    return field_type if config_loader.get_field(field_type) is not None else UNSUPPORTED_FIELD_TYPE
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Czas obsługi żądania HTTP (do wysłania całej odpowiedzi).",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds",
+    "Czas wywołania LLM w walidatorze.",
+    ["field_type", "model", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+LLM_PARSE_FALLBACKS = Counter(
+    "llm_parse_fallback_total",
+    "Odpowiedzi LLM, których nie dało się sparsować jako AgentResult.",
+    ["field_type"],
+)
+VALIDATION_DECISIONS = Counter(
+    "validation_decisions_total",
+    "Decyzje walidatora wg ścieżki (deterministic = bez LLM).",
+    ["field_type", "path", "status"],
+)
+VALIDATIONS_SUPERSEDED = Counter(
+    "validations_superseded_total",
+    "Walidacje w toku anulowane przez nowszą wartość tego samego pola sesji; przerwane "
+    "wywołania modelu widać w llm_request_duration_seconds{outcome=\"cancelled\"}.",
+    ["field_type"],
+)
+PDF_RENDER_SECONDS = Histogram(
+    "pdf_render_duration_seconds",
+    "Czas renderu PDF łącznie z oczekiwaniem w kolejce puli.",
+    ["template", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Żądania odrzucone 503 przez kontrolę przyjęć.",
+    ["route_class", "reason"],
+)
+LIVE_VALIDATION_UPDATES = Counter(
+    "live_validation_updates_total",
+    "Zmiany pól z kanału WebSocket: validated, debounced (zastąpione przed walidacją), "
+    "superseded (wynik nieaktualny, nie wysłany), rejected (przeciążenie).",
+    ["outcome"],
+)
+
+
+class _SaturationCollector(Collector):
+    """Pula DB i kolejka PDF odczytywane przy scrape - zero kosztu na ścieżce żądania."""
+
+    def describe(self) -> list[GaugeMetricFamily]:
+        # Bez describe() REGISTRY.register wywołuje collect() już przy imporcie - a collect
+        # importuje pdf_pool, który sam importuje ten moduł (cykl przy imporcie pdf_pool jako pierwszego).
+        return []
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        from app.core.admission import admission, loop_lag
+        from app.db.session import engine, replica_engine
+        from app.services.pdf_pool import pdf_pool
+
+        pool = GaugeMetricFamily(
+            "db_pool_connections", "Połączenia puli SQLAlchemy.", labels=["engine", "state"]
+        )
+        for name, eng in (("primary", engine), ("replica", replica_engine)):
+            if eng is None:
+                continue
+            sync_pool: Any = eng.pool
+            if not hasattr(sync_pool, "checkedout"):
+                continue
+            pool.add_metric([name, "checked_out"], sync_pool.checkedout())
+            pool.add_metric([name, "idle"], sync_pool.checkedin())
+            pool.add_metric([name, "overflow"], max(sync_pool.overflow(), 0))
+            pool.add_metric([name, "size"], sync_pool.size())
+        yield pool
+
+        queue = GaugeMetricFamily("pdf_render_in_flight", "Rendery PDF w toku (w workerach + w kolejce).")
+        queue.add_metric([], pdf_pool.pending)
+        yield queue
+        capacity = GaugeMetricFamily("pdf_render_capacity", "Limit renderów w toku (workery + kolejka).")
+        capacity.add_metric([], pdf_pool.capacity)
+        yield capacity
+
+        lag = GaugeMetricFamily("event_loop_lag_seconds", "Opóźnienie pętli zdarzeń (szczyt z wygasaniem).")
+        lag.add_metric([], loop_lag.lag_seconds)
+        yield lag
+        in_flight = GaugeMetricFamily(
+            "http_requests_in_flight", "Żądania w toku wg klasy trasy.", labels=["route_class"]
+        )
+        for route, count in admission.in_flight.items():
+            in_flight.add_metric([route], count)
+        yield in_flight
+
+
+REGISTRY.register(_SaturationCollector())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """Czysty middleware ASGI (bez BaseHTTPMiddleware): jeden pomiar czasu i jedna obserwacja.
+
+    Etykieta route to szablon ścieżki (np. /api/sessions/{session_id}/forms/{version}),
+    nie surowy URL - liczba serii nie rośnie z liczbą sesji.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            ).observe(time.perf_counter() - started)
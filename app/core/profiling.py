@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import random
+import re
+import secrets
+import time
+import uuid
+from pathlib import Path
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import logger
+
+PROFILE_KEY_HEADER = b"x-profile-key"
+# Endpointy listy/pobierania profili (app.api.profiles) wymagają tego samego klucza,
+# ale same nie są profilowane - inaczej każde pobranie dopisywałoby nowy plik.
+PROFILES_PATH = "/api/debug/profiles"
+_PROFILE_NAME = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}\.pstats$")
+
+
+def profiling_enabled() -> bool:
+    return bool(settings.profiling_key) or settings.profiling_sample_rate > 0
+
+
+def profiles_dir() -> Path:
+    return Path(settings.base_dir) / settings.profiling_dir
+
+
+def profile_path(name: str) -> Path | None:
+    """Ścieżka zapisanego profilu; None dla nazw spoza wzorca (bez path traversal)."""
+    if not _PROFILE_NAME.match(name):
+        return None
+    path = profiles_dir() / name
+    return path if path.is_file() else None
+
+
+def list_profiles() -> list[Path]:
+    """Od najnowszego."""
+    directory = profiles_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(
+        (path for path in directory.iterdir() if _PROFILE_NAME.match(path.name)),
+        key=lambda path: path.name,
+        reverse=True,
+    )
+
+
+def key_matches(value: str | None) -> bool:
+    expected = settings.profiling_key
+    return bool(expected and value and secrets.compare_digest(value, expected))
+
+
+def _save(profiler: cProfile.Profile, name: str) -> None:
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / name)
+    for stale in list_profiles()[settings.profiling_max_files :]:
+        stale.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """cProfile dla pojedynczego żądania: z nagłówkiem X-Profile-Key albo losowo (PROFILING_SAMPLE_RATE).
+
+    Profil (pstats) zapisywany jest w PROFILING_DIR, a jego nazwa wraca w nagłówku
+    X-Profile-Id. Naraz profilowane jest najwyżej jedno żądanie; cProfile mierzy cały
+    wątek pętli, więc równoległe żądania mogą dopisać się do profilu. Render PDF
+    działa w procesie puli i nie jest tu widoczny.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._active = False
+
+    def _triggered(self, scope: Scope) -> bool:
+        if scope["path"].startswith(PROFILES_PATH):
+            return False
+        if settings.profiling_key:
+            for key, value in scope["headers"]:
+                if key == PROFILE_KEY_HEADER:
+                    return key_matches(value.decode("latin-1"))
+        return random.random() < settings.profiling_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._active or not self._triggered(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.pstats"
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", name.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Inny profiler (np. debugger) już działa w tym wątku.
+            await self.app(scope, receive, send)
+            return
+        self._active = True
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            self._active = False
+            elapsed = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", scope["path"])
+            try:
+                await asyncio.to_thread(_save, profiler, name)
+                logger.info("Profiled %s %s in %.3fs -> %s", scope["method"], route, elapsed, name)
+            except OSError as exc:
+                logger.warning("Saving profile %s failed: %s", name, exc)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.db.session import WriteMarker, request_write_marker
+
+LAST_WRITE_HEADER = "X-Last-Write"
+_LAST_WRITE_HEADER_KEY = LAST_WRITE_HEADER.lower().encode()
+
+
+def _client_last_write(scope: Scope) -> float | None:
+    for key, value in scope["headers"]:
+        if key == _LAST_WRITE_HEADER_KEY:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class ReadYourWritesMiddleware:
+    """Read-your-writes między workerami: znacznik zapisu niesie klient.
+
+    Odpowiedź na żądanie, które zapisało dane, dostaje nagłówek X-Last-Write (czas
+    zapisu, sekundy epoki). Klient odsyła ostatnią wartość w kolejnych żądaniach, a
+    trasy odczytu omijają replikę, dopóki zapis może na niej jeszcze nie być widoczny -
+    niezależnie od tego, który worker obsłużył zapis. Dodawany tylko przy skonfigurowanej replice.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        marker = WriteMarker(_client_last_write(scope))
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and marker.written_at is not None:
+                header = (_LAST_WRITE_HEADER_KEY, f"{marker.written_at:.3f}".encode())
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        token = request_write_marker.set(marker)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_write_marker.reset(token)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from starlette.responses import Response
+
+
+class OrjsonResponse(Response):
+    """JSON przez orjson dla tras budujących odpowiedź z zaufanych danych (bez modeli Pydantic).
+
+    Daty w UTC dostają sufiks "Z", tak jak przy serializacji przez Pydantic.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+def raw_json(text: str) -> orjson.Fragment:
+    """Gotowy dokument JSON (np. jsonb::text z Postgresa) wklejany do odpowiedzi bez dekodowania."""
+    return orjson.Fragment(text)
@@ -1,16 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import secrets
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 
 from fastapi import Depends, Header, HTTPException, status
+from jose import ExpiredSignatureError, JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.logging import logger
 from app.db.models import FormSession
-from app.db.session import get_session
+from app.db.session import AsyncSessionLocal, get_read_session, get_session
+
+SIGNED_TOKEN_ALGORITHM = "HS256"
 
 
 def generate_session_token() -> tuple[str, str]:
@@ -24,19 +31,168 @@ def verify_session_token(raw_token: str, stored_hash: str) -> bool:
     return hashlib.sha256(raw_token.encode()).hexdigest() == stored_hash
 
 
-def get_token_expiry(hours: int = 2) -> datetime:
-    return datetime.now(timezone.utc) + timedelta(hours=hours)
+def get_token_expiry(hours: int | None = None) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(hours=hours or settings.session_token_ttl_hours)
+
+
+def _signing_keys() -> list[tuple[str, str]]:
+    """Parsuje SESSION_SIGNING_KEYS ("kid:sekret,kid2:sekret2") do listy (kid, sekret)."""
+    keys: list[tuple[str, str]] = []
+    for item in settings.session_signing_keys.split(","):
+        kid, sep, secret = item.strip().partition(":")
+        if sep and kid and secret:
+            keys.append((kid, secret))
+    return keys
+
+
+def check_signing_config() -> None:
+    """Wywoływane przy starcie: tryb "signed" bez kluczy wywracałby się dopiero przy pierwszej sesji."""
+    if settings.session_token_mode == "signed" and not _signing_keys():
+        raise RuntimeError("SESSION_SIGNING_KEYS must be set when SESSION_TOKEN_MODE=signed")
+
+
+def issue_session_token(
+    session_id: uuid.UUID, form_type: str, expires_at: datetime, generation: int = 0
+) -> tuple[str, str]:
+    """Zwraca (raw_token, hash_for_db) zgodnie z SESSION_TOKEN_MODE.
+
+    Hash tokenu podpisanego też trafia do bazy, więc ścieżka "opaque" nadal go akceptuje
+    (np. po przełączeniu trybu z powrotem). generation (claim "gen") to
+    FormSession.token_generation - po refresh starsze tokeny są odrzucane.
+    """
+    if settings.session_token_mode != "signed":
+        return generate_session_token()
+
+    check_signing_config()
+    kid, secret = _signing_keys()[0]
+    claims = {
+        "sub": str(session_id),
+        "exp": int(expires_at.timestamp()),
+        "form_type": form_type,
+        "gen": generation,
+    }
+    token = jwt.encode(claims, secret, algorithm=SIGNED_TOKEN_ALGORITHM, headers={"kid": kid})
+    return token, hashlib.sha256(token.encode()).hexdigest()
+
+
+def decode_signed_token(raw_token: str) -> dict:
+    """Weryfikuje podpis i exp; rzuca JWTError przy niepoprawnym tokenie."""
+    kid = jwt.get_unverified_header(raw_token).get("kid")
+    secret = dict(_signing_keys()).get(kid or "")
+    if secret is None:
+        raise JWTError("Unknown signing key")
+    return jwt.decode(raw_token, secret, algorithms=[SIGNED_TOKEN_ALGORITHM])
+
+
+class SessionDenylist:
+    """Zamknięte sesje i unieważnione generacje tokenów, których JWT jeszcze nie wygasły.
+
+    Lokalne close_session / refresh_token dopisują wpis od razu; pozostałe workery
+    dowiadują się o zmianie przy okresowym refresh() z bazy.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[uuid.UUID, float] = {}
+        # session_id -> (najniższa ważna generacja, do kiedy pamiętać)
+        self._floors: dict[uuid.UUID, tuple[int, float]] = {}
+
+    def add(self, session_id: uuid.UUID, until: datetime) -> None:
+        self._entries[session_id] = until.timestamp()
+
+    def revoke_before(self, session_id: uuid.UUID, generation: int, until: datetime) -> None:
+        """Tokeny z gen < generation przestają działać; stare tokeny wygasają przed nowym."""
+        current = self._floors.get(session_id)
+        if current is None or current[0] <= generation:
+            self._floors[session_id] = (generation, until.timestamp())
+
+    def is_superseded(self, session_id: uuid.UUID, generation: int) -> bool:
+        floor = self._floors.get(session_id)
+        return floor is not None and generation < floor[0]
+
+    def __contains__(self, session_id: object) -> bool:
+        return session_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        result = await db.execute(
+            select(FormSession.id, FormSession.token_expires_at).where(
+                FormSession.status == "closed",
+                FormSession.token_expires_at > datetime.now(timezone.utc),
+            )
+        )
+        now = time.time()
+        entries = {row.id: row.token_expires_at.timestamp() for row in result}
+        # Lokalne wpisy, których replika/commit jeszcze nie widać, zostają do wygaśnięcia.
+        entries.update({sid: until for sid, until in self._entries.items() if until > now})
+        self._entries = entries
+
+        result = await db.execute(
+            select(FormSession.id, FormSession.token_generation, FormSession.token_expires_at).where(
+                FormSession.token_generation > 0,
+                FormSession.status != "closed",
+                FormSession.token_expires_at > datetime.now(timezone.utc),
+            )
+        )
+        floors = {row.id: (row.token_generation, row.token_expires_at.timestamp()) for row in result}
+        for sid, (generation, until) in self._floors.items():
+            if until > now and generation > floors.get(sid, (0, 0.0))[0]:
+                floors[sid] = (generation, until)
+        self._floors = floors
+
+
+session_denylist = SessionDenylist()
+
+
+async def run_denylist_refresh() -> None:
+    """Pętla odświeżająca denylistę; uruchamiana w lifespan tylko w trybie "signed"."""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await session_denylist.refresh(db)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Session denylist refresh failed: %s", exc)
+        await asyncio.sleep(settings.session_denylist_refresh_seconds)
+
+
+def _session_from_claims(session_id: uuid.UUID, raw_token: str) -> FormSession:
+    try:
+        claims = decode_signed_token(raw_token)
+    except ExpiredSignatureError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired") from exc
+    except JWTError as exc:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token") from exc
+
+    if claims.get("sub") != str(session_id):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    if session_id in session_denylist:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Session is closed")
+    if session_denylist.is_superseded(session_id, claims.get("gen", 0)):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
 
+    # Obiekt tymczasowy (nie pochodzi z bazy) z polami, które niesie token.
+    return FormSession(
+        id=session_id,
+        form_type=claims.get("form_type", "EWYP"),
+        status="open",
+        token_expires_at=datetime.fromtimestamp(claims["exp"], tz=timezone.utc),
+        token_generation=claims.get("gen", 0),
+    )
 
-async def get_current_session(
-    session_id: uuid.UUID,
-    authorization: str | None = Header(None),
-    db: AsyncSession = Depends(get_session),  # noqa: B008
+
+async def _authenticate(
+    session_id: uuid.UUID, authorization: str | None, db: AsyncSession
 ) -> FormSession:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid token")
 
     raw_token = authorization.split(" ", maxsplit=1)[1].strip()
+    # Tokeny JWT (trzy segmenty) weryfikujemy bez bazy; tokeny "opaque" wydane
+    # przed przełączeniem trybu nadal przechodzą ścieżką bazodanową.
+    if settings.session_token_mode == "signed" and raw_token.count(".") == 2:
+        return _session_from_claims(session_id, raw_token)
+
     result = await db.execute(select(FormSession).where(FormSession.id == session_id))
     session = result.scalar_one_or_none()
     if not session:
@@ -54,3 +210,30 @@ async def get_current_session(
     return session
 
 
+async def authenticate_header(
+    session_id: uuid.UUID, authorization: str | None, db: AsyncSession
+) -> FormSession:
+    """Jak get_current_session, gdy session_id przychodzi w treści żądania, a nie w ścieżce."""
+    return await _authenticate(session_id, authorization, db)
+
+
+async def authenticate_token(session_id: uuid.UUID, raw_token: str, db: AsyncSession) -> FormSession:
+    """Jak get_current_session, ale z tokenem podanym wprost (WebSocket: pierwsza wiadomość)."""
+    return await _authenticate(session_id, f"Bearer {raw_token}", db)
+
+
+async def get_current_session(
+    session_id: uuid.UUID,
+    authorization: str | None = Header(None),
+    db: AsyncSession = Depends(get_session),  # noqa: B008
+) -> FormSession:
+    return await _authenticate(session_id, authorization, db)
+
+
+async def get_current_session_readonly(
+    session_id: uuid.UUID,
+    authorization: str | None = Header(None),
+    db: AsyncSession = Depends(get_read_session),  # noqa: B008
+) -> FormSession:
+    """Wariant dla tras tylko do odczytu - sprawdza token na replice (jeśli dostępna)."""
+    return await _authenticate(session_id, authorization, db)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+# Proxy: do czasu setup_tracing() (lub przy TRACING_EXPORTER=none) spany są no-opami.
+# Span SERVER żądania (nazwa = metoda + szablon trasy, traceparent z nagłówka) tworzy sam
+# FastAPI (>= 0.143), gdy globalny TracerProvider jest ustawiony - własnego middleware nie potrzeba.
+tracer = trace.get_tracer("app")
+
+_configured = False
+
+
+def tracing_enabled() -> bool:
+    return settings.tracing_exporter != "none"
+
+
+def setup_tracing(batch: bool = True) -> None:
+    """Lokalny eksporter (konsola albo plik JSON lines) - bez zewnętrznego kolektora.
+
+    batch=False dla procesów puli PDF: kończą się przez os._exit, więc bufor
+    BatchSpanProcessor nie zostałby opróżniony.
+    """
+    global _configured
+    if _configured or not tracing_enabled():
+        return
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+    )
+
+    if settings.tracing_exporter == "file":
+        path = Path(settings.base_dir) / settings.tracing_file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        out: Any = path.open("a", encoding="utf-8", buffering=1)
+    else:
+        out = sys.stdout
+    exporter = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    provider = TracerProvider(resource=Resource.create({"service.name": settings.app_name}))
+    provider.add_span_processor(BatchSpanProcessor(exporter) if batch else SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _configured = True
+
+
+def inject_carrier() -> dict[str, str]:
+    """Kontekst bieżącego spanu (traceparent) do przekazania do innego procesu/wątku."""
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+@contextmanager
+def span_from_carrier(
+    name: str, carrier: dict[str, str] | None, attributes: dict[str, Any] | None = None
+) -> Iterator[trace.Span]:
+    parent = propagate.extract(carrier) if carrier else None
+    with tracer.start_as_current_span(name, context=parent, attributes=attributes) as span:
+        yield span
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Span na każde zapytanie SQL (zdarzenia kursora silnika synchronicznego pod AsyncEngine)."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        operation = statement.lstrip().split(" ", 1)[0].upper()
+        span = tracer.start_span(
+            f"db.{operation.lower()}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": "postgresql",
+                "db.operation": operation,
+                "db.statement": statement[:2000],
+                "db.executemany": executemany,
+            },
+        )
+        if context is not None:
+            context._otel_span = span
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        span = getattr(context, "_otel_span", None)
+        if span is not None:
+            span.end()
+            context._otel_span = None
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context: Any) -> None:
+        span = getattr(exception_context.execution_context, "_otel_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+            exception_context.execution_context._otel_span = None
+
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.llm import warm_up_llm
+from app.core.logging import logger
+from app.db.session import engine
+from app.services.pdf_pool import WARMUP_PAYLOAD, render_pdf
+
+
+class WarmupState:
+    """Stan gotowości procesu; /ready zwraca 200 dopiero po zakończeniu rozgrzewki."""
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.steps: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+
+
+warmup_state = WarmupState()
+
+
+async def _prime_db() -> None:
+    # Otwiera tyle połączeń, ile trzyma pula, by pierwsze równoległe żądania nie czekały na connect.
+    async with AsyncExitStack() as stack:
+        for _ in range(engine.pool.size()):  # type: ignore[attr-defined]
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.execute(text("SELECT 1"))
+
+
+async def _prime_pdf() -> None:
+    # Pusty formularz przechodzi całą ścieżkę: Jinja, CSS, fontconfig, layout w workerze.
+    await render_pdf("ewyp", WARMUP_PAYLOAD)
+
+
+WARMUP_STEPS: dict[str, Callable[[], Awaitable[None]]] = {
+    "db_pool": _prime_db,
+    "pdf": _prime_pdf,
+    "llm": warm_up_llm,
+}
+
+
+async def run_warmup() -> None:
+    """Kroki wykonywane po kolei; błąd kroku jest logowany i nie blokuje gotowości."""
+    started = time.perf_counter()
+    for name, step in WARMUP_STEPS.items():
+        step_started = time.perf_counter()
+        try:
+            await asyncio.wait_for(step(), settings.warmup_step_timeout_seconds)
+        except Exception as exc:  # noqa: BLE001
+            warmup_state.errors[name] = str(exc) or type(exc).__name__
+            logger.warning("Warm-up step %s failed: %s", name, warmup_state.errors[name])
+        elapsed = time.perf_counter() - step_started
+        warmup_state.steps[name] = round(elapsed, 3)
+        logger.info("Warm-up step %s took %.2fs", name, elapsed)
+    warmup_state.ready = True
+    logger.info("Warm-up finished in %.2fs", time.perf_counter() - started)
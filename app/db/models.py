@@ -3,7 +3,18 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, Text, UniqueConstraint, ForeignKey, func
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
@@ -20,11 +31,30 @@ class ValidationLog(Base):
     value_hash: Mapped[str] = mapped_column(String(64), nullable=False)
     status: Mapped[str] = mapped_column(String(16), nullable=False)
     message: Mapped[str] = mapped_column(Text, nullable=False)
+    # Klucz partycjonowania musi być częścią klucza głównego.
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
+        DateTime(timezone=True), primary_key=True, server_default=func.now(), nullable=False
+    )
+
+    # Partycje dzienne tworzy/usuwa app.db.partitions (retencja = DROP TABLE partycji).
+    __table_args__ = (
+        # Częściowy indeks dla wygaszania zaległych "pending" (app.services.pending_validations).
+        Index("ix_validation_logs_pending", "created_at", postgresql_where=text("status = 'pending'")),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
 
+class ValidationLogRollup(Base):
+    """Godzinowe agregaty validation_logs per field_type/status, przeliczane przez maintenance partycji."""
+
+    __tablename__ = "validation_log_rollups"
+
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    field_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+    status: Mapped[str] = mapped_column(String(16), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
 class FormSession(Base):
     __tablename__ = "form_sessions"
 
@@ -38,8 +68,12 @@ class FormSession(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     closed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Licznik wersji utrzymywany przy każdym INSERT do form_versions (zamiast count(*)).
+    version_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Numer bieżącego tokenu (claim "gen"); refresh podbija go i unieważnia starsze JWT.
+    token_generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
-    versions: Mapped[list["FormVersion"]] = relationship(
+    versions: Mapped[list[FormVersion]] = relationship(
         back_populates="session", cascade="all, delete-orphan"
     )
 
@@ -57,8 +91,8 @@ class FormVersion(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
-    session: Mapped["FormSession"] = relationship(back_populates="versions")
-    validations: Mapped[list["FieldValidation"]] = relationship(
+    session: Mapped[FormSession] = relationship(back_populates="versions")
+    validations: Mapped[list[FieldValidation]] = relationship(
         back_populates="version", cascade="all, delete-orphan"
     )
 
@@ -79,6 +113,21 @@ class FieldValidation(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
-    version: Mapped["FormVersion"] = relationship(back_populates="validations")
+    version: Mapped[FormVersion] = relationship(back_populates="validations")
+
+    __table_args__ = (
+        Index("ix_field_validations_pending", "created_at", postgresql_where=text("status = 'pending'")),
+    )
+
+
+class PdfCacheEntry(Base):
+    """Wyrenderowane PDF-y (backend PDF_CACHE_BACKEND=db), usuwane od najdawniej używanych."""
 
+    __tablename__ = "pdf_cache_entries"
 
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_access: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import engine
+
+PARENT_TABLE = "validation_logs"
+ROLLUP_TABLE = "validation_log_rollups"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+_PREFIX = f"{PARENT_TABLE}_"
+
+
+def partition_name(day: date) -> str:
+    return f"{_PREFIX}{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> date | None:
+    """Odwrotność partition_name; None dla partycji domyślnej i obcych nazw."""
+    if not name.startswith(_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(_PREFIX) :], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def day_bounds(day: date) -> tuple[str, str]:
+    """Zakres [od, do) partycji dnia jako literały timestamptz (UTC)."""
+    return f"{day.isoformat()} 00:00:00+00", f"{(day + timedelta(days=1)).isoformat()} 00:00:00+00"
+
+
+def retention_cutoff(today: date, retention_days: int) -> date:
+    """Pierwszy dzień, który jeszcze mieści się w oknie retencji."""
+    return today - timedelta(days=retention_days)
+
+
+def expired_partitions(names: list[str], today: date, retention_days: int) -> list[str]:
+    """Partycje w całości starsze niż okno retencji (dzień D trzyma wiersze z [D, D+1))."""
+    cutoff = retention_cutoff(today, retention_days)
+    expired = []
+    for name in names:
+        day = partition_day(name)
+        if day is not None and day < cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+def rollup_window(
+    now: datetime, last_bucket: datetime | None, lookback_hours: int, retention_days: int
+) -> tuple[datetime, datetime]:
+    """Zakres [od, do) godzin do przeliczenia: tylko zamknięte godziny.
+
+    Ostatnie lookback_hours liczymy od nowa przy każdym przejściu - "pending" z tych godzin
+    dostają werdykt później. Przerwa w maintenance (last_bucket dawniej) jest nadrabiana,
+    pusty agregat budowany jest z całego okna retencji.
+    """
+    end = now.replace(minute=0, second=0, microsecond=0)
+    start = end - timedelta(hours=lookback_hours)
+    if last_bucket is None:
+        start = end - timedelta(days=retention_days)
+    elif last_bucket + timedelta(hours=1) < start:
+        start = last_bucket + timedelta(hours=1)
+    return start, end
+
+
+def rollup_lookback_hours(pending_timeout_seconds: float) -> int:
+    """Godziny, w których wpis może jeszcze zmienić status (limit "pending" + przejście sweepu)."""
+    return math.ceil(pending_timeout_seconds * 1.25 / 3600) + 1
+
+
+async def build_rollups(conn: AsyncConnection, now: datetime) -> int:
+    """Godzinowe agregaty validation_logs per field_type/status poza ścieżką żądania.
+
+    INSERT ... SELECT ... GROUP BY po zakresie created_at (tylko partycje z tych dni);
+    liczby są nadpisywane, więc ponowne przeliczenie godziny jest bezpieczne.
+    """
+    last_bucket = (await conn.execute(text(f"SELECT max(bucket) FROM {ROLLUP_TABLE}"))).scalar()
+    start, end = rollup_window(
+        now,
+        last_bucket,
+        rollup_lookback_hours(settings.validation_pending_timeout_seconds),
+        settings.validation_log_retention_days,
+    )
+    result = await conn.execute(
+        text(
+            f"INSERT INTO {ROLLUP_TABLE} (bucket, field_type, status, count) "
+            "SELECT date_trunc('hour', created_at), field_type, status, count(*) "
+            f"FROM {PARENT_TABLE} "
+            "WHERE created_at >= :start AND created_at < :end AND status <> 'pending' "
+            "GROUP BY 1, 2, 3 "
+            "ON CONFLICT (bucket, field_type, status) DO UPDATE SET count = EXCLUDED.count"
+        ),
+        {"start": start, "end": end},
+    )
+    return result.rowcount
+
+
+async def _existing_partitions(conn: AsyncConnection) -> list[str]:
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ),
+        {"parent": PARENT_TABLE},
+    )
+    return [row[0] for row in result]
+
+
+async def ensure_partitions(conn: AsyncConnection, today: date, days_ahead: int) -> list[str]:
+    """Tworzy partycje na dziś i kolejne dni; zwraca nazwy nowo utworzonych."""
+    existing = set(await _existing_partitions(conn))
+    created = []
+    if DEFAULT_PARTITION not in existing:
+        # Siatka bezpieczeństwa: insert nie może się wywrócić, gdy maintenance nie zdążył.
+        await conn.execute(
+            text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT")
+        )
+        created.append(DEFAULT_PARTITION)
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        name = partition_name(day)
+        if name in existing:
+            continue
+        await _create_partition(conn, day)
+        created.append(name)
+    return created
+
+
+async def _create_partition(conn: AsyncConnection, day: date) -> None:
+    """CREATE ... PARTITION OF wywraca się, gdy DEFAULT ma już wiersze z tego dnia
+    (np. maintenance nie działał przez dobę). Wtedy przenosimy je do nowej tabeli
+    i dopiero ją podpinamy - w jednej transakcji, z zablokowanymi insertami do DEFAULT.
+    """
+    name = partition_name(day)
+    start, end = day_bounds(day)
+    bounds = {"start": start, "end": end}
+    stray = await conn.execute(
+        text(
+            f"SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= CAST(:start AS timestamptz) AND created_at < CAST(:end AS timestamptz) LIMIT 1"
+        ),
+        bounds,
+    )
+    if stray.first() is None:
+        await conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        )
+        return
+
+    await conn.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN EXCLUSIVE MODE"))
+    await conn.execute(
+        text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    )
+    moved = await conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE created_at >= CAST(:start AS timestamptz) AND created_at < CAST(:end AS timestamptz) "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    await conn.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+    )
+    logger.info("Moved %s validation_logs rows from %s to %s", moved.rowcount, DEFAULT_PARTITION, name)
+
+
+async def drop_expired(conn: AsyncConnection, today: date, retention_days: int) -> list[str]:
+    """Retencja w O(1) na partycję: DROP TABLE zamiast DELETE + VACUUM."""
+    expired = expired_partitions(await _existing_partitions(conn), today, retention_days)
+    for name in expired:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    return expired
+
+
+async def prune_default(conn: AsyncConnection, today: date, retention_days: int) -> int:
+    """Retencja dla DEFAULT: jego wierszy nie usunie DROP partycji dziennej."""
+    start, _end = day_bounds(retention_cutoff(today, retention_days))
+    result = await conn.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < CAST(:cutoff AS timestamptz)"),
+        {"cutoff": start},
+    )
+    return result.rowcount
+
+
+async def maintain_validation_log_partitions(conn: AsyncConnection) -> None:
+    today = datetime.now(timezone.utc).date()
+    created = await ensure_partitions(conn, today, settings.validation_log_partitions_ahead)
+    dropped = await drop_expired(conn, today, settings.validation_log_retention_days)
+    pruned = await prune_default(conn, today, settings.validation_log_retention_days)
+    rollups = await build_rollups(conn, datetime.now(timezone.utc))
+    if created or dropped or pruned:
+        logger.info(
+            "validation_logs partitions created=%s dropped=%s default_pruned=%s", created, dropped, pruned
+        )
+    logger.debug("validation_log_rollups rows written=%s", rollups)
+
+
+async def run_partition_maintenance() -> None:
+    """Pętla lifespan: pierwsze przejście wykonuje main.py przed startem, tu kolejne."""
+    while True:
+        await asyncio.sleep(settings.validation_log_maintenance_interval_seconds)
+        try:
+            async with engine.begin() as conn:
+                await maintain_validation_log_partitions(conn)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("validation_logs partition maintenance failed: %s", exc)
@@ -1,15 +1,159 @@
+import asyncio
+import time
+import uuid
 from collections.abc import AsyncGenerator
+from contextvars import ContextVar
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from app.core.config import settings
+from app.core.logging import logger
 
 engine = create_async_engine(settings.database_url, future=True, echo=False)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
 
+# Opcjonalna replika tylko do odczytu (DATABASE_REPLICA_URL).
+replica_engine: AsyncEngine | None = (
+    create_async_engine(settings.database_replica_url, future=True, echo=False)
+    if settings.database_replica_url
+    else None
+)
+ReplicaSessionLocal = (
+    async_sessionmaker(replica_engine, expire_on_commit=False, autoflush=False)
+    if replica_engine is not None
+    else None
+)
+
+# Opóźnienie repliki w sekundach; NULL (brak replikacji, np. druga niezależna instancja) = 0.
+_REPLICA_LAG_SQL = text(
+    "SELECT COALESCE(CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END, 0)"
+)
+
+
+class WriteMarker:
+    """Znacznik zapisu w ramach jednego żądania HTTP (app.core.read_your_writes).
+
+    client_last_write to czas ostatniego zapisu podany przez klienta w nagłówku
+    X-Last-Write (z odpowiedzi dowolnego workera); written_at ustawia mark_write.
+    """
+
+    def __init__(self, client_last_write: float | None = None):
+        self.client_last_write = client_last_write
+        self.written_at: float | None = None
+
+
+request_write_marker: ContextVar[WriteMarker | None] = ContextVar("request_write_marker", default=None)
+
+
+class ReplicaRouter:
+    """Decyduje, czy odczyt dla danej sesji formularza może pójść na replikę.
+
+    Replika jest używana, gdy ostatni pomiar opóźnienia mieści się w limicie, a sesja
+    nie zapisywała niczego w oknie read-your-writes (limit opóźnienia + interwał
+    pomiaru). Zapisy z tego procesu są śledzone w pamięci; zapis obsłużony przez inny
+    worker zna tylko klient - odsyła jego czas w X-Last-Write (request_write_marker).
+    """
+
+    def __init__(self, max_lag_seconds: float, check_interval_seconds: float):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.healthy = False
+        self.lag_seconds: float | None = None
+        self._recent_writes: dict[uuid.UUID, float] = {}
+
+    @property
+    def read_your_writes_seconds(self) -> float:
+        return self.max_lag_seconds + self.check_interval_seconds
+
+    def mark_write(self, session_id: uuid.UUID) -> None:
+        marker = request_write_marker.get()
+        if marker is not None:
+            marker.written_at = time.time()
+        now = time.monotonic()
+        self._recent_writes[session_id] = now
+        if len(self._recent_writes) > 10_000:
+            horizon = now - self.read_your_writes_seconds
+            self._recent_writes = {k: v for k, v in self._recent_writes.items() if v > horizon}
+
+    def record_lag(self, lag_seconds: float | None) -> None:
+        """None oznacza niedostępną replikę."""
+        self.lag_seconds = lag_seconds
+        self.healthy = lag_seconds is not None and lag_seconds <= self.max_lag_seconds
+
+    def use_replica(self, session_id: uuid.UUID | None) -> bool:
+        if not self.healthy:
+            return False
+        marker = request_write_marker.get()
+        if (
+            marker is not None
+            and marker.client_last_write is not None
+            and time.time() - marker.client_last_write <= self.read_your_writes_seconds
+        ):
+            return False
+        if session_id is None:
+            return True
+        written_at = self._recent_writes.get(session_id)
+        return written_at is None or time.monotonic() - written_at > self.read_your_writes_seconds
+
+
+replica_router = ReplicaRouter(settings.replica_max_lag_seconds, settings.replica_check_interval_seconds)
+
+
+async def check_replica() -> None:
+    if replica_engine is None:
+        return
+    try:
+        async with replica_engine.connect() as conn:
+            lag = float((await conn.execute(_REPLICA_LAG_SQL)).scalar_one())
+    except Exception as exc:  # noqa: BLE001
+        if replica_router.healthy:
+            logger.warning("Read replica unavailable, falling back to primary: %s", exc)
+        replica_router.record_lag(None)
+        return
+    was_healthy = replica_router.healthy
+    replica_router.record_lag(lag)
+    if was_healthy and not replica_router.healthy:
+        logger.warning("Read replica lag %.1fs above limit, falling back to primary", lag)
+
+
+async def run_replica_monitor() -> None:
+    """Pętla lifespan mierząca opóźnienie repliki."""
+    while True:
+        await check_replica()
+        await asyncio.sleep(replica_router.check_interval_seconds)
+
+
+def read_sessionmaker(session_id: uuid.UUID | None = None) -> async_sessionmaker[AsyncSession]:
+    """Fabryka sesji do odczytów poza zależnościami FastAPI (np. w generatorze odpowiedzi)."""
+    if ReplicaSessionLocal is not None and replica_router.use_replica(session_id):
+        return ReplicaSessionLocal
+    return AsyncSessionLocal
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
 
 
+async def get_read_session(session_id: uuid.UUID) -> AsyncGenerator[AsyncSession, None]:
+    """Sesja do tras tylko do odczytu: replika, jeśli zdrowa i bez świeżych zapisów sesji."""
+    if ReplicaSessionLocal is None or not replica_router.use_replica(session_id):
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
+    async with ReplicaSessionLocal() as session:
+        try:
+            yield session
+        except (DBAPIError, OSError):
+            # Błąd połączenia z repliką: kolejne żądania idą na primary do następnego pomiaru.
+            replica_router.record_lag(None)
+            raise
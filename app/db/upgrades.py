@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.models import Base
+from app.db.partitions import PARENT_TABLE, ensure_partitions, retention_cutoff
+
+LEGACY_VALIDATION_LOGS = f"{PARENT_TABLE}_legacy"
+
+
+class SchemaUpgradeError(RuntimeError):
+    """Schemat, którego nie da się zmigrować automatycznie - start bez ponawiania."""
+
+
+async def _column_exists(conn: AsyncConnection, table: str, column: str) -> bool:
+    result = await conn.execute(
+        text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+        ),
+        {"table": table, "column": column},
+    )
+    return result.first() is not None
+
+
+async def add_version_count(conn: AsyncConnection) -> None:
+    """form_sessions.version_count dla baz sprzed licznika (create_all nie zmienia tabel).
+
+    Kolumna jest dodawana i wypełniana max(version) sesji tylko raz - przy kolejnych
+    startach kończy się na jednym zapytaniu do katalogu. Powtórzenie (np. dwa workery
+    naraz) jest bezpieczne.
+    """
+    if await _column_exists(conn, "form_sessions", "version_count"):
+        return
+    await conn.execute(
+        text("ALTER TABLE form_sessions ADD COLUMN IF NOT EXISTS version_count integer NOT NULL DEFAULT 0")
+    )
+    result = await conn.execute(
+        text(
+            "UPDATE form_sessions s SET version_count = v.max_version "
+            "FROM (SELECT session_id, max(version) AS max_version FROM form_versions GROUP BY session_id) v "
+            "WHERE s.id = v.session_id AND s.version_count < v.max_version"
+        )
+    )
+    logger.info("Added form_sessions.version_count, backfilled %s sessions", result.rowcount)
+
+
+async def add_token_generation(conn: AsyncConnection) -> None:
+    """form_sessions.token_generation - istniejące sesje zaczynają od 0, jak tokeny bez claimu "gen"."""
+    if await _column_exists(conn, "form_sessions", "token_generation"):
+        return
+    await conn.execute(
+        text("ALTER TABLE form_sessions ADD COLUMN IF NOT EXISTS token_generation integer NOT NULL DEFAULT 0")
+    )
+    logger.info("Added form_sessions.token_generation")
+
+
+async def add_pending_indexes(conn: AsyncConnection) -> None:
+    """Częściowe indeksy "pending" (create_all nie dodaje indeksów do istniejących tabel).
+
+    Pierwsze utworzenie na dużej tabeli blokuje zapisy do niej na czas budowy indeksu.
+    """
+    for table in ("field_validations", "validation_logs"):
+        await conn.execute(
+            text(f"CREATE INDEX IF NOT EXISTS ix_{table}_pending ON {table} (created_at) WHERE status = 'pending'")
+        )
+
+
+async def partition_validation_logs(conn: AsyncConnection) -> None:
+    """validation_logs sprzed partycjonowania: create_all pomija istniejącą zwykłą tabelę.
+
+    Stara tabela dostaje nazwę *_legacy, powstaje tabela partycjonowana z partycjami
+    na każdy dzień z okna retencji, wiersze z tego okna są kopiowane, a stara tabela
+    usuwana - wszystko w transakcji startu (błąd = brak zmian). Starsze wiersze
+    i tak usunęłaby retencja. Kopia blokuje zapisy do logu na czas migracji.
+    """
+    relkind = await conn.scalar(
+        text(
+            "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE n.nspname = current_schema() AND c.relname = :table"
+        ),
+        {"table": PARENT_TABLE},
+    )
+    if relkind is None or relkind == "p":
+        return
+    if relkind != "r":
+        raise SchemaUpgradeError(f"{PARENT_TABLE} is not a table (relkind={relkind!r}); migrate it by hand")
+
+    await conn.execute(text(f"LOCK TABLE {PARENT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+    await conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_VALIDATION_LOGS}"))
+    # Nazwy indeksów są wspólne dla schematu - zwalniamy je dla nowej tabeli.
+    pkey = await conn.scalar(
+        text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'p'"
+        ),
+        {"table": LEGACY_VALIDATION_LOGS},
+    )
+    if pkey is not None:
+        await conn.execute(
+            text(f'ALTER TABLE {LEGACY_VALIDATION_LOGS} RENAME CONSTRAINT "{pkey}" TO {LEGACY_VALIDATION_LOGS}_pkey')
+        )
+    await conn.execute(
+        text(f"ALTER INDEX IF EXISTS ix_{PARENT_TABLE}_pending RENAME TO ix_{LEGACY_VALIDATION_LOGS}_pending")
+    )
+    await conn.run_sync(Base.metadata.tables[PARENT_TABLE].create)
+
+    today = datetime.now(timezone.utc).date()
+    cutoff = retention_cutoff(today, settings.validation_log_retention_days)
+    oldest = await conn.scalar(
+        text(
+            f"SELECT min(created_at) FROM {LEGACY_VALIDATION_LOGS} "
+            "WHERE created_at >= CAST(:cutoff AS timestamptz)"
+        ),
+        {"cutoff": cutoff.isoformat()},
+    )
+    first_day = oldest.astimezone(timezone.utc).date() if oldest is not None else today
+    await ensure_partitions(conn, first_day, (today - first_day).days + settings.validation_log_partitions_ahead)
+    copied = await conn.execute(
+        text(
+            f"INSERT INTO {PARENT_TABLE} (id, field_type, value_hash, status, message, created_at) "
+            "SELECT id, field_type, value_hash, status, message, created_at "
+            f"FROM {LEGACY_VALIDATION_LOGS} WHERE created_at >= CAST(:cutoff AS timestamptz)"
+        ),
+        {"cutoff": cutoff.isoformat()},
+    )
+    await conn.execute(text(f"DROP TABLE {LEGACY_VALIDATION_LOGS}"))
+    logger.info("Partitioned %s: copied %s rows since %s", PARENT_TABLE, copied.rowcount, cutoff)
+
+
+async def upgrade_schema(conn: AsyncConnection) -> None:
+    """Zmiany schematu dla istniejących baz; wywoływane w lifespan po create_all."""
+    await partition_validation_logs(conn)
+    await add_version_count(conn)
+    await add_token_generation(conn)
+    await add_pending_indexes(conn)
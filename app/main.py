@@ -2,14 +2,30 @@ import asyncio
 from collections.abc import Awaitable, Callable
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware
 
+from app.agent.config_loader import config_loader
 from app.api.routes import router as api_router
+from app.core.admission import AdmissionMiddleware, loop_lag
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.profiling import ProfilingMiddleware, profiling_enabled
+from app.core.read_your_writes import LAST_WRITE_HEADER, ReadYourWritesMiddleware
+from app.core.security import check_signing_config, run_denylist_refresh
+from app.core.tracing import instrument_engine, setup_tracing, tracing_enabled
+from app.core.warmup import run_warmup, warmup_state
 from app.db.models import Base
-from app.db.session import engine
+from app.db.partitions import maintain_validation_log_partitions, run_partition_maintenance
+from app.db.session import engine, replica_engine, run_replica_monitor
+from app.db.upgrades import SchemaUpgradeError, upgrade_schema
+from app.services.pdf_cache import run_pdf_cache_eviction
+from app.services.pdf_pool import pdf_pool
+from app.services.pdf_prerender import pdf_prerenderer
+from app.services.pending_validations import run_pending_sweep
+from app.services.validation_upgrades import validation_upgrader
 
 
 async def _wait_for_db(connect_fn: Callable[[], Awaitable[object]], attempts: int = 10, delay: float = 1.0) -> None:
@@ -19,6 +35,9 @@ async def _wait_for_db(connect_fn: Callable[[], Awaitable[object]], attempts: in
         try:
             await connect_fn()
             return
+        except SchemaUpgradeError:
+            # Baza odpowiada, ale schematu nie da się zmigrować - ponawianie nic nie zmieni.
+            raise
         except Exception as exc:  # noqa: BLE001
             last_exc = exc
             logger.info("DB not ready, retry %s/%s (%s)", idx, attempts, exc)
@@ -31,13 +50,74 @@ async def lifespan(app: FastAPI):
     async def connect_and_create() -> None:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
-
+            await upgrade_schema(conn)
+            await maintain_validation_log_partitions(conn)
+
+    # Konfiguracja pól czytana tutaj, a nie przy imporcie (export_openapi, testy, start workera).
+    config_loader.load()
+    check_signing_config()
+    setup_tracing()
+    if tracing_enabled():
+        instrument_engine(engine)
+        if replica_engine is not None:
+            instrument_engine(replica_engine)
     await _wait_for_db(connect_and_create)
-    yield
+    pdf_pool.start()
+
+    background = [
+        asyncio.create_task(run_partition_maintenance()),
+        asyncio.create_task(validation_upgrader.run()),
+        asyncio.create_task(run_pending_sweep()),
+    ]
+    if settings.admission_control:
+        background.append(asyncio.create_task(loop_lag.run()))
+    if settings.startup_warmup:
+        # W tle: /health odpowiada od razu, /ready dopiero po rozgrzewce.
+        background.append(asyncio.create_task(run_warmup()))
+    else:
+        warmup_state.ready = True
+    if settings.session_token_mode == "signed":
+        background.append(asyncio.create_task(run_denylist_refresh()))
+    if replica_engine is not None:
+        background.append(asyncio.create_task(run_replica_monitor()))
+    if settings.pdf_cache_backend == "db":
+        background.append(asyncio.create_task(run_pdf_cache_eviction()))
+    if pdf_prerenderer.enabled and settings.pdf_cache_backend != "none":
+        background.append(asyncio.create_task(pdf_prerenderer.run()))
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        pdf_pool.shutdown()
 
 
 app = FastAPI(title=settings.app_name, version="0.1.0", lifespan=lifespan)
 
+if settings.admission_control:
+    # Najgłębiej z middleware: odrzucenia widzą metryki, a CORS dokłada nagłówki do 503.
+    app.add_middleware(AdmissionMiddleware)
+
+if replica_engine is not None:
+    # Znacznik zapisu (X-Last-Write) dla read-your-writes, gdy zapis i odczyt trafią do różnych workerów.
+    app.add_middleware(ReadYourWritesMiddleware)
+
+if settings.gzip_minimum_size > 0:
+    # PDF i ZIP są już skompresowane - szkoda CPU.
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.gzip_minimum_size,
+        compresslevel=settings.gzip_compresslevel,
+        exclude_content_types=(*DEFAULT_EXCLUDED_CONTENT_TYPES, "application/pdf"),
+    )
+
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+if profiling_enabled():
+    # Bez klucza i próbkowania middleware nie jest dodawany - zero narzutu.
+    app.add_middleware(ProfilingMiddleware)
+
 # Prosty CORS dla frontu (np. Vite na 5173). W razie potrzeby zawęź origin.
 app.add_middleware(
     CORSMiddleware,
@@ -45,6 +125,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[LAST_WRITE_HEADER],
 )
 
 
@@ -53,6 +134,22 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready(response: Response) -> dict[str, object]:
+    if not warmup_state.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "warming_up", "steps": warmup_state.steps}
+    return {"status": "ready", "steps": warmup_state.steps, "errors": warmup_state.errors}
+
+
+if settings.metrics_enabled:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> Response:
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
+
 app.include_router(api_router, prefix="/api")
 
 
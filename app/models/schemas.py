@@ -1,3 +1,4 @@
+import uuid
 from typing import Literal
 
 from pydantic import BaseModel, Field
@@ -7,10 +8,22 @@ class ValidationRequest(BaseModel):
     field_type: str = Field(..., description="Typ pola dostarczony przez frontend, np. text/email/phone/number/select")
     value: str = Field(..., description="Wartość pola do oceny")
     context: str | None = Field(default=None, description="Opcjonalny kontekst biznesowy")
+    session_id: uuid.UUID | None = Field(
+        default=None,
+        description="Z field_path: nowsza walidacja tego pola anuluje starszą w toku; "
+        "wymaga nagłówka Authorization z tokenem tej sesji",
+    )
+    field_path: str | None = Field(default=None, description="Ścieżka pola w formularzu sesji")
+    defer_llm: bool = Field(
+        default=False,
+        description='Nie czekaj na LLM: zwróć "pending" i validation_id do odpytania GET /validate/{id}',
+    )
 
 
 class ValidationResponse(BaseModel):
-    status: Literal["success", "objection"]
+    status: Literal["success", "objection", "pending"]
     justification: str
+    # Tylko dla "pending" z defer_llm.
+    validation_id: uuid.UUID | None = None
 
 
@@ -4,7 +4,9 @@ import uuid
 from datetime import datetime
 from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
+
+PdfTemplate = Literal["ewyp", "notification"]
 
 
 class SessionCreateRequest(BaseModel):
@@ -35,11 +37,13 @@ class FormSubmitResponse(BaseModel):
 class FormValidateRequest(BaseModel):
     payload: dict
     fields_to_validate: list[str] | None = None
+    # Pola wymagające LLM wracają jako "pending"; werdykty trafiają do wersji w tle.
+    defer_llm: bool = False
 
 
 class FieldValidationResult(BaseModel):
     field_path: str
-    status: Literal["success", "objection"]
+    status: Literal["success", "objection", "pending"]
     justification: str
 
 
@@ -60,6 +64,7 @@ class HistoryResponse(BaseModel):
     session_id: uuid.UUID
     total_versions: int
     versions: list[VersionSummary]
+    next_cursor: int | None = None
 
 
 class FormSnapshotResponse(BaseModel):
@@ -70,3 +75,15 @@ class FormSnapshotResponse(BaseModel):
     created_at: datetime
 
 
+class PdfExportRequest(BaseModel):
+    session_ids: list[uuid.UUID] | None = None
+    # Sesje utworzone w przedziale [created_from, created_to).
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    templates: list[PdfTemplate] = ["ewyp"]
+
+    @model_validator(mode="after")
+    def _require_filter(self) -> PdfExportRequest:
+        if not self.session_ids and self.created_from is None and self.created_to is None:
+            raise ValueError("Provide session_ids or a created_from/created_to range")
+        return self
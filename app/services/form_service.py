@@ -2,15 +2,26 @@ from __future__ import annotations
 
 import hashlib
 import uuid
+from collections.abc import Sequence
+from datetime import datetime
+from functools import partial
 from typing import Any
 
-from sqlalchemy import func, select
+from sqlalchemy import Text, cast, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.agent.config_loader import config_loader
-from app.agent.validator import run_validation_agent
+from app.agent.validator import (
+    AgentResult,
+    run_deterministic_validation,
+    run_llm_validation,
+    run_validation_agent,
+)
 from app.db.models import FieldValidation, FormSession, FormVersion
+from app.db.session import AsyncSessionLocal, replica_router
+from app.services.pdf_prerender import pdf_prerenderer
+from app.services.validation_upgrades import PENDING, validation_upgrader
 
 
 def _hash_value(value: str) -> str:
@@ -37,32 +48,70 @@ async def _ensure_open_session(db: AsyncSession, session_id: uuid.UUID) -> FormS
 
 
 async def _next_version(db: AsyncSession, session_id: uuid.UUID) -> int:
+    """Atomowo podbija licznik wersji sesji i zwraca numer nowej wersji.
+
+    GREATEST z max(version) chroni przed kolizją z UniqueConstraint(session_id, version),
+    gdyby licznik był za mały (np. baza sprzed kolumny, zanim zadziała upgrade_schema);
+    max() to odczyt z indeksu unikalnego.
+    """
+    current_max = (
+        select(func.coalesce(func.max(FormVersion.version), 0))
+        .where(FormVersion.session_id == session_id)
+        .scalar_subquery()
+    )
     result = await db.execute(
-        select(func.max(FormVersion.version)).where(FormVersion.session_id == session_id)
+        update(FormSession)
+        .where(FormSession.id == session_id)
+        .values(version_count=func.greatest(FormSession.version_count, current_max) + 1)
+        .returning(FormSession.version_count)
     )
-    current_max = result.scalar_one_or_none() or 0
-    return current_max + 1
+    return int(result.scalar_one())
 
 
-async def submit_form(
+async def _insert_version(
     db: AsyncSession,
     session_id: uuid.UUID,
     payload: dict,
-    source: str = "raw",
-    comment: str | None = None,
+    source: str,
+    comment: str | None,
 ) -> FormVersion:
-    await _ensure_open_session(db, session_id)
+    """INSERT ... RETURNING bez dodatkowego refresh; payload nie wraca z bazy."""
     version_number = await _next_version(db, session_id)
-    version = FormVersion(
+    result = await db.execute(
+        insert(FormVersion)
+        .values(
+            session_id=session_id,
+            version=version_number,
+            payload=payload,
+            source=source,
+            comment=comment,
+        )
+        .returning(FormVersion.id, FormVersion.created_at)
+    )
+    row = result.one()
+    return FormVersion(
+        id=row.id,
         session_id=session_id,
         version=version_number,
         payload=payload,
         source=source,
         comment=comment,
+        created_at=row.created_at,
     )
-    db.add(version)
+
+
+async def submit_form(
+    db: AsyncSession,
+    session_id: uuid.UUID,
+    payload: dict,
+    source: str = "raw",
+    comment: str | None = None,
+) -> FormVersion:
+    await _ensure_open_session(db, session_id)
+    version = await _insert_version(db, session_id, payload, source, comment)
     await db.commit()
-    await db.refresh(version)
+    replica_router.mark_write(session_id)
+    pdf_prerenderer.schedule(session_id, version.version, source, payload)
     return version
 
 
@@ -71,25 +120,22 @@ async def validate_form(
     session_id: uuid.UUID,
     payload: dict,
     fields_to_validate: list[str] | None = None,
+    defer_llm: bool = False,
 ) -> tuple[FormVersion, list[FieldValidation]]:
+    """Waliduje pola i zapisuje je z nową wersją.
+
+    Przy defer_llm pola wymagające LLM są zapisywane jako "pending" i dostają werdykt
+    w tle (validation_upgrader); klient odpytuje wersję, aż zniknie "pending".
+    """
     await _ensure_open_session(db, session_id)
-    version_number = await _next_version(db, session_id)
-    version = FormVersion(
-        session_id=session_id,
-        version=version_number,
-        payload=payload,
-        source="raw",
-        comment="validation",
-    )
-    db.add(version)
-    await db.flush()
 
     mapping = config_loader.field_mapping or {}
     selected_fields = (
         [f for f in fields_to_validate if f in mapping] if fields_to_validate else list(mapping.keys())
     )
 
-    validations: list[FieldValidation] = []
+    rows: list[dict[str, Any]] = []
+    deferred: list[tuple[dict[str, Any], str]] = []
     for field_path in selected_fields:
         field_type = mapping.get(field_path)
         if not field_type:
@@ -99,42 +145,99 @@ async def validate_form(
             continue
         # Ensure string for agent
         value_str = str(value)
-        agent_result = await run_validation_agent(field_type, value_str, None)
-        validation = FieldValidation(
-            version_id=version.id,
-            field_path=field_path,
-            field_type=field_type,
-            value_hash=_hash_value(value_str),
-            status=agent_result.status,
-            justification=agent_result.justification,
-        )
-        db.add(validation)
-        validations.append(validation)
+        # id nadawane tu (nie w bazie), by zlecenie w tle wiedziało, który wiersz uzupełnić.
+        row: dict[str, Any] = {
+            "id": uuid.uuid4(),
+            "field_path": field_path,
+            "field_type": field_type,
+            "value_hash": _hash_value(value_str),
+        }
+        rows.append(row)
+        if defer_llm:
+            quick = run_deterministic_validation(field_type, value_str)
+            if quick is None:
+                deferred.append((row, value_str))
+                continue
+            agent_result = quick
+        else:
+            agent_result = await run_validation_agent(field_type, value_str, None)
+        row.update(status=agent_result.status, justification=agent_result.justification)
 
+    defer_now = validation_upgrader.has_room(len(deferred))
+    for row, value_str in deferred:
+        if defer_now:
+            row.update(status=PENDING, justification="")
+        else:
+            # Zaległość w tle za duża - werdykt teraz, jak bez defer_llm.
+            agent_result = await run_llm_validation(row["field_type"], value_str, None)
+            row.update(status=agent_result.status, justification=agent_result.justification)
+    if not defer_now:
+        deferred = []
+
+    # Wersja i walidacje zapisywane dopiero po odpowiedziach agenta: stała liczba
+    # zapytań (jeden wielowierszowy INSERT ... RETURNING) niezależnie od liczby pól.
+    version = await _insert_version(db, session_id, payload, "raw", "validation")
+    validations: list[FieldValidation] = []
+    if rows:
+        result = await db.scalars(
+            insert(FieldValidation).returning(FieldValidation, sort_by_parameter_order=True),
+            [{**row, "version_id": version.id} for row in rows],
+        )
+        validations = list(result.all())
     await db.commit()
-    await db.refresh(version)
-    for validation in validations:
-        await db.refresh(validation)
+    replica_router.mark_write(session_id)
+    for row, value_str in deferred:
+        validation_upgrader.schedule(
+            row["field_type"], value_str, None, partial(_store_upgrade, session_id, row["id"])
+        )
+    pdf_prerenderer.schedule(session_id, version.version, version.source, payload)
     return version, validations
 
 
+async def _store_upgrade(session_id: uuid.UUID, validation_id: uuid.UUID, result: AgentResult) -> None:
+    """Podmienia "pending" na werdykt LLM (tylko raz - ponowny zapis nic nie zmienia)."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(FieldValidation)
+            .where(FieldValidation.id == validation_id, FieldValidation.status == PENDING)
+            .values(status=result.status, justification=result.justification)
+        )
+        await db.commit()
+    replica_router.mark_write(session_id)
+
+
 async def get_history(
-    db: AsyncSession, session_id: uuid.UUID, limit: int = 10, offset: int = 0
-) -> tuple[int, list[FormVersion]]:
+    db: AsyncSession,
+    session_id: uuid.UUID,
+    limit: int = 10,
+    cursor: int | None = None,
+    offset: int = 0,
+) -> tuple[int, Sequence[Any], int | None]:
+    """Historia wersji stronicowana po kluczu (version < cursor), tylko kolumny podsumowania.
+
+    Zwraca (total, wiersze, next_cursor); next_cursor jest None na ostatniej stronie.
+    offset jest przestarzały (zgodność ze starszymi klientami) i działa tylko bez cursor.
+    """
     total_query = await db.execute(
-        select(func.count(FormVersion.id)).where(FormVersion.session_id == session_id)
+        select(FormSession.version_count).where(FormSession.id == session_id)
     )
     total = int(total_query.scalar_one_or_none() or 0)
 
-    result = await db.execute(
-        select(FormVersion)
-        .where(FormVersion.session_id == session_id)
-        .order_by(FormVersion.version.desc())
-        .offset(offset)
-        .limit(limit)
-    )
-    versions = list(result.scalars().all())
-    return total, versions
+    query = select(
+        FormVersion.version, FormVersion.source, FormVersion.created_at, FormVersion.comment
+    ).where(FormVersion.session_id == session_id)
+    if cursor is not None:
+        query = query.where(FormVersion.version < cursor)
+    elif offset:
+        query = query.offset(offset)
+    result = await db.execute(query.order_by(FormVersion.version.desc()).limit(limit + 1))
+    versions = list(result.all())
+
+    next_cursor = None
+    if len(versions) > limit:
+        versions = versions[:limit]
+        next_cursor = versions[-1].version
+    return total, versions, next_cursor
 
 
 async def get_version(db: AsyncSession, session_id: uuid.UUID, version: int) -> FormVersion | None:
@@ -146,3 +249,62 @@ async def get_version(db: AsyncSession, session_id: uuid.UUID, version: int) ->
     return result.scalar_one_or_none()
 
 
+async def get_version_snapshot(
+    db: AsyncSession, session_id: uuid.UUID, version: int
+) -> tuple[Any, Sequence[Any]] | None:
+    """Wersja do odpowiedzi API: payload jako tekst JSON wprost z JSONB (bez dekodowania
+    do dict) i walidacje jako wiersze - bez budowania obiektów ORM."""
+    result = await db.execute(
+        select(
+            FormVersion.id,
+            FormVersion.version,
+            FormVersion.source,
+            FormVersion.created_at,
+            cast(FormVersion.payload, Text).label("payload_json"),
+        ).where(FormVersion.session_id == session_id, FormVersion.version == version)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    validations = await db.execute(
+        select(
+            FieldValidation.field_path, FieldValidation.status, FieldValidation.justification
+        ).where(FieldValidation.version_id == row.id)
+    )
+    return row, validations.all()
+
+
+async def get_version_payload(db: AsyncSession, session_id: uuid.UUID, version: int) -> dict | None:
+    """Sam payload wersji (bez walidacji) - wystarcza do renderowania PDF."""
+    result = await db.execute(
+        select(FormVersion.payload).where(
+            FormVersion.session_id == session_id, FormVersion.version == version
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def list_export_targets(
+    db: AsyncSession,
+    limit: int,
+    session_ids: Sequence[uuid.UUID] | None = None,
+    versions: Sequence[int] | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> list[tuple[uuid.UUID, int]]:
+    """Pary (sesja, wersja) do eksportu; zwraca najwyżej limit + 1 wierszy, by wykryć przekroczenie."""
+    query = select(FormVersion.session_id, FormVersion.version).order_by(
+        FormVersion.session_id, FormVersion.version
+    )
+    if session_ids:
+        query = query.where(FormVersion.session_id.in_(session_ids))
+    if versions:
+        query = query.where(FormVersion.version.in_(versions))
+    if created_from is not None or created_to is not None:
+        query = query.join(FormSession, FormSession.id == FormVersion.session_id)
+        if created_from is not None:
+            query = query.where(FormSession.created_at >= created_from)
+        if created_to is not None:
+            query = query.where(FormSession.created_at < created_to)
+    result = await db.execute(query.limit(limit + 1))
+    return [(row.session_id, row.version) for row in result]
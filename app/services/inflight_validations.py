@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from collections.abc import Coroutine
+from typing import Any
+
+from app.agent.validator import AgentResult
+from app.core.metrics import VALIDATIONS_SUPERSEDED, field_type_label
+
+ValidationKey = tuple[uuid.UUID, str]
+
+
+class ValidationSuperseded(Exception):
+    """Walidację anulowała nowsza wartość tego samego pola."""
+
+
+class InflightValidations:
+    """Walidacje w toku per (sesja, ścieżka pola); nowsza anuluje starszą.
+
+    Wynik dla nieaktualnej wartości i tak zostałby odrzucony, a anulowanie zadania
+    przerywa też wywołanie LLM (i jego żądanie HTTP), więc nie zużywa limitu modelu.
+    Rejestr jest per proces - żądania tej samej sesji na innym workerze się nie widzą.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[ValidationKey, tuple[asyncio.Task[AgentResult], str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def cancel(self, key: ValidationKey) -> bool:
+        entry = self._tasks.pop(key, None)
+        if entry is None or entry[0].done():
+            return False
+        task, field_type = entry
+        task.cancel()
+        VALIDATIONS_SUPERSEDED.labels(field_type_label(field_type)).inc()
+        return True
+
+    async def run(
+        self, key: ValidationKey, field_type: str, validation: Coroutine[Any, Any, AgentResult]
+    ) -> AgentResult:
+        """Uruchamia walidację jako zadanie, anulując poprzednią dla tego klucza.
+
+        Rzuca ValidationSuperseded, gdy w trakcie przyjdzie nowsza; anulowanie
+        wywołującego (np. rozłączony klient) anuluje też zadanie.
+        """
+        self.cancel(key)
+        task = asyncio.create_task(validation)
+        self._tasks[key] = (task, field_type)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if task.cancelled() and not (current is not None and current.cancelling()):
+                raise ValidationSuperseded from None
+            raise
+        finally:
+            if self._tasks.get(key, (None,))[0] is task:
+                del self._tasks[key]
+
+
+inflight_validations = InflightValidations()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.agent.validator import AgentResult, run_deterministic_validation, run_llm_validation
+from app.core.admission import admission
+from app.core.logging import logger
+from app.core.metrics import ADMISSION_REJECTIONS, LIVE_VALIDATION_UPDATES
+from app.services.inflight_validations import ValidationSuperseded, inflight_validations
+from app.services.validation_log import log_validation
+from app.services.validation_upgrades import PENDING
+
+SendMessage = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class LiveValidationChannel:
+    """Stan jednego połączenia WebSocket: debouncing i wyniki per pole formularza.
+
+    Każda zmiana pola podbija jego numer; walidacja startuje dopiero po debounce_seconds
+    bez nowszej zmiany, a wynik trafia do klienta tylko, jeśli pole nie zmieniło się
+    w międzyczasie. Nowa wartość przerywa wywołanie LLM dla poprzedniej
+    (inflight_validations). Pola rozstrzygane przez LLM dostają najpierw "pending".
+    """
+
+    def __init__(self, session_id: uuid.UUID, send: SendMessage, db: AsyncSession, debounce_seconds: float):
+        self.session_id = session_id
+        self.debounce_seconds = debounce_seconds
+        self._send = send
+        self._db = db
+        # Jedna sesja DB na połączenie; AsyncSession nie znosi równoległych operacji.
+        self._db_lock = asyncio.Lock()
+        self._send_lock = asyncio.Lock()
+        self._seq: dict[str, int] = {}
+        self._debouncing: dict[str, asyncio.Task[None]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def update(self, field_path: str, field_type: str, value: str) -> None:
+        seq = self._seq[field_path] = self._seq.get(field_path, 0) + 1
+        previous = self._debouncing.pop(field_path, None)
+        if previous is not None:
+            previous.cancel()
+            LIVE_VALIDATION_UPDATES.labels("debounced").inc()
+        # Wywołanie LLM dla poprzedniej wartości i tak byłoby odrzucone - przerywamy je od razu.
+        inflight_validations.cancel((self.session_id, field_path))
+        task = asyncio.create_task(self._validate(field_path, field_type, value, seq))
+        self._debouncing[field_path] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def close(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def send(self, message: dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self._send(message)
+
+    def _is_current(self, field_path: str, seq: int) -> bool:
+        return self._seq.get(field_path) == seq
+
+    async def _validate(self, field_path: str, field_type: str, value: str, seq: int) -> None:
+        await asyncio.sleep(self.debounce_seconds)
+        del self._debouncing[field_path]
+        try:
+            result = await self._run(field_path, field_type, value, seq)
+        except asyncio.CancelledError:
+            raise
+        except ValidationSuperseded:
+            LIVE_VALIDATION_UPDATES.labels("superseded").inc()
+            return
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Live validation failed field=%s: %s", field_path, exc)
+            if self._is_current(field_path, seq):
+                await self.send({"type": "error", "field_path": field_path, "detail": "Validation failed"})
+            return
+        if result is None:
+            return
+        if not self._is_current(field_path, seq):
+            LIVE_VALIDATION_UPDATES.labels("superseded").inc()
+            return
+        LIVE_VALIDATION_UPDATES.labels("validated").inc()
+        await self._send_result(field_path, result.status, result.justification)
+
+    async def _run(self, field_path: str, field_type: str, value: str, seq: int) -> AgentResult | None:
+        reason = admission.rejection_reason("validation")
+        if reason is not None:
+            ADMISSION_REJECTIONS.labels("validation", reason).inc()
+            LIVE_VALIDATION_UPDATES.labels("rejected").inc()
+            await self.send(
+                {"type": "error", "field_path": field_path, "detail": "Server is overloaded, retry later"}
+            )
+            return None
+        admission.in_flight["validation"] += 1
+        try:
+            result = run_deterministic_validation(field_type, value)
+            if result is None:
+                if self._is_current(field_path, seq):
+                    await self._send_result(field_path, PENDING, "")
+                result = await inflight_validations.run(
+                    (self.session_id, field_path), field_type, run_llm_validation(field_type, value)
+                )
+        finally:
+            admission.in_flight["validation"] -= 1
+        try:
+            async with self._db_lock:
+                await log_validation(self._db, field_type, value, result)
+        except Exception as exc:  # noqa: BLE001
+            # Brak wpisu w logu walidacji nie powinien zatrzymać wyniku dla użytkownika.
+            logger.warning("Live validation log failed field=%s: %s", field_path, exc)
+            async with self._db_lock:
+                await self._db.rollback()
+        return result
+
+    async def _send_result(self, field_path: str, status: str, justification: str) -> None:
+        await self.send(
+            {"type": "result", "field_path": field_path, "status": status, "justification": justification}
+        )
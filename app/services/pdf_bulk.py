@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+import zipfile
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+
+from app.core.logging import logger
+from app.db.session import read_sessionmaker
+from app.services.form_service import get_version_payload
+from app.services.pdf_cache import lookup_pdf, store_pdf, version_keys
+from app.services.pdf_pool import PdfQueueFullError, pdf_pool, render_pdf
+
+# Eksport ustępuje pobraniom interaktywnym: przy pełnej kolejce czeka zamiast zwracać 503.
+_QUEUE_FULL_BACKOFF_SECONDS = 0.5
+ERRORS_ENTRY = "errors.txt"
+
+
+class _ChunkSink:
+    """Strumień tylko do zapisu dla zipfile; bajty odbiera generator odpowiedzi."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def write(self, data: bytes, /) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def entry_name(session_id: uuid.UUID, version: int, template: str) -> str:
+    return f"{session_id}/v{version}_{template}.pdf"
+
+
+async def _load_payload(session_id: uuid.UUID, version: int) -> dict[str, Any] | None:
+    """Krótka sesja na jeden odczyt, routowana per sesja formularza (read-your-writes).
+
+    Eksport trwa tyle, ile klient pobiera ZIP - sesja otwarta na cały strumień trzymałaby
+    połączenie z puli "idle in transaction" przez minuty.
+    """
+    async with read_sessionmaker(session_id)() as db:
+        return await get_version_payload(db, session_id, version)
+
+
+async def _render_and_store(key: str, template: str, payload: dict[str, Any]) -> bytes:
+    while True:
+        try:
+            pdf_bytes = await render_pdf(template, payload)
+            break
+        except PdfQueueFullError:
+            await asyncio.sleep(_QUEUE_FULL_BACKOFF_SECONDS)
+    await store_pdf(key, template, pdf_bytes)
+    return pdf_bytes
+
+
+async def stream_pdf_zip(
+    targets: Sequence[tuple[uuid.UUID, int]],
+    templates: Sequence[str],
+    concurrency: int | None = None,
+) -> AsyncIterator[bytes]:
+    """ZIP z PDF-ami wersji, emitowany wpis po wpisie w kolejności ukończenia renderów.
+
+    W pamięci jest najwyżej `concurrency` dokumentów (domyślnie liczba workerów puli),
+    więc zużycie nie rośnie z rozmiarem eksportu. Trafienia w cache idą od razu, a wpisy
+    o tym samym kluczu treści dzielą jeden render. Payload wersji czytany jest najwyżej
+    raz. Nieudane dokumenty są wypisane w errors.txt na końcu archiwum (status HTTP
+    jest już wysłany).
+    """
+    limit = concurrency or max(pdf_pool.workers, 1)
+    sink = _ChunkSink()
+    failures: list[str] = []
+    # render -> (klucz treści, nazwy wpisów czekających na ten render)
+    in_flight: dict[asyncio.Task[bytes], tuple[str, list[str]]] = {}
+    rendering: dict[str, asyncio.Task[bytes]] = {}
+
+    def write_done(archive: zipfile.ZipFile, done: set[asyncio.Task[bytes]]) -> None:
+        for task in done:
+            key, names = in_flight.pop(task)
+            rendering.pop(key, None)
+            for name in names:
+                if task.exception() is not None:
+                    logger.warning("PDF export entry %s failed: %s", name, task.exception())
+                    failures.append(f"{name}: {task.exception()}")
+                else:
+                    archive.writestr(name, task.result())
+
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            for session_id, version in targets:
+                payload: dict[str, Any] | None = None
+                keys = {
+                    t: key for t in templates if (key := version_keys.get(session_id, version, t))
+                }
+                if len(keys) < len(templates):
+                    payload = await _load_payload(session_id, version)
+                    if payload is None:
+                        failures.extend(
+                            f"{entry_name(session_id, version, t)}: version not found" for t in templates
+                        )
+                        continue
+                    keys = {t: version_keys.remember(session_id, version, t, payload) for t in templates}
+                for template, key in keys.items():
+                    name = entry_name(session_id, version, template)
+                    if key in rendering:
+                        in_flight[rendering[key]][1].append(name)
+                        continue
+                    cached = await lookup_pdf(key, template)
+                    if cached is not None:
+                        archive.writestr(name, cached)
+                        yield sink.drain()
+                        continue
+                    if payload is None:
+                        payload = await _load_payload(session_id, version)
+                        if payload is None:
+                            failures.append(f"{name}: version not found")
+                            continue
+                    task = asyncio.create_task(_render_and_store(key, template, payload))
+                    rendering[key] = task
+                    in_flight[task] = (key, [name])
+                    while len(in_flight) >= limit:
+                        done, _pending = await asyncio.wait(
+                            in_flight, return_when=asyncio.FIRST_COMPLETED
+                        )
+                        write_done(archive, done)
+                        yield sink.drain()
+                    finished = {task for task in in_flight if task.done()}
+                    if finished:
+                        write_done(archive, finished)
+                        yield sink.drain()
+            while in_flight:
+                done, _pending = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                write_done(archive, done)
+                yield sink.drain()
+            if failures:
+                archive.writestr(ERRORS_ENTRY, "\n".join(failures) + "\n")
+        # Katalog centralny ZIP trafia do sink przy zamknięciu archiwum.
+        yield sink.drain()
+    finally:
+        # Klient się rozłączył albo błąd - nie renderuj dalej dla nikogo.
+        for task in in_flight:
+            task.cancel()
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.models import PdfCacheEntry
+from app.db.session import AsyncSessionLocal
+from app.services.pdf_export import TEMPLATE_FIELDS, TEMPLATE_VERSIONS, template_inputs
+
+
+def pdf_cache_key(template: str, payload: dict[str, Any]) -> str:
+    """Klucz treści: szablon, jego wersja i tylko te pola payloadu, które szablon czyta."""
+    inputs = json.dumps(template_inputs(template, payload), sort_keys=True, default=str)
+    raw = f"{template}:{TEMPLATE_VERSIONS[template]}:{inputs}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class VersionKeyIndex:
+    """(sesja, wersja, szablon) -> klucz treści; wersje są niezmienne, więc wpis nigdy nie traci ważności.
+
+    Pozwala odpowiedzieć 304 i trafić w cache bez czytania payloadu z bazy.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._keys: OrderedDict[tuple[uuid.UUID, int, str], str] = OrderedDict()
+
+    def get(self, session_id: uuid.UUID, version: int, template: str) -> str | None:
+        entry = (session_id, version, template)
+        key = self._keys.get(entry)
+        if key is not None:
+            self._keys.move_to_end(entry)
+        return key
+
+    def remember(self, session_id: uuid.UUID, version: int, template: str, payload: dict[str, Any]) -> str:
+        key = pdf_cache_key(template, payload)
+        self._keys[(session_id, version, template)] = key
+        self._keys.move_to_end((session_id, version, template))
+        if len(self._keys) > self.max_entries:
+            self._keys.popitem(last=False)
+        return key
+
+
+version_keys = VersionKeyIndex(max_entries=50_000)
+
+
+class PdfCache:
+    """Interfejs magazynu PDF; implementacja domyślna niczego nie przechowuje."""
+
+    async def get(self, key: str) -> bytes | None:
+        return None
+
+    async def put(self, key: str, data: bytes) -> None:
+        return None
+
+
+class DiskPdfCache(PdfCache):
+    """Pliki <dir>/<ab>/<key>.pdf z eviction LRU po łącznym rozmiarze.
+
+    Indeks LRU jest w pamięci procesu (budowany ze skanu katalogu przy pierwszym użyciu);
+    plik usunięty przez inny proces jest po prostu chybieniem.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: OrderedDict[str, int] | None = None
+        self._total = 0
+        # get/put działają w wątkach (asyncio.to_thread) - indeks chroni lock.
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pdf"
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        if self._index is None:
+            entries = []
+            if self.directory.exists():
+                for path in self.directory.glob("*/*.pdf"):
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, path.stem, stat.st_size))
+            self._index = OrderedDict((key, size) for _mtime, key, size in sorted(entries))
+            self._total = sum(self._index.values())
+        return self._index
+
+    def _read(self, key: str) -> bytes | None:
+        try:
+            data = self._path(key).read_bytes()
+        except FileNotFoundError:
+            data = None
+        with self._lock:
+            index = self._load_index()
+            if data is None:
+                self._total -= index.pop(key, 0)
+                return None
+            if key not in index:
+                index[key] = len(data)
+                self._total += len(data)
+            index.move_to_end(key)
+        return data
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        evicted = []
+        with self._lock:
+            index = self._load_index()
+            self._total += len(data) - index.pop(key, 0)
+            index[key] = len(data)
+            while self._total > self.max_bytes and len(index) > 1:
+                old_key, old_size = index.popitem(last=False)
+                self._total -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            self._path(old_key).unlink(missing_ok=True)
+
+    async def get(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._read, key)
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._write, key, data)
+
+
+class DbPdfCache(PdfCache):
+    """Tabela pdf_cache_entries; najdawniej używane wpisy ponad limit usuwa okresowe evict().
+
+    Trafienie jest zwykłym SELECT - last_access odświeżany jest najwyżej raz na
+    TOUCH_INTERVAL, bo LRU wystarczy zgrubna kolejność. Zapis nie liczy rozmiaru
+    tabeli; między przejściami evict() cache może chwilowo przekroczyć limit.
+    """
+
+    TOUCH_INTERVAL = timedelta(minutes=5)
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+    async def get(self, key: str) -> bytes | None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(PdfCacheEntry.data, PdfCacheEntry.last_access).where(PdfCacheEntry.key == key)
+            )
+            row = result.one_or_none()
+            if row is None:
+                return None
+            stale = datetime.now(timezone.utc) - self.TOUCH_INTERVAL
+            if row.last_access < stale:
+                await db.execute(
+                    update(PdfCacheEntry)
+                    .where(PdfCacheEntry.key == key, PdfCacheEntry.last_access < stale)
+                    .values(last_access=func.now())
+                )
+                await db.commit()
+            return row.data
+
+    async def put(self, key: str, data: bytes) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                insert(PdfCacheEntry)
+                .values(key=key, data=data, size=len(data))
+                .on_conflict_do_nothing(index_elements=[PdfCacheEntry.key])
+            )
+            await db.commit()
+
+    async def evict(self) -> None:
+        async with AsyncSessionLocal() as db:
+            total_query = select(func.coalesce(func.sum(PdfCacheEntry.size), 0))
+            total = (await db.execute(total_query)).scalar_one()
+            if total > self.max_bytes:
+                await db.execute(
+                    text(
+                        "DELETE FROM pdf_cache_entries WHERE key IN ("
+                        " SELECT key FROM ("
+                        "  SELECT key, sum(size) OVER (ORDER BY last_access DESC) AS running"
+                        "  FROM pdf_cache_entries"
+                        " ) ranked WHERE running > :max_bytes)"
+                    ),
+                    {"max_bytes": self.max_bytes},
+                )
+            await db.commit()
+
+
+def build_pdf_cache() -> PdfCache:
+    if settings.pdf_cache_backend == "disk":
+        directory = Path(settings.base_dir) / settings.pdf_cache_dir
+        return DiskPdfCache(directory, settings.pdf_cache_max_bytes)
+    if settings.pdf_cache_backend == "db":
+        return DbPdfCache(settings.pdf_cache_max_bytes)
+    return PdfCache()
+
+
+pdf_cache = build_pdf_cache()
+
+
+async def run_pdf_cache_eviction() -> None:
+    """Pętla lifespan dla PDF_CACHE_BACKEND=db."""
+    if not isinstance(pdf_cache, DbPdfCache):
+        return
+    while True:
+        try:
+            await pdf_cache.evict()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("PDF cache eviction failed: %s", exc)
+        await asyncio.sleep(settings.pdf_cache_evict_interval_seconds)
+
+
+async def cache_get(key: str) -> bytes | None:
+    """Błąd magazynu cache nie może zablokować pobrania PDF - traktujemy go jak chybienie."""
+    try:
+        return await pdf_cache.get(key)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("PDF cache read failed key=%s: %s", key, exc)
+        return None
+
+
+async def cache_put(key: str, data: bytes) -> None:
+    try:
+        await pdf_cache.put(key, data)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("PDF cache write failed key=%s: %s", key, exc)
+
+
+# Szablony bez zależności od payloadu: jeden render na proces, bez sięgania do magazynu.
+_static_pdfs: dict[str, bytes] = {}
+
+
+async def lookup_pdf(key: str, template: str) -> bytes | None:
+    if not TEMPLATE_FIELDS[template]:
+        static = _static_pdfs.get(key)
+        if static is not None:
+            return static
+    data = await cache_get(key)
+    if data is not None and not TEMPLATE_FIELDS[template]:
+        _static_pdfs[key] = data
+    return data
+
+
+async def store_pdf(key: str, template: str, data: bytes) -> None:
+    if not TEMPLATE_FIELDS[template]:
+        _static_pdfs[key] = data
+    await cache_put(key, data)
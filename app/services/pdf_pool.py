@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import PDF_RENDER_SECONDS
+from app.core.tracing import inject_carrier, setup_tracing, span_from_carrier, tracer
+from app.services.pdf_export import generate_ewyp_pdf, generate_notification_pdf
+
+PDF_RENDERERS = {
+    "ewyp": generate_ewyp_pdf,
+    "notification": generate_notification_pdf,
+}
+
+
+# Minimalny poprawny payload (puste sekcje wymagane przez EWYPFormSchema) do rozgrzewki.
+WARMUP_PAYLOAD: dict[str, Any] = {"injured_person": {}, "injured_address": {}, "accident_info": {}}
+
+
+class PdfQueueFullError(RuntimeError):
+    """Wszystkie workery zajęte i kolejka pełna - żądanie należy odrzucić (503)."""
+
+
+class PdfRenderTimeoutError(RuntimeError):
+    """Render nie zmieścił się w PDF_RENDER_TIMEOUT_SECONDS."""
+
+
+def _warm_worker() -> None:
+    """Initializer procesu: import WeasyPrint, skan fontconfig, szablony i CSS raz na proces."""
+    setup_tracing(batch=False)
+    try:
+        generate_ewyp_pdf(WARMUP_PAYLOAD)
+    except Exception:  # noqa: BLE001
+        # Brak WeasyPrint zgłosi właściwy render (RuntimeError z pdf_export).
+        pass
+
+
+def _render_in_worker(template: str, payload: dict[str, Any], carrier: dict[str, str]) -> bytes:
+    try:
+        # Span w workerze jest dzieckiem spanu pdf.render z procesu API (traceparent w carrier).
+        with span_from_carrier("pdf.render_worker", carrier, {"pdf.template": template}):
+            return PDF_RENDERERS[template](payload)
+    except Exception as exc:  # noqa: BLE001
+        # Nie każdy wyjątek (np. pydantic ValidationError) da się przesłać między procesami.
+        raise RuntimeError(str(exc)) from None
+
+
+def _noop() -> None:
+    return None
+
+
+class PdfRenderPool:
+    """Pula procesów do renderowania PDF poza pętlą zdarzeń.
+
+    Liczba zleceń w toku (renderowane + oczekujące) jest ograniczona do
+    workers + queue_size; nadmiarowe żądania dostają PdfQueueFullError od razu.
+    Przy workers=0 render idzie do wątku (dev/testy).
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout_seconds: float):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout_seconds = timeout_seconds
+        self.pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.queue_size
+
+    def start(self) -> None:
+        if self._executor is not None or self.workers <= 0:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+        # Wymuś start wszystkich procesów (i ich initializerów) teraz, a nie przy pierwszym żądaniu.
+        for _ in range(self.workers):
+            self._executor.submit(_noop)
+        logger.info("PDF render pool started workers=%s queue=%s", self.workers, self.queue_size)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self, future: Future[bytes] | asyncio.Future[bytes]) -> None:
+        self.pending -= 1
+        if not future.cancelled():
+            # Odbierz wyjątek renderu porzuconego po timeoucie, by nie logować "never retrieved".
+            future.exception()
+
+    async def render(self, template: str, payload: dict[str, Any]) -> bytes:
+        if template not in PDF_RENDERERS:
+            raise ValueError(f"Unknown PDF template: {template}")
+        if self.pending >= self.capacity:
+            raise PdfQueueFullError("PDF render queue is full")
+
+        self.start()
+        with tracer.start_as_current_span("pdf.render", attributes={"pdf.template": template}) as span:
+            loop = asyncio.get_running_loop()
+            self.pending += 1
+            future = loop.run_in_executor(
+                self._executor, _render_in_worker, template, payload, inject_carrier()
+            )
+            # Slot zwalniamy dopiero, gdy proces skończy - timeout nie przerywa renderu w workerze.
+            future.add_done_callback(self._release)
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                pdf_bytes = await asyncio.wait_for(asyncio.shield(future), self.timeout_seconds)
+                outcome = "ok"
+                return pdf_bytes
+            except asyncio.TimeoutError as exc:
+                outcome = "timeout"
+                raise PdfRenderTimeoutError(
+                    f"PDF render exceeded {self.timeout_seconds:.0f}s"
+                ) from exc
+            except BrokenProcessPool:
+                # Worker padł (np. OOM) - kolejne żądanie wystartuje nową pulę.
+                self.shutdown()
+                raise
+            finally:
+                span.set_attribute("pdf.outcome", outcome)
+                PDF_RENDER_SECONDS.labels(template, outcome).observe(time.perf_counter() - started)
+
+
+pdf_pool = PdfRenderPool(
+    workers=settings.pdf_workers,
+    queue_size=settings.pdf_queue_size,
+    timeout_seconds=settings.pdf_render_timeout_seconds,
+)
+
+
+async def render_pdf(template: str, payload: dict[str, Any]) -> bytes:
+    return await pdf_pool.render(template, payload)
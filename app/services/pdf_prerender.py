@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from typing import Any
+
+from opentelemetry import context as otel_context
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.tracing import tracer
+from app.services.pdf_cache import lookup_pdf, store_pdf, version_keys
+from app.services.pdf_pool import PDF_RENDERERS, PdfQueueFullError, pdf_pool, render_pdf
+
+_IDLE_POLL_SECONDS = 0.2
+
+
+def parse_prerender_rules(spec: str) -> dict[str, list[str]]:
+    """"corrected:ewyp,corrected:notification" -> {"corrected": ["ewyp", "notification"]}."""
+    rules: dict[str, list[str]] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        source, sep, template = item.partition(":")
+        if not sep or template not in PDF_RENDERERS:
+            raise ValueError(f"Invalid PDF_PRERENDER entry: {item!r} (expected source:template)")
+        rules.setdefault(source, [])
+        if template not in rules[source]:
+            rules[source].append(template)
+    return rules
+
+
+class PdfPrerenderer:
+    """Wypełnia cache PDF w tle po utworzeniu wersji.
+
+    schedule() tylko wrzuca zadanie do ograniczonej kolejki (przy pełnej - pomija),
+    więc nie opóźnia odpowiedzi. Pętla run() renderuje wyłącznie, gdy w puli jest
+    wolny worker (pobrania interaktywne mają pierwszeństwo), i nie częściej niż
+    raz na min_interval_seconds.
+    """
+
+    def __init__(self, rules: dict[str, list[str]], queue_size: int, min_interval_seconds: float):
+        self.rules = rules
+        self.min_interval_seconds = min_interval_seconds
+        # Ostatni element: kontekst trace żądania, które utworzyło wersję.
+        self._queue: asyncio.Queue[
+            tuple[uuid.UUID, int, str, dict[str, Any], otel_context.Context]
+        ] = asyncio.Queue(maxsize=queue_size)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rules)
+
+    def schedule(self, session_id: uuid.UUID, version: int, source: str, payload: dict[str, Any]) -> None:
+        for template in self.rules.get(source, []):
+            try:
+                self._queue.put_nowait(
+                    (session_id, version, template, payload, otel_context.get_current())
+                )
+            except asyncio.QueueFull:
+                logger.debug("PDF prerender queue full, skipping %s v%s %s", session_id, version, template)
+
+    async def _wait_for_idle_worker(self) -> None:
+        while pdf_pool.pending >= max(pdf_pool.workers, 1):
+            await asyncio.sleep(_IDLE_POLL_SECONDS)
+
+    async def prerender_one(
+        self, session_id: uuid.UUID, version: int, template: str, payload: dict[str, Any]
+    ) -> None:
+        key = version_keys.remember(session_id, version, template, payload)
+        if await lookup_pdf(key, template) is not None:
+            return
+        await self._wait_for_idle_worker()
+        try:
+            pdf_bytes = await render_pdf(template, payload)
+        except PdfQueueFullError:
+            # Ktoś zajął wolny slot w międzyczasie; pierwsze pobranie wyrenderuje PDF samo.
+            return
+        await store_pdf(key, template, pdf_bytes)
+
+    async def run(self) -> None:
+        """Pętla lifespan."""
+        while True:
+            session_id, version, template, payload, trace_context = await self._queue.get()
+            try:
+                with tracer.start_as_current_span(
+                    "pdf.prerender", context=trace_context, attributes={"pdf.template": template}
+                ):
+                    await self.prerender_one(session_id, version, template, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("PDF prerender failed %s v%s %s: %s", session_id, version, template, exc)
+            await asyncio.sleep(self.min_interval_seconds)
+
+
+pdf_prerenderer = PdfPrerenderer(
+    rules=parse_prerender_rules(settings.pdf_prerender),
+    queue_size=settings.pdf_prerender_queue_size,
+    min_interval_seconds=settings.pdf_prerender_min_interval_seconds,
+)
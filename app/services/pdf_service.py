@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.form_service import get_version_payload
+from app.services.pdf_cache import lookup_pdf, store_pdf, version_keys
+from app.services.pdf_pool import render_pdf
+
+
+def pdf_etag(key: str) -> str:
+    """Silny ETag = klucz treści PDF (identyczne rendery mają ten sam ETag)."""
+    return f'"{key}"'
+
+
+async def version_pdf_key(
+    db: AsyncSession, session_id: uuid.UUID, version: int, template: str
+) -> str | None:
+    """Klucz treści PDF wersji; payload czytany tylko, gdy klucza nie ma w indeksie."""
+    key = version_keys.get(session_id, version, template)
+    if key is not None:
+        return key
+    payload = await get_version_payload(db, session_id, version)
+    if payload is None:
+        return None
+    return version_keys.remember(session_id, version, template, payload)
+
+
+async def get_version_pdf(
+    db: AsyncSession, session_id: uuid.UUID, version: int, template: str
+) -> tuple[str, bytes] | None:
+    """(klucz, PDF) z cache albo świeżo wyrenderowany (i zapisany); None gdy brak wersji."""
+    key = version_keys.get(session_id, version, template)
+    if key is not None:
+        cached = await lookup_pdf(key, template)
+        if cached is not None:
+            return key, cached
+
+    payload = await get_version_payload(db, session_id, version)
+    if payload is None:
+        return None
+    key = version_keys.remember(session_id, version, template, payload)
+    cached = await lookup_pdf(key, template)
+    if cached is not None:
+        return key, cached
+    pdf_bytes = await render_pdf(template, payload)
+    await store_pdf(key, template, pdf_bytes)
+    return key, pdf_bytes
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.models import FieldValidation
+from app.db.session import AsyncSessionLocal
+from app.services.validation_log import expire_pending_logs
+from app.services.validation_upgrades import PENDING, PENDING_EXPIRED_RESULT
+
+
+async def expire_stale_pending(db: AsyncSession, older_than: datetime) -> tuple[int, int]:
+    """Objection dla "pending" sprzed older_than; zwraca (pola wersji, wpisy logu).
+
+    Zlecenia validation_upgrader żyją tylko w pamięci procesu - po restarcie ich wiersze
+    zostałyby "pending" na zawsze (a snapshot wersji no-store). Spóźniony werdykt nic
+    już nie zmieni: zapis w tle dotyczy tylko wierszy wciąż "pending".
+    """
+    result = PENDING_EXPIRED_RESULT
+    fields = await db.scalars(
+        update(FieldValidation)
+        .where(FieldValidation.status == PENDING, FieldValidation.created_at < older_than)
+        .values(status=result.status, justification=result.justification)
+        .returning(FieldValidation.id)
+    )
+    field_count = len(fields.all())
+    log_count = await expire_pending_logs(db, older_than, result)
+    await db.commit()
+    return field_count, log_count
+
+
+async def run_pending_sweep() -> None:
+    """Pętla lifespan: pierwsze przejście od razu po starcie, potem co 1/4 limitu czasu."""
+    timeout = settings.validation_pending_timeout_seconds
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                older_than = datetime.now(timezone.utc) - timedelta(seconds=timeout)
+                fields, logs = await expire_stale_pending(db, older_than)
+            if fields or logs:
+                logger.warning("Expired stale pending validations fields=%s logs=%s", fields, logs)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Pending validation sweep failed: %s", exc)
+        await asyncio.sleep(max(timeout / 4, 1.0))
@@ -6,8 +6,9 @@ from datetime import datetime, timezone
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import generate_session_token, get_token_expiry
+from app.core.security import get_token_expiry, issue_session_token, session_denylist
 from app.db.models import FormSession
+from app.db.session import replica_router
 
 
 async def _get_session(db: AsyncSession, session_id: uuid.UUID) -> FormSession | None:
@@ -18,17 +19,21 @@ async def _get_session(db: AsyncSession, session_id: uuid.UUID) -> FormSession |
 async def create_session(
     db: AsyncSession, form_type: str = "EWYP", case_ref: str | None = None
 ) -> tuple[FormSession, str]:
-    token, token_hash = generate_session_token()
+    session_id = uuid.uuid4()
+    expires_at = get_token_expiry()
+    token, token_hash = issue_session_token(session_id, form_type, expires_at)
     session = FormSession(
+        id=session_id,
         form_type=form_type,
         case_ref=case_ref,
         status="open",
         session_token_hash=token_hash,
-        token_expires_at=get_token_expiry(),
+        token_expires_at=expires_at,
     )
     db.add(session)
     await db.commit()
     await db.refresh(session)
+    replica_router.mark_write(session.id)
     return session, token
 
 
@@ -43,11 +48,17 @@ async def refresh_token(db: AsyncSession, session_id: uuid.UUID) -> tuple[FormSe
     if session.status == "closed":
         raise ValueError("Session is closed")
 
-    token, token_hash = generate_session_token()
+    expires_at = get_token_expiry()
+    generation = session.token_generation + 1
+    token, token_hash = issue_session_token(session.id, session.form_type, expires_at, generation)
     session.session_token_hash = token_hash
-    session.token_expires_at = get_token_expiry()
+    session.token_expires_at = expires_at
+    session.token_generation = generation
     await db.commit()
     await db.refresh(session)
+    replica_router.mark_write(session.id)
+    # Poprzedni podpisany token przestaje działać od razu w tym procesie, w innych po refresh().
+    session_denylist.revoke_before(session.id, generation, expires_at)
     return session, token
 
 
@@ -60,6 +71,9 @@ async def close_session(db: AsyncSession, session_id: uuid.UUID) -> FormSession:
     session.closed_at = datetime.now(timezone.utc)
     await db.commit()
     await db.refresh(session)
+    replica_router.mark_write(session.id)
+    # Podpisane tokeny nie są sprawdzane w bazie - odetnij je od razu w tym procesie.
+    session_denylist.add(session.id, session.token_expires_at)
     return session
 
 
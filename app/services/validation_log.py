@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import hashlib
+import uuid
+from datetime import datetime
 
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.agent.validator import AgentResult
 from app.db.models import ValidationLog
+from app.db.session import AsyncSessionLocal
+from app.services.validation_upgrades import PENDING
 
 
 def _hash_value(value: str) -> str:
@@ -24,7 +29,49 @@ async def log_validation(
         status=result.status,
         message=result.justification,
     )
+    # Bez agregatu w tej transakcji: validation_log_rollups buduje maintenance partycji.
     session.add(record)
     await session.commit()
 
 
+async def log_pending_validation(session: AsyncSession, field_type: str, value: str) -> uuid.UUID:
+    """Wpis "pending" dla /validate z defer_llm; werdykt dopisze complete_validation."""
+    log_id = uuid.uuid4()
+    session.add(
+        ValidationLog(
+            id=log_id, field_type=field_type, value_hash=_hash_value(value), status=PENDING, message=""
+        )
+    )
+    await session.commit()
+    return log_id
+
+
+async def complete_validation(log_id: uuid.UUID, result: AgentResult) -> None:
+    """Werdykt LLM z tła (tylko raz - ponowny zapis nic nie zmienia)."""
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(ValidationLog)
+            .where(ValidationLog.id == log_id, ValidationLog.status == PENDING)
+            .values(status=result.status, message=result.justification)
+        )
+        await session.commit()
+
+
+async def expire_pending_logs(session: AsyncSession, older_than: datetime, result: AgentResult) -> int:
+    """Werdykt dla wpisów "pending" sprzed older_than (bez commit); zwraca ich liczbę."""
+    expired = await session.scalars(
+        update(ValidationLog)
+        .where(ValidationLog.status == PENDING, ValidationLog.created_at < older_than)
+        .values(status=result.status, message=result.justification)
+        .returning(ValidationLog.id)
+    )
+    return len(expired.all())
+
+
+async def get_validation(session: AsyncSession, log_id: uuid.UUID) -> tuple[str, str] | None:
+    """(status, justification) wpisu; do odpytywania o werdykt odłożonej walidacji."""
+    result = await session.execute(
+        select(ValidationLog.status, ValidationLog.message).where(ValidationLog.id == log_id)
+    )
+    row = result.one_or_none()
+    return None if row is None else (row.status, row.message)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from opentelemetry import context as otel_context
+
+from app.agent.validator import AgentResult, run_llm_validation
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.tracing import tracer
+
+# Status walidacji, której werdykt LLM jeszcze się liczy.
+PENDING = "pending"
+
+StoreResult = Callable[[AgentResult], Awaitable[None]]
+
+LLM_FAILURE_RESULT = AgentResult(status="objection", justification="Brak odpowiedzi modelu. Zwracam objection.")
+PENDING_EXPIRED_RESULT = AgentResult(
+    status="objection", justification="Brak werdyktu modelu w wyznaczonym czasie. Zwracam objection."
+)
+
+
+class ValidationUpgrader:
+    """Dokańcza w tle werdykty LLM dla pól zwróconych klientowi jako "pending".
+
+    schedule() nie blokuje; run() obsługuje kolejkę w `concurrency` równoległych
+    pętlach i przekazuje wynik do funkcji zapisu podanej przy zleceniu. Wywołujący
+    sprawdza has_room() przed odłożeniem pól - przy zbyt dużej zaległości czeka na LLM
+    jak dotąd, zamiast obiecywać werdykt, który przyjdzie po minutach.
+    """
+
+    def __init__(self, concurrency: int, max_backlog: int):
+        self.concurrency = max(concurrency, 1)
+        self.max_backlog = max_backlog
+        self._active = 0
+        self._queue: asyncio.Queue[
+            tuple[str, str, str | None, StoreResult, otel_context.Context]
+        ] = asyncio.Queue()
+
+    @property
+    def backlog(self) -> int:
+        return self._queue.qsize() + self._active
+
+    def has_room(self, count: int) -> bool:
+        return self.backlog + count <= self.max_backlog
+
+    def schedule(self, field_type: str, value: str, context: str | None, store: StoreResult) -> None:
+        self._queue.put_nowait((field_type, value, context, store, otel_context.get_current()))
+
+    async def upgrade_one(self, field_type: str, value: str, context: str | None, store: StoreResult) -> None:
+        try:
+            result = await run_llm_validation(field_type, value, context)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            # Werdykt musi kiedyś zastąpić "pending" - błąd modelu kończy się objection jak przy złej odpowiedzi.
+            logger.warning("Deferred LLM validation failed field=%s: %s", field_type, exc)
+            result = LLM_FAILURE_RESULT
+        await store(result)
+
+    async def _worker(self) -> None:
+        while True:
+            field_type, value, context, store, trace_context = await self._queue.get()
+            self._active += 1
+            try:
+                with tracer.start_as_current_span(
+                    "validation.upgrade", context=trace_context, attributes={"validation.field_type": field_type}
+                ):
+                    await self.upgrade_one(field_type, value, context, store)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Storing deferred validation failed field=%s: %s", field_type, exc)
+            finally:
+                self._active -= 1
+
+    async def run(self) -> None:
+        """Pętla lifespan."""
+        await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+
+
+validation_upgrader = ValidationUpgrader(
+    concurrency=settings.validation_upgrade_concurrency,
+    max_backlog=settings.validation_upgrade_max_backlog,
+)
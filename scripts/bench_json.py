@@ -0,0 +1,114 @@
+"""
+Benchmark serializacji GET /sessions/{id}/forms/{version} dla dużych payloadów.
+
+Porównuje:
+  pydantic+jsonable   - dekodowanie JSONB (json.loads), model + jsonable_encoder + json.dumps
+  pydantic            - dekodowanie JSONB, model + model_dump_json (nowsze FastAPI)
+  orjson dict         - dekodowanie JSONB, słownik + orjson.dumps
+  orjson fragment     - tekst JSONB wklejony przez orjson.Fragment (bez dekodowania)
+Run from repo root: python scripts/bench_json.py [--fields 20000] [--runs 30]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import OrjsonResponse, raw_json
+from app.models.session import FieldValidationResult, FormSnapshotResponse
+
+
+def _synthetic_payload(fields: int) -> dict:
+    return {
+        "injured_person": {"first_name": "Jan", "last_name": "Kowalski", "pesel": "80010212345"},
+        "accident_info": {"detailed_description": "Poślizgnięcie na mokrej posadzce. " * 200},
+        "attachments": [f"skan_{i}.pdf" for i in range(fields // 10)],
+        "extra": {
+            f"field_{i}": {"value": f"wartość {i}", "checked": i % 2 == 0, "score": i / 7}
+            for i in range(fields)
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fields", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    payload_json = json.dumps(_synthetic_payload(args.fields), ensure_ascii=False)
+    created_at = datetime.now(timezone.utc)
+    validations = [
+        {"field_path": f"extra.field_{i}.value", "status": "success", "justification": "ok"}
+        for i in range(50)
+    ]
+
+    def pydantic_jsonable() -> bytes:
+        model = FormSnapshotResponse(
+            version=1,
+            source="raw",
+            payload=json.loads(payload_json),
+            validations=[FieldValidationResult(**v) for v in validations],
+            created_at=created_at,
+        )
+        return json.dumps(jsonable_encoder(model), ensure_ascii=False).encode("utf-8")
+
+    def pydantic_dump() -> bytes:
+        model = FormSnapshotResponse(
+            version=1,
+            source="raw",
+            payload=json.loads(payload_json),
+            validations=[FieldValidationResult(**v) for v in validations],
+            created_at=created_at,
+        )
+        return model.model_dump_json().encode("utf-8")
+
+    def orjson_dict() -> bytes:
+        content = {
+            "version": 1,
+            "source": "raw",
+            "payload": json.loads(payload_json),
+            "validations": validations,
+            "created_at": created_at,
+        }
+        return OrjsonResponse(content).body
+
+    def orjson_fragment() -> bytes:
+        content = {
+            "version": 1,
+            "source": "raw",
+            "payload": raw_json(payload_json),
+            "validations": validations,
+            "created_at": created_at,
+        }
+        return OrjsonResponse(content).body
+
+    variants: list[tuple[str, Callable[[], bytes]]] = [
+        ("pydantic+jsonable", pydantic_jsonable),
+        ("pydantic", pydantic_dump),
+        ("orjson dict", orjson_dict),
+        ("orjson fragment", orjson_fragment),
+    ]
+    reference = orjson.loads(orjson_fragment())
+    print(f"payload {len(payload_json.encode('utf-8')) / 1024:.0f} KiB, runs={args.runs}")
+    for label, fn in variants:
+        assert orjson.loads(fn())["payload"] == reference["payload"]
+        samples = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        print(
+            f"{label:<18} p50={statistics.median(samples):8.2f}ms "
+            f"mean={statistics.mean(samples):8.2f}ms max={max(samples):8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark renderowania PDF: arkusz CSS parsowany przy każdym renderze (jak dawniej,
+<style> w HTML) vs współdzielony obiekt CSS + FontConfiguration.
+Run from repo root: python scripts/bench_pdf.py [--runs 20] [--template ewyp]
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+
+from app.models.ewyp import EWYPFormSchema
+from app.services import pdf_export
+
+SAMPLE_PAYLOAD = {
+    "injured_person": {"first_name": "Jan", "last_name": "Kowalski", "pesel": "80010212345"},
+    "injured_address": {"street": "Piotrkowska", "house_number": "10A", "city": "Łódź"},
+    "accident_info": {
+        "accident_date": "2025-01-15",
+        "accident_place": "Magazyn",
+        "detailed_description": "Poślizgnięcie na mokrej posadzce podczas rozładunku. " * 20,
+        "first_aid_provided": True,
+    },
+    "witnesses": [{"first_name": "Anna", "last_name": "Nowak"}],
+}
+
+
+def _per_render_css(template: str, form: EWYPFormSchema) -> bytes:
+    """Dawna ścieżka: CSS w <style>, WeasyPrint parsuje go i rozwiązuje fonty za każdym razem."""
+    from weasyprint import HTML
+
+    html = _render_html(template, form)
+    css = (pdf_export.TEMPLATES_DIR / f"{template}.css").read_text(encoding="utf-8")
+    html = html.replace("</head>", f"<style>{css}</style></head>", 1)
+    return HTML(string=html).write_pdf()
+
+
+def _shared_css(template: str, form: EWYPFormSchema) -> bytes:
+    return pdf_export._write_pdf(template, _render_html(template, form))
+
+
+def _render_html(template: str, form: EWYPFormSchema) -> str:
+    if template == "ewyp":
+        return pdf_export._render_ewyp_html(form)
+    return pdf_export._render_notification_html(form)
+
+
+def _measure(fn: Callable[[str, EWYPFormSchema], bytes], template: str, runs: int) -> list[float]:
+    form = EWYPFormSchema(**SAMPLE_PAYLOAD)
+    fn(template, form)  # warm-up: import, pierwszy layout, cache fontconfig
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(template, form)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--template", choices=["ewyp", "notification"], default="ewyp")
+    args = parser.parse_args()
+
+    for label, fn in (("per-render CSS", _per_render_css), ("shared CSS+fonts", _shared_css)):
+        samples = _measure(fn, args.template, args.runs)
+        print(
+            f"{label:<18} mean={statistics.mean(samples):7.1f}ms "
+            f"p50={statistics.median(samples):7.1f}ms max={max(samples):7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Mikrobenchmarki gorących ścieżek w czystym Pythonie z bazową linią w repo.
+
+  run      - pomiar i wypisanie median
+  save     - pomiar i zapis do benchmarks/baseline.json (po świadomej zmianie wydajności)
+  compare  - pomiar i porównanie z bazową linią; kod wyjścia 1 przy istotnej regresji
+
+Regresja = jednostronny test Manna-Whitneya na medianach z kolejnych procesów (bieżące
+wolniejsze, p < --alpha) ORAZ wzrost mediany o co najmniej --threshold. Sam test
+wyłapałby stabilne różnice rzędu 1%, sam próg - szum pojedynczego przebiegu. Bazowa linia ma sens tylko na tej
+samej maszynie i wersji Pythona (compare ostrzega przy różnicy).
+Run from repo root: PYTHONPATH=. python scripts/bench_suite.py compare [--filter validator.]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import logging
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.agent.config_loader import config_loader
+from app.agent.validator import deterministic_result
+from app.models.ewyp import EWYPFormSchema
+from app.services.form_service import _get_by_path
+from app.services.pdf_export import _render_ewyp_html, generate_ewyp_pdf
+
+BASELINE = Path(__file__).resolve().parent.parent / "benchmarks" / "baseline.json"
+
+# Gałęzie deterministic_result: (typ pola, wartość poprawna, wartość błędna).
+_BRANCHES = [
+    ("pesel_strict", "44051401359", "4405140135x"),
+    ("name_proper", "Kowalska-Nowak", "kowalska"),
+    ("city_proper", "Zielona Góra", "Zielona Góra"),
+    ("doc_number", "ABC123456", "ABC-123"),
+    ("phone_digits", "600 700 800", "600"),
+    ("street_text", "Aleje Jerozolimskie 12/3", "ul.; DROP"),
+    ("house_number", "10A", "A10"),
+    ("postal_code_pl", "00-950", "00950"),
+]
+
+
+def _address(city: str) -> dict[str, str]:
+    return {
+        "street": "Marszałkowska",
+        "house_number": "10",
+        "apartment_number": "4",
+        "postal_code": "00-950",
+        "city": city,
+        "country": "Polska",
+    }
+
+
+def large_payload() -> dict[str, Any]:
+    """Pełny formularz z długimi opisami i wieloma załącznikami (ok. 60 KB JSON)."""
+    person = {
+        "pesel": "44051401359",
+        "document_type": "dowód osobisty",
+        "document_number": "ABC123456",
+        "first_name": "Jan",
+        "last_name": "Kowalski",
+        "birth_date": "1944-05-14",
+        "birth_place": "Kraków",
+        "phone": "600700800",
+    }
+    return {
+        "injured_person": person,
+        "injured_address": _address("Warszawa"),
+        "injured_previous_address": _address("Kraków"),
+        "injured_correspondence_address": _address("Łódź"),
+        "business_address": _address("Poznań"),
+        "reporter": {**person, "first_name": "Anna"},
+        "reporter_address": _address("Gdańsk"),
+        "accident_info": {
+            "accident_date": "2026-03-02",
+            "accident_time": "07:45:00",
+            "accident_place": "Hala produkcyjna nr 2",
+            "planned_work_start": "07:00:00",
+            "planned_work_end": "15:00:00",
+            "injuries_description": "Stłuczenie biodra i nadgarstka. " * 40,
+            "detailed_description": "Pracownik poślizgnął się na mokrej posadzce przy linii. " * 400,
+            "first_aid_provided": True,
+            "first_aid_facility": "SOR Szpital Bielański",
+            "investigating_authority": "PIP Warszawa",
+            "machine_involved": True,
+            "machine_description": "Prasa hydrauliczna",
+            "machine_certified": True,
+            "machine_registered": False,
+        },
+        "witnesses": [
+            {"first_name": f"Świadek{i}", "last_name": "Nowak", "address": _address("Radom")}
+            for i in range(3)
+        ],
+        "attachments": [f"zalacznik_{i}.pdf" for i in range(500)],
+        "documents_to_deliver": [f"dokument_{i}" for i in range(50)],
+        "documents_deadline": "2026-04-01",
+        "response_method": "poczta",
+    }
+
+
+def benchmarks() -> dict[str, Callable[[], object]]:
+    payload = large_payload()
+    form = EWYPFormSchema.model_validate(payload)
+    suite: dict[str, Callable[[], object]] = {}
+    for field_type, valid, invalid in _BRANCHES:
+        suite[f"validator.{field_type}.valid"] = lambda f=field_type, v=valid: deterministic_result(f, v)
+        suite[f"validator.{field_type}.invalid"] = lambda f=field_type, v=invalid: deterministic_result(f, v)
+    suite["validator.empty"] = lambda: deterministic_result("text_brief", "   ")
+    suite["validator.unsupported"] = lambda: deterministic_result("no_such_field", "x")
+    suite["validator.llm_bound"] = lambda: deterministic_result("text_detailed", "Upadek ze schodów.")
+    description = payload["accident_info"]["detailed_description"]
+    suite["config.build_messages"] = lambda: config_loader.build_messages(
+        "text_detailed", description, "Zgłoszenie wypadku przy pracy"
+    )
+    suite["form.get_by_path"] = lambda: _get_by_path(payload, "accident_info.detailed_description")
+    suite["form.get_by_path.missing"] = lambda: _get_by_path(payload, "witnesses.0.address.city")
+    suite["ewyp.parse_large"] = lambda: EWYPFormSchema.model_validate(payload)
+    suite["pdf.render_ewyp_html"] = lambda: _render_ewyp_html(form)
+    suite["pdf.generate_ewyp_pdf"] = lambda: generate_ewyp_pdf(form)
+    return suite
+
+
+def measure(fn: Callable[[], object], samples: int, min_sample_seconds: float) -> list[float]:
+    """Czas jednego wywołania (s) w każdej z `samples` próbek; GC wyłączony jak w timeit."""
+    fn()  # rozgrzewka: cache szablonów, lru_cache, import leniwy
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - started >= min_sample_seconds or number >= 1 << 20:
+            break
+        number *= 2
+    results = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(samples):
+            started = time.perf_counter()
+            for _ in range(number):
+                fn()
+            results.append((time.perf_counter() - started) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return results
+
+
+def mann_whitney_greater(current: list[float], baseline: list[float]) -> float:
+    """p-value jednostronnego testu U (H1: current > baseline), aproksymacja normalna z poprawką na remisy."""
+    n1, n2 = len(current), len(baseline)
+    combined = sorted([(value, 0) for value in current] + [(value, 1) for value in baseline])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties**3 - ties
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined, strict=True) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _environment() -> dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=False
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "commit": commit,
+    }
+
+
+def _measure_all(name_filter: str, samples: int, min_sample_seconds: float) -> dict[str, Any]:
+    results: dict[str, list[float]] = {}
+    skipped: dict[str, str] = {}
+    for name, fn in benchmarks().items():
+        if name_filter and name_filter not in name:
+            continue
+        try:
+            results[name] = measure(fn, samples, min_sample_seconds)
+        except Exception as exc:  # noqa: BLE001
+            # Np. brak Pango/WeasyPrint lokalnie - reszta zestawu nadal się liczy.
+            skipped[name] = f"{type(exc).__name__}: {exc}"
+    return {"results": results, "skipped": skipped}
+
+
+def run_suite(args: argparse.Namespace) -> dict[str, list[float]]:
+    """Mediana każdego benchmarku z --processes świeżych procesów.
+
+    Układ pamięci, seed haszy i stan cache CPU zmieniają się między procesami bardziej
+    niż między próbkami w jednym procesie. Niezależną obserwacją dla testu U jest więc
+    proces (jego mediana), a nie pojedyncza próbka - inaczej test miałby fałszywą pewność.
+    """
+    results: dict[str, list[float]] = {}
+    skipped: dict[str, str] = {}
+    for _ in range(args.processes):
+        worker = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "worker",
+                f"--filter={args.filter}",
+                f"--samples={args.samples}",
+                f"--min-sample-seconds={args.min_sample_seconds}",
+            ],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if worker.returncode != 0:
+            sys.exit(f"Benchmark worker failed:\n{worker.stderr}")
+        # Ostatnia linia: biblioteki (np. WeasyPrint bez Pango) potrafią pisać na stdout.
+        output = json.loads(worker.stdout.strip().splitlines()[-1])
+        for name, samples in output["results"].items():
+            results.setdefault(name, []).append(statistics.median(samples))
+        skipped.update(output["skipped"])
+    for name, samples in results.items():
+        print(f"{name:<36} {_fmt(statistics.median(samples))}", file=sys.stderr)
+    for name, reason in skipped.items():
+        print(f"{name:<36} skipped ({reason})", file=sys.stderr)
+    return results
+
+
+def _fmt(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.1f} ns"
+
+
+def save(results: dict[str, list[float]], path: Path) -> None:
+    """Nadpisuje zmierzone wpisy; pozostałe (np. pominięte przez --filter) zostają."""
+    existing = json.loads(path.read_text(encoding="utf-8"))["benchmarks"] if path.exists() else {}
+    existing.update(
+        {
+            name: {"median": statistics.median(medians), "process_medians": medians}
+            for name, medians in results.items()
+        }
+    )
+    document = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": _environment(),
+        "benchmarks": dict(sorted(existing.items())),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=1) + "\n", encoding="utf-8")
+    print(f"Saved {len(results)} benchmarks to {path}", file=sys.stderr)
+
+
+def compare(results: dict[str, list[float]], path: Path, alpha: float, threshold: float) -> int:
+    baseline = json.loads(path.read_text(encoding="utf-8"))
+    env, base_env = _environment(), baseline.get("environment", {})
+    for key in ("python", "implementation", "machine"):
+        if env[key] != base_env.get(key):
+            print(f"WARNING: baseline {key}={base_env.get(key)!r}, current {env[key]!r}", file=sys.stderr)
+
+    regressions = 0
+    print(f"{'benchmark':<36}{'baseline':>12}{'current':>12}{'change':>9}{'p':>9}  verdict")
+    for name, medians in sorted(results.items()):
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            print(f"{name:<36}{'-':>12}{_fmt(statistics.median(medians)):>12}{'':>9}{'':>9}  new")
+            continue
+        before, now = base["median"], statistics.median(medians)
+        change = now / before - 1
+        p_slower = mann_whitney_greater(medians, base["process_medians"])
+        p_faster = mann_whitney_greater(base["process_medians"], medians)
+        if p_slower < alpha and change >= threshold:
+            verdict = "REGRESSION"
+            regressions += 1
+        elif p_faster < alpha and change <= -threshold:
+            verdict = "faster"
+        else:
+            verdict = "same"
+        p_value = min(p_slower, p_faster)
+        print(f"{name:<36}{_fmt(before):>12}{_fmt(now):>12}{change:>+8.1%}{p_value:>9.3g}  {verdict}")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["run", "save", "compare", "worker"])
+    parser.add_argument("--filter", default="", help="tylko benchmarki zawierające ten tekst")
+    parser.add_argument("--samples", type=int, default=5, help="próbek na benchmark w procesie")
+    parser.add_argument("--processes", type=int, default=10, help="liczba procesów pomiarowych")
+    parser.add_argument("--min-sample-seconds", type=float, default=0.02)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--alpha", type=float, default=0.01, help="poziom istotności testu")
+    parser.add_argument("--threshold", type=float, default=0.10, help="minimalny wzrost mediany (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    # Handler logów pisze na stderr - bez tego mierzylibyśmy terminal, nie kod.
+    logging.disable(logging.INFO)
+    if args.command == "worker":
+        print(json.dumps(_measure_all(args.filter, args.samples, args.min_sample_seconds)))
+        return
+    results = run_suite(args)
+    if args.command == "save":
+        save(results, args.baseline)
+    elif args.command == "compare":
+        sys.exit(compare(results, args.baseline, args.alpha, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
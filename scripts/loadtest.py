@@ -0,0 +1,315 @@
+"""
+Test obciążeniowy całego przepływu obywatela: sesja -> walidacje -> wersje -> historia -> PDF.
+
+Każdy wirtualny użytkownik zakłada sesję (POST /api/sessions), a potem wykonuje --steps
+kroków losowanych wg --mix, z przerwą (think time) o rozkładzie wykładniczym między nimi.
+Model otwarty: nowi użytkownicy przychodzą procesem Poissona z --arrival-rate na sekundę
+(najwyżej --concurrency naraz). Model zamknięty (--arrival-rate 0): --concurrency
+użytkowników w pętli. Wynik (przepustowość, p50/p95/p99 i błędy na krok) trafia jako
+JSON do --output; --compare poprzedni.json wypisuje różnice między wydaniami.
+
+LLM: uruchom scripts/stub_llm.py i ustaw aplikacji OPENROUTER_BASE_URL=http://127.0.0.1:8090/v1.
+Run from repo root: python scripts/loadtest.py --base-url http://localhost:8000 --duration 60 \\
+    --arrival-rate 2 --concurrency 50 --think-time 1 --mix field=5,validate=2,submit=2,history=1,snapshot=1,pdf=1
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+STEPS = ("field", "validate", "submit", "history", "snapshot", "pdf")
+# Kroki czytające wersję - bez wcześniejszego submit/validate zamieniane na submit.
+_NEEDS_VERSION = {"snapshot", "pdf"}
+
+_FIELD_SAMPLES = {
+    # field_type: (poprawna, błędna)
+    "pesel_strict": ("44051401359", "4405140135"),
+    "postal_code_pl": ("00-950", "00950x"),
+    "name_proper": ("Kowalski", "k0walski"),
+    "phone_digits": ("600700800", "600-700"),
+    "text_brief": ("Hala produkcyjna nr 2", ""),
+    "text_detailed": (
+        "Pracownik poślizgnął się na mokrej posadzce i upadł na lewy bok.",
+        "upadł",
+    ),
+}
+
+
+def _payload(valid: bool) -> dict:
+    pesel, postal, name = (
+        ("44051401359", "00-950", "Kowalski") if valid else ("123", "00950x", "k0walski")
+    )
+    return {
+        "injured_person": {
+            "first_name": "Jan",
+            "last_name": name,
+            "pesel": pesel,
+            "document_number": "ABC123456",
+            "phone": "600700800",
+        },
+        "injured_address": {
+            "city": "Warszawa",
+            "street": "Marszałkowska",
+            "house_number": "10",
+            "postal_code": postal,
+        },
+        "accident_info": {
+            "accident_place": "Hala produkcyjna nr 2",
+            "detailed_description": "Pracownik poślizgnął się na mokrej posadzce i upadł na lewy bok.",
+            "injuries_description": "Stłuczenie biodra.",
+        },
+    }
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in STEPS:
+            raise SystemExit(f"Unknown step {name!r} in --mix (known: {', '.join(STEPS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Percentyl metodą najbliższej rangi (q w [0, 100])."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.statuses: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.users_started = 0
+        self.users_finished = 0
+
+    def record(self, step: str, seconds: float, status: str, ok: bool) -> None:
+        self.latencies[step].append(seconds)
+        self.statuses[step][status] += 1
+        if not ok:
+            self.errors[step] += 1
+
+    def report(self, elapsed: float) -> dict:
+        steps = {}
+        for step, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            steps[step] = {
+                "count": len(ordered),
+                "errors": self.errors[step],
+                "error_rate": round(self.errors[step] / len(ordered), 4),
+                "throughput_rps": round(len(ordered) / elapsed, 3),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+                "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+                "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+                "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1),
+                "status_codes": dict(self.statuses[step]),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        errors = sum(self.errors.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "users_started": self.users_started,
+            "users_finished": self.users_finished,
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 3),
+            "steps": steps,
+        }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, args: argparse.Namespace):
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.session_id: str | None = None
+        self.headers: dict[str, str] = {}
+        self.version: int | None = None
+
+    async def _call(self, step: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            resp = await self.client.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError as exc:
+            self.recorder.record(step, time.perf_counter() - started, type(exc).__name__, ok=False)
+            return None
+        if step == "pdf":
+            # Czas do ostatniego bajtu PDF, nie tylko do nagłówków.
+            await resp.aread()
+        self.recorder.record(step, time.perf_counter() - started, str(resp.status_code), resp.status_code < 400)
+        return resp if resp.status_code < 400 else None
+
+    def _valid(self) -> bool:
+        return random.random() >= self.args.invalid_rate
+
+    async def run(self) -> None:
+        self.recorder.users_started += 1
+        resp = await self._call("create_session", "POST", "/api/sessions", json={"form_type": "EWYP"})
+        if resp is None:
+            return
+        data = resp.json()
+        self.session_id = data["session_id"]
+        self.headers = {"Authorization": f"Bearer {data['session_token']}"}
+
+        names = list(self.args.mix)
+        weights = [self.args.mix[name] for name in names]
+        for _ in range(self.args.steps):
+            if self.args.think_time > 0:
+                await asyncio.sleep(random.expovariate(1 / self.args.think_time))
+            step = random.choices(names, weights)[0]
+            if step in _NEEDS_VERSION and self.version is None:
+                step = "submit"
+            await getattr(self, f"_step_{step}")()
+        self.recorder.users_finished += 1
+
+    async def _step_field(self) -> None:
+        field_type, samples = random.choice(list(_FIELD_SAMPLES.items()))
+        value = samples[0] if self._valid() else samples[1]
+        await self._call("field", "POST", "/api/validate", json={"field_type": field_type, "value": value})
+
+    async def _step_validate(self) -> None:
+        resp = await self._call(
+            "validate", "POST", f"/api/sessions/{self.session_id}/validate", json={"payload": _payload(self._valid())}
+        )
+        if resp is not None:
+            self.version = resp.json()["version"]
+
+    async def _step_submit(self) -> None:
+        resp = await self._call(
+            "submit",
+            "POST",
+            f"/api/sessions/{self.session_id}/forms",
+            json={"payload": _payload(self._valid()), "source": random.choice(["raw", "corrected"])},
+        )
+        if resp is not None:
+            self.version = resp.json()["version"]
+
+    async def _step_history(self) -> None:
+        await self._call("history", "GET", f"/api/sessions/{self.session_id}/history")
+
+    async def _step_snapshot(self) -> None:
+        await self._call("snapshot", "GET", f"/api/sessions/{self.session_id}/forms/{self.version}")
+
+    async def _step_pdf(self) -> None:
+        suffix = random.choice(["pdf", "pdf-notification"])
+        await self._call("pdf", "GET", f"/api/sessions/{self.session_id}/forms/{self.version}/{suffix}")
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    timeout = httpx.Timeout(args.timeout)
+    slots = asyncio.Semaphore(args.concurrency)
+    deadline = time.perf_counter() + args.duration
+    tasks: set[asyncio.Task] = set()
+    dropped = 0
+
+    async def user(client: httpx.AsyncClient) -> None:
+        try:
+            await VirtualUser(client, recorder, args).run()
+        finally:
+            slots.release()
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        while time.perf_counter() < deadline:
+            if args.arrival_rate > 0:
+                await asyncio.sleep(random.expovariate(args.arrival_rate))
+                if slots.locked():
+                    # Model otwarty: przy wysyconym limicie przybycie przepada (i jest raportowane).
+                    dropped += 1
+                    continue
+                await slots.acquire()
+            else:
+                await slots.acquire()
+            task = asyncio.create_task(user(client))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        # Rozpoczęte podróże kończą się normalnie - nie ucinamy ogona rozkładu.
+        if tasks:
+            await asyncio.wait(tasks, timeout=args.drain_timeout)
+        for task in tasks:
+            task.cancel()
+    report = recorder.report(time.perf_counter() - started)
+    report["arrivals_dropped"] = dropped
+    return report
+
+
+def _compare(current: dict, previous: dict) -> None:
+    print(f"{'step':<16}{'p95 ms':>20}{'p99 ms':>20}{'rps':>18}{'errors':>16}")
+    for step, now in current["steps"].items():
+        before = previous.get("results", previous).get("steps", {}).get(step)
+        if before is None:
+            continue
+        print(
+            f"{step:<16}"
+            f"{before['p95_ms']:>9} -> {now['p95_ms']:<8}"
+            f"{before['p99_ms']:>9} -> {now['p99_ms']:<8}"
+            f"{before['throughput_rps']:>7} -> {now['throughput_rps']:<8}"
+            f"{before['error_rate']:>6} -> {now['error_rate']:<7}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=60.0, help="czas generowania przybyć (s)")
+    parser.add_argument("--arrival-rate", type=float, default=1.0, help="nowi użytkownicy/s (0 = model zamknięty)")
+    parser.add_argument("--concurrency", type=int, default=20, help="limit równoczesnych użytkowników")
+    parser.add_argument("--think-time", type=float, default=2.0, help="średnia przerwa między krokami (s)")
+    parser.add_argument("--steps", type=int, default=10, help="kroków na użytkownika po założeniu sesji")
+    parser.add_argument("--mix", default="field=5,validate=2,submit=2,history=1,snapshot=1,pdf=1")
+    parser.add_argument("--invalid-rate", type=float, default=0.2, help="ułamek błędnych wartości/payloadów")
+    parser.add_argument("--timeout", type=float, default=120.0, help="timeout żądania (s)")
+    parser.add_argument("--drain-timeout", type=float, default=300.0, help="czas na dokończenie podróży (s)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--label", default="", help="np. wersja/commit - zapisywane w wyniku")
+    parser.add_argument("--output", type=Path, default=None, help="plik JSON z wynikiem (domyślnie stdout)")
+    parser.add_argument("--compare", type=Path, default=None, help="poprzedni wynik do porównania")
+    args = parser.parse_args()
+    args.mix = parse_mix(args.mix)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    results = asyncio.run(run_load(args))
+    document = {
+        "label": args.label,
+        "started_at": started_at,
+        "python": platform.python_version(),
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in {"output", "compare"}
+        },
+        "results": results,
+    }
+    text = json.dumps(document, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+        print(f"Saved {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.compare:
+        _compare(results, json.loads(args.compare.read_text(encoding="utf-8")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Zastępczy serwer LLM (API zgodne z OpenAI /chat/completions) do testów obciążeniowych.
+
+Odpowiada poprawnym AgentResult po losowym opóźnieniu (rozkład log-normalny wokół
+--latency-ms), bez tokenów i limitów darmowych modeli. Aplikację kieruje się na niego
+przez OPENROUTER_BASE_URL=http://127.0.0.1:8090/v1.
+Run from repo root: python scripts/stub_llm.py [--port 8090] [--latency-ms 800] [--objection-rate 0.1]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency_ms: float, sigma: float, objection_rate: float, error_rate: float) -> FastAPI:
+    app = FastAPI(title="stub-llm")
+
+    @app.head("/v1")
+    async def head() -> None:
+        return None
+
+    @app.post("/v1/chat/completions", response_model=None)
+    async def chat_completions(request: Request) -> dict | JSONResponse:
+        body = await request.json()
+        if latency_ms > 0:
+            # Mediana = latency_ms; sigma steruje ogonem (p99 ok. e^(2.33*sigma) x mediana).
+            await asyncio.sleep(latency_ms / 1000 * math.exp(random.gauss(0, sigma)))
+        if random.random() < error_rate:
+            return JSONResponse({"error": {"message": "stub failure"}}, status_code=500)
+        objection = random.random() < objection_rate
+        content = json.dumps(
+            {
+                "status": "objection" if objection else "success",
+                "justification": "Stub: wartość odrzucona." if objection else "Stub: wartość poprawna.",
+            },
+            ensure_ascii=False,
+        )
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="mediana czasu odpowiedzi")
+    parser.add_argument("--sigma", type=float, default=0.5, help="rozrzut log-normalny (0 = stały czas)")
+    parser.add_argument("--objection-rate", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="ułamek odpowiedzi 500")
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.sigma, args.objection_rate, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.agent.validator import AgentResult
+from app.api import live as live_api
+from app.core.config import settings
+from app.core.security import SessionDenylist
+from app.db.models import FormSession
+from app.main import app
+from app.services import live_validation
+
+SESSION_ID = uuid.uuid4()
+
+
+class _DummyDb:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_args):
+        return None
+
+    async def rollback(self):
+        return None
+
+
+@pytest.fixture(autouse=True)
+def stub_dependencies(monkeypatch):
+    logged = []
+
+    async def _authenticate(session_id, token, _db):
+        if token != "good":
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return FormSession(
+            id=session_id, status="open", token_expires_at=datetime.now(timezone.utc) + timedelta(hours=1)
+        )
+
+    async def _log(_db, field_type, value, result):
+        logged.append((field_type, value, result.status))
+
+    async def _llm(field_type, value, context=None):
+        return AgentResult(status="success", justification=f"llm:{value}")
+
+    monkeypatch.setattr(live_api, "AsyncSessionLocal", _DummyDb)
+    monkeypatch.setattr(live_api, "authenticate_token", _authenticate)
+    monkeypatch.setattr(live_validation, "log_validation", _log)
+    monkeypatch.setattr(live_validation, "run_llm_validation", _llm)
+    monkeypatch.setattr(settings, "live_validation_debounce_ms", 50)
+    return logged
+
+
+def test_rejects_invalid_token():
+    client = TestClient(app)
+    with client.websocket_connect(f"/api/sessions/{SESSION_ID}/live") as ws:
+        ws.send_json({"token": "bad"})
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_json()
+    assert exc_info.value.code == 4401
+
+
+def test_debounces_per_field_and_sends_latest_result(stub_dependencies):
+    client = TestClient(app)
+    with client.websocket_connect(f"/api/sessions/{SESSION_ID}/live") as ws:
+        ws.send_json({"token": "good"})
+        assert ws.receive_json()["type"] == "ready"
+
+        for value in ("1", "12", "12345678901"):
+            ws.send_json({"field_path": "injured_person.pesel", "value": value})
+        assert ws.receive_json() == {
+            "type": "result",
+            "field_path": "injured_person.pesel",
+            "status": "success",
+            "justification": "",
+        }
+
+        ws.send_json({"field_path": "accident_info.detailed_description", "value": "Upadek"})
+        assert ws.receive_json()["status"] == "pending"
+        assert ws.receive_json() == {
+            "type": "result",
+            "field_path": "accident_info.detailed_description",
+            "status": "success",
+            "justification": "llm:Upadek",
+        }
+
+        ws.send_json({"field_path": "unknown", "value": "x"})
+        assert ws.receive_json()["type"] == "error"
+
+    assert stub_dependencies == [
+        ("pesel_strict", "12345678901", "success"),
+        ("text_detailed", "Upadek", "success"),
+    ]
+
+
+def test_new_value_cancels_llm_call_for_previous_one(monkeypatch):
+    cancelled = []
+
+    async def _llm(field_type, value, context=None):
+        if value == "Upa":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(value)
+                raise
+        return AgentResult(status="success", justification=f"llm:{value}")
+
+    monkeypatch.setattr(live_validation, "run_llm_validation", _llm)
+
+    client = TestClient(app)
+    with client.websocket_connect(f"/api/sessions/{SESSION_ID}/live") as ws:
+        ws.send_json({"token": "good"})
+        ws.receive_json()
+        ws.send_json({"field_path": "accident_info.detailed_description", "value": "Upa"})
+        assert ws.receive_json()["status"] == "pending"
+        ws.send_json({"field_path": "accident_info.detailed_description", "value": "Upadek"})
+        assert ws.receive_json()["status"] == "pending"
+        assert ws.receive_json()["justification"] == "llm:Upadek"
+
+    assert cancelled == ["Upa"]
+
+
+def test_binary_frame_gets_error_message():
+    client = TestClient(app)
+    with client.websocket_connect(f"/api/sessions/{SESSION_ID}/live") as ws:
+        ws.send_json({"token": "good"})
+        ws.receive_json()
+        ws.send_bytes(b"\x00\x01")
+        assert ws.receive_json()["type"] == "error"
+
+
+def test_socket_closed_after_token_refresh(monkeypatch):
+    monkeypatch.setattr(live_api, "session_denylist", SessionDenylist())
+    client = TestClient(app)
+    with client.websocket_connect(f"/api/sessions/{SESSION_ID}/live") as ws:
+        ws.send_json({"token": "good"})
+        ws.receive_json()
+        # refresh-token wydał nowy token (generacja 1); to połączenie używa generacji 0.
+        live_api.session_denylist.revoke_before(SESSION_ID, 1, datetime.now(timezone.utc) + timedelta(hours=1))
+        ws.send_json({"field_path": "injured_person.pesel", "value": "1"})
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            ws.receive_json()
+    assert exc_info.value.code == 4401
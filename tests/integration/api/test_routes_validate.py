@@ -1,4 +1,8 @@
+import asyncio
+import uuid
+
 import pytest
+from fastapi import HTTPException
 from httpx import ASGITransport, AsyncClient
 
 from app import agent
@@ -18,6 +22,9 @@ def override_session_dependency():
         async def commit(self):
             return None
 
+        async def rollback(self):
+            return None
+
     async def _override():
         yield DummySession()
 
@@ -32,6 +39,13 @@ def stub_log(monkeypatch):
         return None
 
     monkeypatch.setattr(validation_log, "log_validation", _noop)
+    monkeypatch.setattr(routes, "log_validation", _noop)
+
+
+async def _authenticate(session_id, authorization, _db):
+    # Token "good" należy do każdej sesji; inne (lub brak) - 401 jak w security._authenticate.
+    if authorization != "Bearer good":
+        raise HTTPException(status_code=401, detail="Invalid token")
 
 
 @pytest.fixture
@@ -151,3 +165,136 @@ async def test_validate_valid3_other(stub_agent):
     assert "hairdresser" not in body["justification"].lower()
 
 
+@pytest.mark.asyncio
+async def test_validate_deferred_returns_pending_and_schedules_llm(monkeypatch):
+    log_id = uuid.uuid4()
+    scheduled = []
+
+    async def _log_pending(session, field_type, value):
+        return log_id
+
+    async def _get_validation(session, validation_id):
+        return ("pending", "") if validation_id == log_id else None
+
+    monkeypatch.setattr(routes, "run_deterministic_validation", lambda field_type, value: None)
+    monkeypatch.setattr(routes, "log_pending_validation", _log_pending)
+    monkeypatch.setattr(routes, "get_validation", _get_validation)
+    monkeypatch.setattr(routes.validation_upgrader, "schedule", lambda *args: scheduled.append(args))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/api/validate", json={"field_type": "valid3", "value": "Kucharz", "defer_llm": True}
+        )
+        polled = await client.get(f"/api/validate/{log_id}")
+        missing = await client.get(f"/api/validate/{uuid.uuid4()}")
+
+    assert resp.json() == {"status": "pending", "justification": "", "validation_id": str(log_id)}
+    assert [args[:3] for args in scheduled] == [("valid3", "Kucharz", None)]
+    assert polled.json()["status"] == "pending"
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_validate_deferred_answers_deterministic_fields_at_once(monkeypatch):
+    monkeypatch.setattr(
+        routes,
+        "run_deterministic_validation",
+        lambda field_type, value: AgentResult(status="objection", justification="bad"),
+    )
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/api/validate", json={"field_type": "pesel_strict", "value": "1", "defer_llm": True}
+        )
+
+    assert resp.json() == {"status": "objection", "justification": "bad"}
+
+
+@pytest.mark.asyncio
+async def test_newer_validation_of_same_session_field_supersedes_older(monkeypatch):
+    started = asyncio.Event()
+
+    async def _agent(field_type, value, context=None):
+        if value == "draft":
+            started.set()
+            await asyncio.sleep(10)
+        return AgentResult(status="success", justification=value)
+
+    monkeypatch.setattr(routes, "run_validation_agent", _agent)
+    monkeypatch.setattr(routes, "authenticate_header", _authenticate)
+    body = {"field_type": "text_detailed", "session_id": str(uuid.uuid4()), "field_path": "accident.description"}
+    headers = {"Authorization": "Bearer good"}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        older = asyncio.create_task(
+            client.post("/api/validate", json={**body, "value": "draft"}, headers=headers)
+        )
+        await started.wait()
+        newer = await client.post("/api/validate", json={**body, "value": "final text"}, headers=headers)
+        older_resp = await older
+
+    assert newer.json() == {"status": "success", "justification": "final text"}
+    assert older_resp.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_session_keyed_validation_requires_session_token(monkeypatch):
+    async def _agent(field_type, value, context=None):
+        raise AssertionError("must not validate without the session token")
+
+    monkeypatch.setattr(routes, "run_validation_agent", _agent)
+    monkeypatch.setattr(routes, "authenticate_header", _authenticate)
+    body = {
+        "field_type": "text_detailed",
+        "value": "x",
+        "session_id": str(uuid.uuid4()),
+        "field_path": "accident.description",
+    }
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        missing = await client.post("/api/validate", json=body)
+        wrong = await client.post("/api/validate", json=body, headers={"Authorization": "Bearer other"})
+
+    assert missing.status_code == 401
+    assert wrong.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_session_keyed_validation_releases_connection_before_llm(monkeypatch):
+    events = []
+
+    class _TrackingSession:
+        async def rollback(self):
+            events.append("rollback")
+
+    async def _override():
+        yield _TrackingSession()
+
+    async def _agent(field_type, value, context=None):
+        events.append("llm")
+        return AgentResult(status="success", justification="")
+
+    async def _auth(session_id, authorization, db):
+        events.append("auth")
+        await _authenticate(session_id, authorization, db)
+
+    app.dependency_overrides[get_session] = _override
+    monkeypatch.setattr(routes, "run_validation_agent", _agent)
+    monkeypatch.setattr(routes, "authenticate_header", _auth)
+    body = {
+        "field_type": "text_detailed",
+        "value": "x",
+        "session_id": str(uuid.uuid4()),
+        "field_path": "accident.description",
+    }
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post("/api/validate", json=body, headers={"Authorization": "Bearer good"})
+
+    assert resp.status_code == 200
+    assert events == ["auth", "rollback", "llm"]
@@ -7,6 +7,7 @@ from httpx import ASGITransport, AsyncClient
 from app.api import forms as forms_api
 from app.api import sessions as sessions_api
 from app.core import security
+from app.db import session as db_session
 from app.main import app
 
 
@@ -41,8 +42,10 @@ def override_db_session():
         yield None
 
     app.dependency_overrides[security.get_session] = _override
+    app.dependency_overrides[db_session.get_read_session] = _override
     yield
     app.dependency_overrides.pop(security.get_session, None)
+    app.dependency_overrides.pop(db_session.get_read_session, None)
 
 
 @pytest.fixture
@@ -53,8 +56,10 @@ def stub_current_session(monkeypatch):
         return stub
 
     app.dependency_overrides[security.get_current_session] = _override
+    app.dependency_overrides[security.get_current_session_readonly] = _override
     yield stub
     app.dependency_overrides.pop(security.get_current_session, None)
+    app.dependency_overrides.pop(security.get_current_session_readonly, None)
 
 
 @pytest.mark.asyncio
@@ -137,7 +142,7 @@ async def test_validate_form(monkeypatch, stub_current_session):
         _StubValidation(field_path="injured_person.last_name", status="objection", justification="bad"),
     ]
 
-    async def _fake_validate(_db, session_id, payload, fields_to_validate):
+    async def _fake_validate(_db, session_id, payload, fields_to_validate, defer_llm=False):
         version.validations = validations
         return version, validations
 
@@ -162,8 +167,8 @@ async def test_history(monkeypatch, stub_current_session):
     v1 = _StubVersion(version=1)
     v2 = _StubVersion(version=2)
 
-    async def _fake_history(_db, session_id, limit, offset):
-        return 2, [v2, v1]
+    async def _fake_history(_db, session_id, limit, cursor, offset):
+        return 2, [v2, v1], None
 
     monkeypatch.setattr(forms_api, "get_history", _fake_history)
 
@@ -177,19 +182,64 @@ async def test_history(monkeypatch, stub_current_session):
     assert resp.status_code == 200
     assert data["total_versions"] == 2
     assert data["versions"][0]["version"] == 2
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_history_cursor(monkeypatch, stub_current_session):
+    calls = {}
+
+    async def _fake_history(_db, session_id, limit, cursor, offset):
+        calls["limit"], calls["cursor"], calls["offset"] = limit, cursor, offset
+        return 7, [_StubVersion(version=4), _StubVersion(version=3)], 3
+
+    monkeypatch.setattr(forms_api, "get_history", _fake_history)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(
+            f"/api/sessions/{stub_current_session.id}/history?limit=2&cursor=5",
+            headers={"Authorization": "Bearer abc"},
+        )
+    data = resp.json()
+    assert resp.status_code == 200
+    assert calls == {"limit": 2, "cursor": 5, "offset": 0}
+    assert [v["version"] for v in data["versions"]] == [4, 3]
+    assert data["next_cursor"] == 3
+
+
+@pytest.mark.asyncio
+async def test_history_deprecated_offset_still_accepted(monkeypatch, stub_current_session):
+    calls = {}
+
+    async def _fake_history(_db, session_id, limit, cursor, offset):
+        calls["cursor"], calls["offset"] = cursor, offset
+        return 7, [_StubVersion(version=5)], 5
+
+    monkeypatch.setattr(forms_api, "get_history", _fake_history)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(
+            f"/api/sessions/{stub_current_session.id}/history?limit=1&offset=2",
+            headers={"Authorization": "Bearer abc"},
+        )
+    assert resp.status_code == 200
+    assert calls == {"cursor": None, "offset": 2}
 
 
 @pytest.mark.asyncio
 async def test_get_version(monkeypatch, stub_current_session):
-    version = _StubVersion(version=5, payload={"foo": "bar"})
-    version.validations = [
+    version = _StubVersion(version=5)
+    version.payload_json = '{"foo": "bar", "nested": {"n": [1, 2]}}'
+    validations = [
         _StubValidation(field_path="injured_person.pesel", status="success", justification="ok")
     ]
 
-    async def _fake_get_version(_db, session_id, version_number):
-        return version
+    async def _fake_get_version_snapshot(_db, session_id, version_number):
+        return version, validations
 
-    monkeypatch.setattr(forms_api, "get_version", _fake_get_version)
+    monkeypatch.setattr(forms_api, "get_version_snapshot", _fake_get_version_snapshot)
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -200,22 +250,85 @@ async def test_get_version(monkeypatch, stub_current_session):
     assert resp.status_code == 200
     data = resp.json()
     assert data["version"] == 5
-    assert data["payload"]["foo"] == "bar"
+    assert data["payload"] == {"foo": "bar", "nested": {"n": [1, 2]}}
     assert data["validations"][0]["status"] == "success"
+    assert data["created_at"].endswith("Z")
+    assert resp.headers["etag"] == forms_api.version_etag(stub_current_session.id, 5)
+    assert "immutable" in resp.headers["cache-control"]
+
+
+@pytest.mark.asyncio
+async def test_get_version_with_pending_validation_is_not_cached(monkeypatch, stub_current_session):
+    version = _StubVersion(version=5)
+    version.payload_json = "{}"
+    validations = [_StubValidation(field_path="accident.description", status="pending", justification="")]
+
+    async def _fake_get_version_snapshot(_db, session_id, version_number):
+        return version, validations
+
+    monkeypatch.setattr(forms_api, "get_version_snapshot", _fake_get_version_snapshot)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(f"/api/sessions/{stub_current_session.id}/forms/5")
+    assert resp.status_code == 200
+    assert resp.json()["validations"][0]["status"] == "pending"
+    assert resp.headers["cache-control"] == "no-store"
+    assert "etag" not in resp.headers
+
+
+@pytest.mark.asyncio
+async def test_get_version_not_modified(monkeypatch, stub_current_session):
+    async def _must_not_load(*_args):
+        raise AssertionError("304 must not load the version")
+
+    monkeypatch.setattr(forms_api, "get_version_snapshot", _must_not_load)
+    etag = forms_api.version_etag(stub_current_session.id, 5)
+    assert etag != forms_api.version_etag(stub_current_session.id, 6)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(
+            f"/api/sessions/{stub_current_session.id}/forms/5",
+            headers={"If-None-Match": etag},
+        )
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_large_version_is_gzipped(monkeypatch, stub_current_session):
+    version = _StubVersion(version=1)
+    version.payload_json = '{"notes": "' + "x" * 50_000 + '"}'
+
+    async def _fake_get_version_snapshot(_db, session_id, version_number):
+        return version, []
+
+    monkeypatch.setattr(forms_api, "get_version_snapshot", _fake_get_version_snapshot)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(
+            f"/api/sessions/{stub_current_session.id}/forms/1",
+            headers={"Accept-Encoding": "gzip"},
+        )
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert int(resp.headers["content-length"]) < 5_000
+    assert len(resp.json()["payload"]["notes"]) == 50_000
 
 
 @pytest.mark.asyncio
 async def test_get_pdf(monkeypatch, stub_current_session):
-    version = _StubVersion(
-        version=1,
-        payload={"injured_person": {}, "injured_address": {}, "accident_info": {}},
-    )
+    async def _fake_key(_db, session_id, version_number, template):
+        return "content-key"
 
-    async def _fake_get_version(_db, session_id, version_number):
-        return version
+    async def _fake_get_version_pdf(_db, session_id, version_number, template):
+        assert template == "ewyp"
+        return "content-key", b"pdf-bytes"
 
-    monkeypatch.setattr(forms_api, "get_version", _fake_get_version)
-    monkeypatch.setattr(forms_api, "generate_ewyp_pdf", lambda _form: b"pdf-bytes")
+    monkeypatch.setattr(forms_api, "version_pdf_key", _fake_key)
+    monkeypatch.setattr(forms_api, "get_version_pdf", _fake_get_version_pdf)
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
@@ -226,5 +339,102 @@ async def test_get_pdf(monkeypatch, stub_current_session):
     assert resp.status_code == 200
     assert resp.content == b"pdf-bytes"
     assert resp.headers["content-type"] == "application/pdf"
+    assert resp.headers["etag"] == '"content-key"'
+    assert "immutable" in resp.headers["cache-control"]
+
+
+@pytest.mark.asyncio
+async def test_get_pdf_not_modified(monkeypatch, stub_current_session):
+    async def _must_not_render(*_args):
+        raise AssertionError("304 must not load or render the PDF")
 
+    async def _known_key(_db, _session_id, _version, template):
+        assert template == "notification"
+        return "static-notification"
+
+    monkeypatch.setattr(forms_api, "version_pdf_key", _known_key)
+    monkeypatch.setattr(forms_api, "get_version_pdf", _must_not_render)
+    etag = forms_api.pdf_etag("static-notification")
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(
+            f"/api/sessions/{stub_current_session.id}/forms/1/pdf-notification",
+            headers={"If-None-Match": f'W/"other", {etag}'},
+        )
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
+    assert resp.content == b""
+
+
+@pytest.mark.asyncio
+async def test_get_pdf_missing_version(monkeypatch, stub_current_session):
+    async def _missing(*_args):
+        return None
+
+    monkeypatch.setattr(forms_api, "version_pdf_key", _missing)
+    monkeypatch.setattr(forms_api, "get_version_pdf", _missing)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(f"/api/sessions/{stub_current_session.id}/forms/9/pdf")
+    assert resp.status_code == 404
 
+
+@pytest.mark.asyncio
+async def test_export_session_pdfs(monkeypatch, stub_current_session):
+    from app.api import exports as exports_api
+
+    captured = {}
+
+    async def _fake_targets(_db, _limit, session_ids=None, versions=None, **_filters):
+        captured["versions"] = versions
+        return [(session_ids[0], 1), (session_ids[0], 2)]
+
+    async def _fake_stream(targets, templates):
+        captured["templates"] = templates
+        yield b"PK"
+
+    monkeypatch.setattr(exports_api, "list_export_targets", _fake_targets)
+    monkeypatch.setattr(exports_api, "stream_pdf_zip", _fake_stream)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(
+            f"/api/sessions/{stub_current_session.id}/pdf-export",
+            params=[("template", "ewyp"), ("template", "notification"), ("version", 2)],
+        )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/zip"
+    assert resp.content == b"PK"
+    assert captured == {"versions": [2], "templates": ["ewyp", "notification"]}
+
+
+@pytest.mark.asyncio
+async def test_bulk_export_requires_key(monkeypatch):
+    from app.api import exports as exports_api
+
+    monkeypatch.setattr(exports_api.settings, "pdf_export_api_key", "secret")
+    body = {"created_from": "2025-01-01T00:00:00Z"}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post("/api/exports/pdf", json=body, headers={"X-Export-Key": "wrong"})
+        no_filter = await client.post("/api/exports/pdf", json={}, headers={"X-Export-Key": "secret"})
+    assert resp.status_code == 403
+    assert no_filter.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ready_reports_warmup(monkeypatch):
+    from app.core.warmup import warmup_state
+
+    monkeypatch.setattr(warmup_state, "ready", False)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        warming = await client.get("/ready")
+        monkeypatch.setattr(warmup_state, "ready", True)
+        ready = await client.get("/ready")
+    assert warming.status_code == 503
+    assert warming.json()["status"] == "warming_up"
+    assert ready.status_code == 200
@@ -0,0 +1,65 @@
+"""Routing odczytów na dwóch lokalnych instancjach Postgresa udających primary i replikę.
+
+Uruchom z TEST_PRIMARY_URL i TEST_REPLICA_URL (postgresql+asyncpg://...).
+"""
+
+import os
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import session as db_session
+
+PRIMARY_URL = os.getenv("TEST_PRIMARY_URL")
+REPLICA_URL = os.getenv("TEST_REPLICA_URL")
+
+pytestmark = pytest.mark.skipif(
+    not (PRIMARY_URL and REPLICA_URL), reason="Set TEST_PRIMARY_URL and TEST_REPLICA_URL."
+)
+
+
+@pytest_asyncio.fixture
+async def two_instances(monkeypatch):
+    primary = create_async_engine(PRIMARY_URL)
+    replica = create_async_engine(REPLICA_URL)
+    router = db_session.ReplicaRouter(max_lag_seconds=5, check_interval_seconds=5)
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", async_sessionmaker(primary))
+    monkeypatch.setattr(db_session, "ReplicaSessionLocal", async_sessionmaker(replica))
+    monkeypatch.setattr(db_session, "replica_engine", replica)
+    monkeypatch.setattr(db_session, "replica_router", router)
+    try:
+        yield router
+    finally:
+        await primary.dispose()
+        await replica.dispose()
+
+
+async def _served_by(session_id: uuid.UUID) -> int:
+    gen = db_session.get_read_session(session_id)
+    db = await gen.__anext__()
+    try:
+        return int((await db.execute(text("SHOW port"))).scalar_one())
+    finally:
+        await gen.aclose()
+
+
+@pytest.mark.asyncio
+async def test_reads_follow_replica_health(two_instances):
+    router = two_instances
+    session_id = uuid.uuid4()
+    primary_port = await _served_by(session_id)  # brak pomiaru -> primary
+
+    await db_session.check_replica()
+    assert router.healthy
+    replica_port = await _served_by(session_id)
+    assert replica_port != primary_port
+
+    router.mark_write(session_id)
+    assert await _served_by(session_id) == primary_port
+    assert await _served_by(uuid.uuid4()) == replica_port
+
+    router.record_lag(router.max_lag_seconds + 1)
+    assert await _served_by(uuid.uuid4()) == primary_port
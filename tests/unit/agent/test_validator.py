@@ -1,10 +1,13 @@
+import asyncio
 import json
 from pathlib import Path
 
 import pytest
+from prometheus_client import REGISTRY
 
 from app.agent.config_loader import ConfigLoader
-from app.agent.validator import AgentResult, run_validation_agent
+from app.agent.validator import AgentResult, run_deterministic_validation, run_validation_agent
+from app.core.config import settings
 
 
 class _FakeLLMResponse:
@@ -144,3 +147,28 @@ async def test_agent_valid3_other_forced_objection(monkeypatch):
     assert "not a supported" in result.justification.lower()
 
 
+def test_deterministic_validation_defers_llm_fields():
+    assert run_deterministic_validation("text_detailed", "Upadek ze schodów w magazynie") is None
+    assert run_deterministic_validation("pesel_strict", "123").status == "objection"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_llm_call_is_recorded(monkeypatch):
+    started = asyncio.Event()
+
+    class _HangingLLM:
+        async def ainvoke(self, _messages):
+            started.set()
+            await asyncio.sleep(10)
+
+    monkeypatch.setattr("app.agent.validator.get_llm", lambda: _HangingLLM())
+    labels = {"field_type": "text_detailed", "model": settings.openrouter_model, "outcome": "cancelled"}
+    before = REGISTRY.get_sample_value("llm_request_duration_seconds_count", labels) or 0.0
+
+    task = asyncio.create_task(run_validation_agent("text_detailed", "Upadek ze schodów w magazynie"))
+    await started.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert REGISTRY.get_sample_value("llm_request_duration_seconds_count", labels) == before + 1
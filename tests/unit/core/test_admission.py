@@ -0,0 +1,73 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.core.admission import AdmissionMiddleware, admission, loop_lag, route_class
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(admission, "limits", {"validation": 1, "pdf": 1})
+    monkeypatch.setattr(admission, "max_lag_seconds", 0.25)
+    monkeypatch.setattr(loop_lag, "lag_seconds", 0.0)
+
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware)
+
+    @app.get("/health")
+    async def health() -> dict[str, str]:
+        return {"status": "ok"}
+
+    @app.get("/api/forms/{form_id}")
+    async def read(form_id: str) -> dict[str, str]:
+        return {"id": form_id}
+
+    @app.post("/api/forms/{form_id}/validate")
+    async def validate(form_id: str) -> dict[str, str]:
+        return {"id": form_id}
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+def test_route_class():
+    assert route_class("GET", "/health") is None
+    assert route_class("GET", "/api/forms/1/pdf") == "pdf"
+    assert route_class("POST", "/api/exports/pdf") == "pdf"
+    assert route_class("POST", "/api/forms/1/validate") == "validation"
+    assert route_class("GET", "/api/forms/1") == "read"
+    assert route_class("PATCH", "/api/forms/1") == "other"
+
+
+@pytest.mark.asyncio
+async def test_rejects_when_class_is_at_in_flight_limit(client, monkeypatch):
+    monkeypatch.setitem(admission.in_flight, "validation", 1)
+    async with client:
+        rejected = await client.post("/api/forms/1/validate")
+        read = await client.get("/api/forms/1")
+
+    assert rejected.status_code == 503
+    assert rejected.headers["retry-after"] == "5"
+    assert read.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_rejects_expensive_routes_on_loop_lag_but_not_health(client, monkeypatch):
+    monkeypatch.setattr(loop_lag, "lag_seconds", 1.0)
+    async with client:
+        rejected = await client.post("/api/forms/1/validate")
+        health = await client.get("/health")
+        read = await client.get("/api/forms/1")
+
+    assert rejected.status_code == 503
+    assert health.status_code == 200
+    assert read.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_in_flight_counter_is_released(client):
+    async with client:
+        first = await client.post("/api/forms/1/validate")
+        second = await client.post("/api/forms/1/validate")
+
+    assert first.status_code == second.status_code == 200
+    assert admission.in_flight["validation"] == 0
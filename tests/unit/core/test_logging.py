@@ -0,0 +1,85 @@
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+from app.core.logging import PAYLOAD, DroppingQueueHandler, JsonFormatter, PayloadSampler
+
+
+def _record(msg="LLM payload: %s", args=("x",), **extra):
+    record = logging.makeLogRecord({"name": "app", "levelno": logging.DEBUG, "levelname": "DEBUG", "msg": msg})
+    record.args = args
+    record.__dict__.update(extra)
+    return record
+
+
+def test_sampler_passes_ordinary_records_untouched():
+    sampler = PayloadSampler(sample_rate=0.0, per_second=0, max_chars=3)
+    record = _record(args=("abcdef",))
+    assert sampler.filter(record)
+    assert record.args == ("abcdef",)
+
+
+def test_sampler_truncates_and_rate_limits_payloads():
+    sampler = PayloadSampler(sample_rate=1.0, per_second=2, max_chars=5)
+    passed = [sampler.filter(_record(args=("a" * 20,), **PAYLOAD)) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+
+    sampler._tokens = 1
+    record = _record(args=("a" * 20,), **PAYLOAD)
+    assert sampler.filter(record)
+    assert record.args == ("aaaaa... [+15 chars]",)
+    assert record.payloads_suppressed == 3
+
+
+def test_sampler_drops_unsampled_payloads():
+    sampler = PayloadSampler(sample_rate=0.0, per_second=100, max_chars=100)
+    assert not sampler.filter(_record(**PAYLOAD))
+    assert sampler.suppressed == 1
+
+
+def test_json_formatter_includes_extras():
+    record = _record(msg="Validation result field=%s", args=("pesel",), request_id="r1")
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "Validation result field=pesel"
+    assert data["level"] == "DEBUG"
+    assert data["request_id"] == "r1"
+    assert data["ts"].endswith("+00:00")
+
+
+def test_full_queue_drops_instead_of_blocking_and_reports_count():
+    log_queue = queue.Queue(maxsize=1)
+    handler = DroppingQueueHandler(log_queue)
+    for _ in range(3):
+        handler.handle(_record(msg="m", args=()))
+    assert handler.dropped == 2
+
+    log_queue.get_nowait()
+    handler.handle(_record(msg="next", args=()))
+    assert log_queue.get_nowait().getMessage() == "next"
+    assert handler.dropped == 2  # ogłoszenie nie zmieściło się w kolejce - licznik zachowany
+
+
+def test_logging_does_not_wait_for_slow_handler():
+    release = threading.Event()
+
+    class SlowHandler(logging.Handler):
+        def emit(self, record):
+            release.wait(5)
+
+    log_queue = queue.Queue(maxsize=100)
+    listener = logging.handlers.QueueListener(log_queue, SlowHandler())
+    listener.start()
+    logger = logging.getLogger("test.nonblocking")
+    logger.propagate = False
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    try:
+        started = time.perf_counter()
+        for i in range(50):
+            logger.warning("record %s", i)
+        assert time.perf_counter() - started < 0.5
+    finally:
+        release.set()
+        listener.stop()
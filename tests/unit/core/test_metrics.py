@@ -0,0 +1,50 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_metrics_use_route_template_and_expose_saturation():
+    labels = {"method": "GET", "route": "/health", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.get("/health")
+        await client.get("/does-not-exist")
+        resp = await client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+    assert _sample("http_request_duration_seconds_count", method="GET", route="unmatched", status="404") >= 1
+    body = resp.text
+    assert "pdf_render_in_flight" in body
+    assert "pdf_render_capacity" in body
+    assert "db_pool_connections" in body
+
+
+@pytest.mark.asyncio
+async def test_validator_counts_decision_path():
+    from app.agent.validator import run_validation_agent
+
+    labels = {"field_type": "unsupported", "path": "deterministic", "status": "objection"}
+    before = _sample("validation_decisions_total", **labels)
+    result = await run_validation_agent("no_such_field", "abc")
+    assert result.status == "objection"
+    assert _sample("validation_decisions_total", **labels) == before + 1
+    # Dowolny tekst z żądania nie tworzy nowej serii.
+    unknown = {**labels, "field_type": "no_such_field"}
+    assert REGISTRY.get_sample_value("validation_decisions_total", unknown) is None
+
+
+def test_field_type_label_limited_to_configured_fields():
+    from app.core.metrics import field_type_label
+
+    assert field_type_label("pesel_strict") == "pesel_strict"
+    assert field_type_label("x" * 40) == "unsupported"
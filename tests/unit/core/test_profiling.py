@@ -0,0 +1,73 @@
+import pstats
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.profiles import router
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, list_profiles
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "profiling_key", "secret")
+    monkeypatch.setattr(settings, "profiling_sample_rate", 0.0)
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "profiling_max_files", 2)
+
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(router, prefix="/api")
+
+    @app.get("/work")
+    async def work() -> dict[str, int]:
+        return {"total": sum(range(1000))}
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_only_requests_with_key_are_profiled(client):
+    async with client:
+        plain = await client.get("/work")
+        wrong = await client.get("/work", headers={"X-Profile-Key": "nope"})
+        profiled = await client.get("/work", headers={"X-Profile-Key": "secret"})
+
+    assert "x-profile-id" not in plain.headers
+    assert "x-profile-id" not in wrong.headers
+    name = profiled.headers["x-profile-id"]
+    (path,) = list_profiles()
+    assert path.name == name
+    functions = {func for _, _, func in pstats.Stats(str(path)).stats}
+    assert "work" in functions
+
+
+@pytest.mark.asyncio
+async def test_profiles_are_listed_downloaded_and_pruned(client):
+    async with client:
+        for _ in range(3):
+            await client.get("/work", headers={"X-Profile-Key": "secret"})
+        forbidden = await client.get("/api/debug/profiles")
+        listed = await client.get("/api/debug/profiles", headers={"X-Profile-Key": "secret"})
+        name = listed.json()[0]["name"]
+        download = await client.get(f"/api/debug/profiles/{name}", headers={"X-Profile-Key": "secret"})
+        traversal = await client.get("/api/debug/profiles/..%2F.env", headers={"X-Profile-Key": "secret"})
+        relisted = await client.get("/api/debug/profiles", headers={"X-Profile-Key": "secret"})
+
+    assert forbidden.status_code == 403
+    assert len(listed.json()) == 2
+    assert download.status_code == 200
+    assert download.content
+    assert "x-profile-id" not in download.headers
+    assert traversal.status_code == 404
+    # Lista i pobrania nie tworzą nowych profili, więc pobierany plik nie wypada z limitu.
+    assert relisted.json() == listed.json()
+
+
+@pytest.mark.asyncio
+async def test_sampling_profiles_without_key(client, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_sample_rate", 1.0)
+    async with client:
+        resp = await client.get("/work")
+    assert "x-profile-id" in resp.headers
@@ -0,0 +1,45 @@
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.read_your_writes import ReadYourWritesMiddleware
+from app.db.session import ReplicaRouter, request_write_marker
+
+
+def _app(router):
+    async def write(_request):
+        router.mark_write(uuid.uuid4())
+        return JSONResponse({})
+
+    async def read(_request):
+        return JSONResponse({"replica": router.use_replica(uuid.uuid4())})
+
+    app = Starlette(routes=[Route("/write", write, methods=["POST"]), Route("/read", read)])
+    return ReadYourWritesMiddleware(app)
+
+
+@pytest.mark.asyncio
+async def test_write_marker_round_trips_through_client():
+    # Dwa routery = dwa workery: zapis na jednym, odczyt na drugim.
+    writer, reader = ReplicaRouter(2, 3), ReplicaRouter(2, 3)
+    reader.record_lag(0.0)
+
+    async with AsyncClient(transport=ASGITransport(app=_app(writer)), base_url="http://test") as client:
+        written = await client.post("/write")
+        plain = await client.get("/read")
+    marker = written.headers["x-last-write"]
+    assert "x-last-write" not in plain.headers
+
+    async with AsyncClient(transport=ASGITransport(app=_app(reader)), base_url="http://test") as client:
+        after_write = await client.get("/read", headers={"X-Last-Write": marker})
+        fresh_client = await client.get("/read")
+        garbage = await client.get("/read", headers={"X-Last-Write": "soon"})
+
+    assert after_write.json() == {"replica": False}
+    assert fresh_client.json() == {"replica": True}
+    assert garbage.json() == {"replica": True}
+    assert request_write_marker.get() is None
@@ -0,0 +1,17 @@
+import json
+from datetime import datetime, timezone
+
+from app.core.responses import OrjsonResponse, raw_json
+
+
+def test_raw_json_is_embedded_verbatim():
+    payload_json = '{"b": 1, "a": {"ąę": [true, null]}}'
+    body = OrjsonResponse({"payload": raw_json(payload_json)}).body
+    assert body == b'{"payload":' + payload_json.encode("utf-8") + b"}"
+    assert json.loads(body)["payload"]["a"]["ąę"] == [True, None]
+
+
+def test_utc_datetimes_match_pydantic_format():
+    created_at = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    body = OrjsonResponse({"created_at": created_at}).body
+    assert json.loads(body)["created_at"] == "2025-01-02T03:04:05Z"
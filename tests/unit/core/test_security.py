@@ -0,0 +1,116 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import settings
+
+
+@pytest.fixture(autouse=True)
+def signed_mode(monkeypatch):
+    monkeypatch.setattr(settings, "session_token_mode", "signed")
+    monkeypatch.setattr(settings, "session_signing_keys", "k2:new-secret,k1:old-secret")
+    monkeypatch.setattr(security, "session_denylist", security.SessionDenylist())
+    yield
+
+
+def _issue(session_id, hours=1, form_type="EWYP"):
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=hours)
+    token, _hash = security.issue_session_token(session_id, form_type, expires_at)
+    return token
+
+
+@pytest.mark.asyncio
+async def test_signed_token_verified_without_db():
+    session_id = uuid.uuid4()
+    token = _issue(session_id, form_type="EWYP")
+
+    # db=None: każda próba zapytania do bazy zakończyłaby się błędem
+    session = await security.get_current_session(session_id, f"Bearer {token}", None)
+    assert session.id == session_id
+    assert session.form_type == "EWYP"
+    assert session.status == "open"
+
+
+@pytest.mark.asyncio
+async def test_signed_token_other_session_rejected():
+    token = _issue(uuid.uuid4())
+    with pytest.raises(HTTPException) as exc:
+        await security.get_current_session(uuid.uuid4(), f"Bearer {token}", None)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_signed_token_expired():
+    session_id = uuid.uuid4()
+    token = _issue(session_id, hours=-1)
+    with pytest.raises(HTTPException) as exc:
+        await security.get_current_session(session_id, f"Bearer {token}", None)
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "Token expired"
+
+
+@pytest.mark.asyncio
+async def test_signed_token_tampered():
+    session_id = uuid.uuid4()
+    token = _issue(session_id)
+    header, payload, signature = token.split(".")
+    tampered = ".".join([header, payload, signature[::-1]])
+    with pytest.raises(HTTPException) as exc:
+        await security.get_current_session(session_id, f"Bearer {tampered}", None)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_key_rotation(monkeypatch):
+    session_id = uuid.uuid4()
+    monkeypatch.setattr(settings, "session_signing_keys", "k1:old-secret")
+    old_token = _issue(session_id)
+
+    # Nowy klucz podpisuje, stary nadal weryfikuje
+    monkeypatch.setattr(settings, "session_signing_keys", "k2:new-secret,k1:old-secret")
+    session = await security.get_current_session(session_id, f"Bearer {old_token}", None)
+    assert session.id == session_id
+
+    # Po wycofaniu starego klucza jego tokeny przestają działać
+    monkeypatch.setattr(settings, "session_signing_keys", "k2:new-secret")
+    with pytest.raises(HTTPException) as exc:
+        await security.get_current_session(session_id, f"Bearer {old_token}", None)
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_denylisted_session_rejected():
+    session_id = uuid.uuid4()
+    token = _issue(session_id)
+    security.session_denylist.add(session_id, datetime.now(timezone.utc) + timedelta(hours=1))
+    with pytest.raises(HTTPException) as exc:
+        await security.get_current_session(session_id, f"Bearer {token}", None)
+    assert exc.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_refreshed_token_revokes_previous_generation():
+    session_id = uuid.uuid4()
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    old_token, _hash = security.issue_session_token(session_id, "EWYP", expires_at)
+    new_token, _hash = security.issue_session_token(session_id, "EWYP", expires_at, generation=1)
+    security.session_denylist.revoke_before(session_id, 1, expires_at)
+
+    with pytest.raises(HTTPException) as exc:
+        await security.get_current_session(session_id, f"Bearer {old_token}", None)
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "Token revoked"
+    session = await security.get_current_session(session_id, f"Bearer {new_token}", None)
+    assert session.id == session_id
+
+
+def test_signed_mode_without_keys_fails_at_startup(monkeypatch):
+    monkeypatch.setattr(settings, "session_signing_keys", "")
+    with pytest.raises(RuntimeError):
+        security.check_signing_config()
+
+    monkeypatch.setattr(settings, "session_token_mode", "opaque")
+    security.check_signing_config()
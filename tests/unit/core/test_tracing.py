@@ -0,0 +1,68 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from app.core import tracing
+from app.core.tracing import inject_carrier, span_from_carrier, tracer
+
+
+@pytest.fixture(autouse=True)
+def spans(monkeypatch):
+    """Provider tylko na czas testu - trace.set_tracer_provider działa raz na proces
+    i zostawiłby globalny stan dla reszty zestawu testów."""
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    monkeypatch.setattr(trace, "_TRACER_PROVIDER", provider)
+    # ProxyTracer zapamiętuje pierwszy prawdziwy tracer - czyścimy go w obie strony.
+    monkeypatch.setattr(tracing.tracer, "_real_tracer", None)
+    yield exporter
+    provider.shutdown()
+
+
+def _by_name(exporter, name):
+    return [span for span in exporter.get_finished_spans() if span.name == name]
+
+
+def test_carrier_links_span_in_other_process(spans):
+    with tracer.start_as_current_span("parent") as parent:
+        carrier = inject_carrier()
+    # Poza spanem rodzica - jak w workerze puli PDF.
+    with span_from_carrier("child", carrier, {"pdf.template": "ewyp"}):
+        pass
+
+    (child,) = _by_name(spans, "child")
+    assert child.context.trace_id == parent.get_span_context().trace_id
+    assert child.parent.span_id == parent.get_span_context().span_id
+    assert child.attributes["pdf.template"] == "ewyp"
+
+
+@pytest.mark.asyncio
+async def test_request_span_named_by_route_template(spans):
+    from app.main import app
+
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/health", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+
+    assert resp.status_code == 200
+    (span,) = _by_name(spans, "GET /health")
+    assert span.kind == trace.SpanKind.SERVER
+    assert span.attributes["http.route"] == "/health"
+    assert format(span.context.trace_id, "032x") == trace_id
+
+
+@pytest.mark.asyncio
+async def test_validator_span_records_decision_path(spans):
+    from app.agent.validator import run_validation_agent
+
+    await run_validation_agent("no_such_field", "abc")
+
+    (span,) = _by_name(spans, "validator.run")
+    assert span.attributes["validation.field_type"] == "no_such_field"
+    assert span.attributes["validation.path"] == "deterministic"
+    assert span.attributes["validation.status"] == "objection"
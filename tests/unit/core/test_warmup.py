@@ -0,0 +1,51 @@
+import pytest
+
+from app.core import llm, warmup
+from app.core.warmup import WarmupState, run_warmup
+
+
+@pytest.mark.asyncio
+async def test_warmup_times_steps_and_survives_failures(monkeypatch):
+    calls = []
+
+    async def _ok():
+        calls.append("ok")
+
+    async def _broken():
+        raise RuntimeError("no route to host")
+
+    state = WarmupState()
+    monkeypatch.setattr(warmup, "warmup_state", state)
+    monkeypatch.setattr(warmup, "WARMUP_STEPS", {"db_pool": _ok, "llm": _broken, "pdf": _ok})
+
+    await run_warmup()
+
+    assert state.ready
+    assert calls == ["ok", "ok"]
+    assert set(state.steps) == {"db_pool", "llm", "pdf"}
+    assert state.errors == {"llm": "no route to host"}
+
+
+@pytest.mark.asyncio
+async def test_llm_warmup_uses_public_client_api(monkeypatch):
+    calls = []
+
+    class _Models:
+        async def list(self):
+            calls.append("models.list")
+
+    class _Client:
+        models = _Models()
+
+        def with_options(self, **options):
+            calls.append(options)
+            return self
+
+    class _Llm:
+        root_async_client = _Client()
+
+    monkeypatch.setattr(llm, "get_llm", lambda: _Llm())
+
+    await llm.warm_up_llm(timeout=5)
+
+    assert calls == [{"timeout": 5, "max_retries": 0}, "models.list"]
@@ -0,0 +1,139 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.db import partitions
+from app.db.partitions import (
+    DEFAULT_PARTITION,
+    day_bounds,
+    expired_partitions,
+    partition_day,
+    partition_name,
+    retention_cutoff,
+    rollup_lookback_hours,
+    rollup_window,
+)
+
+
+class _Result:
+    def __init__(self, rows=(), rowcount=0):
+        self._rows = list(rows)
+        self.rowcount = rowcount
+
+    def first(self):
+        return self._rows[0] if self._rows else None
+
+    def scalar(self):
+        return self._rows[0][0] if self._rows else None
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class _RecordingConn:
+    """Zapisuje wykonane SQL; partycje istniejące i "zabłąkane" wiersze w DEFAULT podaje test."""
+
+    def __init__(self, existing=(), stray=False):
+        self.existing = list(existing)
+        self.stray = stray
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "pg_inherits" in sql:
+            return _Result([(name,) for name in self.existing])
+        if sql.startswith("SELECT 1 FROM"):
+            return _Result([(1,)] if self.stray else [])
+        if sql.startswith("SELECT max(bucket)"):
+            return _Result([(None,)])
+        return _Result(rowcount=2)
+
+
+def test_partition_name_roundtrip():
+    day = date(2026, 3, 7)
+    assert partition_name(day) == "validation_logs_20260307"
+    assert partition_day(partition_name(day)) == day
+
+
+def test_partition_day_ignores_foreign_names():
+    assert partition_day(DEFAULT_PARTITION) is None
+    assert partition_day("validation_log_rollups") is None
+    assert partition_day("validation_logs_2026") is None
+
+
+def test_expired_partitions_respects_retention():
+    names = [
+        partition_name(date(2026, 1, 1)),
+        partition_name(date(2026, 1, 9)),
+        partition_name(date(2026, 1, 10)),
+        partition_name(date(2026, 1, 11)),
+        DEFAULT_PARTITION,
+    ]
+    # retencja 10 dni liczona od 2026-01-20: usuwamy tylko dni < 2026-01-10
+    assert expired_partitions(names, date(2026, 1, 20), 10) == [
+        "validation_logs_20260101",
+        "validation_logs_20260109",
+    ]
+
+
+def test_day_bounds_and_retention_cutoff():
+    assert day_bounds(date(2026, 1, 31)) == ("2026-01-31 00:00:00+00", "2026-02-01 00:00:00+00")
+    assert retention_cutoff(date(2026, 1, 20), 10) == date(2026, 1, 10)
+
+
+@pytest.mark.asyncio
+async def test_partition_created_directly_when_default_has_no_rows_for_day():
+    conn = _RecordingConn(existing=[DEFAULT_PARTITION])
+    created = await partitions.ensure_partitions(conn, date(2026, 3, 7), 0)
+
+    assert created == ["validation_logs_20260307"]
+    assert "PARTITION OF validation_logs FOR VALUES" in conn.statements[-1]
+    assert not any("ATTACH" in sql for sql in conn.statements)
+
+
+@pytest.mark.asyncio
+async def test_rows_in_default_are_moved_before_attaching_partition():
+    conn = _RecordingConn(existing=[DEFAULT_PARTITION], stray=True)
+    await partitions.ensure_partitions(conn, date(2026, 3, 7), 0)
+
+    lock, create, move, attach = conn.statements[-4:]
+    assert lock.startswith(f"LOCK TABLE {DEFAULT_PARTITION}")
+    assert create.startswith("CREATE TABLE validation_logs_20260307 (LIKE validation_logs")
+    assert f"DELETE FROM {DEFAULT_PARTITION}" in move and "INSERT INTO validation_logs_20260307" in move
+    assert attach.startswith("ALTER TABLE validation_logs ATTACH PARTITION validation_logs_20260307")
+
+
+@pytest.mark.asyncio
+async def test_default_partition_pruned_by_retention():
+    conn = _RecordingConn()
+    assert await partitions.prune_default(conn, date(2026, 1, 20), 10) == 2
+    assert conn.statements == [
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at < CAST(:cutoff AS timestamptz)"
+    ]
+
+
+def test_rollup_window_covers_closed_hours_and_catches_up():
+    now = datetime(2026, 3, 7, 12, 40, tzinfo=timezone.utc)
+    hour = datetime(2026, 3, 7, 12, tzinfo=timezone.utc)
+
+    # Bieżąca, niezamknięta godzina nigdy nie trafia do agregatu.
+    assert rollup_window(now, hour - timedelta(hours=1), 3, 90) == (hour - timedelta(hours=3), hour)
+    # Przerwa w maintenance: od godziny po ostatnim agregacie.
+    last = hour - timedelta(hours=10)
+    assert rollup_window(now, last, 3, 90) == (last + timedelta(hours=1), hour)
+    # Pusty agregat: całe okno retencji.
+    assert rollup_window(now, None, 3, 90) == (hour - timedelta(days=90), hour)
+    assert rollup_lookback_hours(1800) == 2
+
+
+@pytest.mark.asyncio
+async def test_rollups_built_with_one_grouped_insert():
+    conn = _RecordingConn()
+    await partitions.build_rollups(conn, datetime(2026, 3, 7, 12, 40, tzinfo=timezone.utc))
+
+    insert = conn.statements[-1]
+    assert insert.startswith("INSERT INTO validation_log_rollups")
+    assert "GROUP BY 1, 2, 3" in insert
+    assert "status <> 'pending'" in insert
+    assert "DO UPDATE SET count = EXCLUDED.count" in insert
@@ -0,0 +1,51 @@
+import uuid
+
+from app.db import session as db_session
+from app.db.session import ReplicaRouter
+
+
+def test_unhealthy_until_first_measurement():
+    router = ReplicaRouter(max_lag_seconds=5, check_interval_seconds=5)
+    assert router.use_replica(uuid.uuid4()) is False
+
+
+def test_lag_above_limit_falls_back_to_primary():
+    router = ReplicaRouter(max_lag_seconds=5, check_interval_seconds=5)
+    router.record_lag(0.2)
+    assert router.use_replica(uuid.uuid4()) is True
+    router.record_lag(12.0)
+    assert router.use_replica(uuid.uuid4()) is False
+    router.record_lag(None)
+    assert router.use_replica(uuid.uuid4()) is False
+
+
+def test_read_your_writes(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(db_session.time, "monotonic", lambda: clock[0])
+    router = ReplicaRouter(max_lag_seconds=2, check_interval_seconds=3)
+    router.record_lag(0.0)
+    writer, other = uuid.uuid4(), uuid.uuid4()
+
+    router.mark_write(writer)
+    assert router.use_replica(writer) is False
+    assert router.use_replica(other) is True
+
+    clock[0] += router.read_your_writes_seconds + 0.1
+    assert router.use_replica(writer) is True
+
+
+def test_client_last_write_from_other_worker_keeps_reads_on_primary(monkeypatch):
+    clock = [5000.0]
+    monkeypatch.setattr(db_session.time, "time", lambda: clock[0])
+    router = ReplicaRouter(max_lag_seconds=2, check_interval_seconds=3)
+    router.record_lag(0.0)
+    session_id = uuid.uuid4()
+
+    # Ten proces nie widział zapisu - zna go tylko klient (X-Last-Write).
+    token = db_session.request_write_marker.set(db_session.WriteMarker(client_last_write=clock[0] - 1))
+    try:
+        assert router.use_replica(session_id) is False
+        clock[0] += router.read_your_writes_seconds
+        assert router.use_replica(session_id) is True
+    finally:
+        db_session.request_write_marker.reset(token)
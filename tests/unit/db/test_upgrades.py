@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.db import upgrades
+from app.db.upgrades import SchemaUpgradeError, partition_validation_logs
+
+
+class _Result:
+    def __init__(self, rowcount=0):
+        self.rowcount = rowcount
+
+
+class _RecordingConn:
+    """Odpowiedzi katalogu podaje test; reszta SQL jest tylko zapisywana."""
+
+    def __init__(self, relkind, oldest=None):
+        self.relkind = relkind
+        self.oldest = oldest
+        self.statements = []
+        self.created_tables = []
+
+    async def scalar(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "relkind" in sql:
+            return self.relkind
+        if "pg_constraint" in sql:
+            return "validation_logs_pkey"
+        if "min(created_at)" in sql:
+            return self.oldest
+        return None
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return _Result(rowcount=5)
+
+    async def run_sync(self, fn):
+        self.created_tables.append(fn.__self__.name)
+
+
+@pytest.mark.asyncio
+async def test_partitioned_table_left_alone():
+    conn = _RecordingConn("p")
+    await partition_validation_logs(conn)
+    assert len(conn.statements) == 1
+    assert conn.created_tables == []
+
+
+@pytest.mark.asyncio
+async def test_unexpected_relation_fails_without_retry():
+    with pytest.raises(SchemaUpgradeError):
+        await partition_validation_logs(_RecordingConn("v"))
+
+
+@pytest.mark.asyncio
+async def test_plain_table_migrated_into_day_partitions(monkeypatch):
+    ensured = []
+
+    async def _ensure(_conn, first_day, days_ahead):
+        ensured.append((first_day, days_ahead))
+        return []
+
+    monkeypatch.setattr(upgrades, "ensure_partitions", _ensure)
+    monkeypatch.setattr(upgrades.settings, "validation_log_partitions_ahead", 3)
+    oldest = datetime.now(timezone.utc) - timedelta(days=2)
+    conn = _RecordingConn("r", oldest=oldest)
+
+    await partition_validation_logs(conn)
+
+    executed = [sql for sql in conn.statements if not sql.startswith("SELECT")]
+    assert executed[0].startswith("LOCK TABLE validation_logs")
+    assert executed[1] == "ALTER TABLE validation_logs RENAME TO validation_logs_legacy"
+    assert 'RENAME CONSTRAINT "validation_logs_pkey" TO validation_logs_legacy_pkey' in executed[2]
+    assert conn.created_tables == ["validation_logs"]
+    # Partycje od najstarszego dnia w oknie retencji do dziś + zapas.
+    assert ensured == [(oldest.date(), 2 + 3)]
+    assert executed[-2].startswith("INSERT INTO validation_logs (id,")
+    assert executed[-1] == "DROP TABLE validation_logs_legacy"
+
+
+@pytest.mark.asyncio
+async def test_wait_for_db_does_not_retry_schema_errors():
+    from app.main import _wait_for_db
+
+    calls = []
+
+    async def _connect():
+        calls.append(1)
+        raise SchemaUpgradeError("validation_logs is not a table")
+
+    with pytest.raises(SchemaUpgradeError):
+        await _wait_for_db(_connect, attempts=3, delay=0)
+    assert calls == [1]
@@ -0,0 +1,31 @@
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.form_service import _next_version
+
+
+class _CapturingDb:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+        class _Result:
+            def scalar_one(self):
+                return 4
+
+        return _Result()
+
+
+@pytest.mark.asyncio
+async def test_next_version_never_goes_below_existing_versions():
+    db = _CapturingDb()
+    assert await _next_version(db, uuid.uuid4()) == 4
+
+    (statement,) = db.statements
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    # Licznik = 0 przy istniejących wersjach (baza sprzed kolumny) nie może dać kolizji numerów.
+    assert "greatest(form_sessions.version_count, (SELECT coalesce(max(form_versions.version)" in sql
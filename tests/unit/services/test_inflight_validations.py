@@ -0,0 +1,72 @@
+import asyncio
+import uuid
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.agent.validator import AgentResult
+from app.services.inflight_validations import InflightValidations, ValidationSuperseded
+
+
+def _superseded(field_type: str) -> float:
+    return REGISTRY.get_sample_value("validations_superseded_total", {"field_type": field_type}) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_newer_validation_cancels_older_in_flight():
+    registry = InflightValidations()
+    key = (uuid.uuid4(), "accident_info.detailed_description")
+    started = asyncio.Event()
+    cancelled = []
+
+    async def _slow():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return AgentResult(status="success", justification="stale")
+
+    async def _fast():
+        return AgentResult(status="success", justification="fresh")
+
+    before = _superseded("text_detailed")
+    older = asyncio.create_task(registry.run(key, "text_detailed", _slow()))
+    await started.wait()
+    newer = await registry.run(key, "text_detailed", _fast())
+
+    with pytest.raises(ValidationSuperseded):
+        await older
+    assert newer.justification == "fresh"
+    assert cancelled == [True]
+    assert _superseded("text_detailed") == before + 1
+    assert len(registry) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelling_caller_cancels_validation_without_counting_it():
+    registry = InflightValidations()
+    key = (uuid.uuid4(), "accident_info.detailed_description")
+    started = asyncio.Event()
+    cancelled = []
+
+    async def _slow():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return AgentResult(status="success", justification="")
+
+    before = _superseded("text_detailed")
+    caller = asyncio.create_task(registry.run(key, "text_detailed", _slow()))
+    await started.wait()
+    caller.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+    assert cancelled == [True]
+    assert _superseded("text_detailed") == before
+    assert not registry.cancel(key)
@@ -0,0 +1,123 @@
+import io
+import uuid
+import zipfile
+
+import pytest
+
+from app.services import pdf_bulk
+from app.services.pdf_cache import VersionKeyIndex, pdf_cache_key
+from app.services.pdf_pool import PdfQueueFullError
+
+
+class _NullSession:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *_args):
+        return None
+
+
+@pytest.fixture
+def bulk_env(monkeypatch):
+    state = {"cache": {}, "renders": [], "payload_loads": 0, "queue_full": 0}
+
+    async def _lookup(key, _template):
+        return state["cache"].get(key)
+
+    async def _store(key, _template, data):
+        state["cache"][key] = data
+
+    async def _payload(_db, _session_id, version):
+        state["payload_loads"] += 1
+        return None if version == 404 else {"version": version, "injured_person": {"pesel": str(version)}}
+
+    async def _render(template, payload):
+        if state["queue_full"]:
+            state["queue_full"] -= 1
+            raise PdfQueueFullError("full")
+        if payload["version"] == 500:
+            raise RuntimeError("render failed")
+        state["renders"].append((template, payload["version"]))
+        return f"{template}-{payload['version']}".encode()
+
+    monkeypatch.setattr(pdf_bulk, "lookup_pdf", _lookup)
+    monkeypatch.setattr(pdf_bulk, "store_pdf", _store)
+    monkeypatch.setattr(pdf_bulk, "version_keys", VersionKeyIndex(max_entries=100))
+    monkeypatch.setattr(pdf_bulk, "get_version_payload", _payload)
+    monkeypatch.setattr(pdf_bulk, "render_pdf", _render)
+    monkeypatch.setattr(pdf_bulk, "read_sessionmaker", lambda *_args: _NullSession)
+    monkeypatch.setattr(pdf_bulk, "_QUEUE_FULL_BACKOFF_SECONDS", 0)
+    return state
+
+
+async def _collect(targets, templates, concurrency=2):
+    chunks = [chunk async for chunk in pdf_bulk.stream_pdf_zip(targets, templates, concurrency)]
+    return chunks, zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+
+@pytest.mark.asyncio
+async def test_zip_contains_every_version_and_template(bulk_env):
+    session_id = uuid.uuid4()
+    targets = [(session_id, v) for v in range(1, 6)]
+    chunks, archive = await _collect(targets, ["ewyp", "notification"])
+
+    assert len(archive.namelist()) == 10
+    assert archive.read(pdf_bulk.entry_name(session_id, 3, "ewyp")) == b"ewyp-3"
+    # Payload czytany raz na wersję, nie na szablon; wpisy wychodzą osobnymi kawałkami.
+    assert bulk_env["payload_loads"] == 5
+    assert len([c for c in chunks if c]) > 2
+    # Szablon statyczny renderowany raz dla całego eksportu.
+    assert [r for r in bulk_env["renders"] if r[0] == "notification"] == [("notification", 1)]
+    assert archive.read(pdf_bulk.entry_name(session_id, 4, "notification")) == b"notification-1"
+
+
+@pytest.mark.asyncio
+async def test_cached_entries_are_not_rendered(bulk_env):
+    session_id = uuid.uuid4()
+    key = pdf_cache_key("ewyp", {"injured_person": {"pesel": "1"}})
+    bulk_env["cache"][key] = b"cached"
+
+    _chunks, archive = await _collect([(session_id, 1), (session_id, 2)], ["ewyp"])
+
+    assert archive.read(pdf_bulk.entry_name(session_id, 1, "ewyp")) == b"cached"
+    assert bulk_env["renders"] == [("ewyp", 2)]
+    assert pdf_cache_key("ewyp", {"injured_person": {"pesel": "2"}}) in bulk_env["cache"]
+
+
+@pytest.mark.asyncio
+async def test_failures_listed_in_errors_entry(bulk_env):
+    session_id = uuid.uuid4()
+    bulk_env["queue_full"] = 2
+    _chunks, archive = await _collect([(session_id, 1), (session_id, 404), (session_id, 500)], ["ewyp"])
+
+    assert pdf_bulk.entry_name(session_id, 1, "ewyp") in archive.namelist()
+    errors = archive.read(pdf_bulk.ERRORS_ENTRY).decode()
+    assert "v404_ewyp.pdf: version not found" in errors
+    assert "v500_ewyp.pdf: render failed" in errors
+
+
+@pytest.mark.asyncio
+async def test_payload_reads_use_short_sessions_routed_by_form_session(bulk_env, monkeypatch):
+    routed = []
+    open_sessions = []
+
+    class _TrackedSession:
+        async def __aenter__(self):
+            open_sessions.append(True)
+            return None
+
+        async def __aexit__(self, *_args):
+            open_sessions.pop()
+
+    def _sessionmaker(session_id=None):
+        routed.append(session_id)
+        return _TrackedSession
+
+    monkeypatch.setattr(pdf_bulk, "read_sessionmaker", _sessionmaker)
+    first, second = uuid.uuid4(), uuid.uuid4()
+
+    async for _chunk in pdf_bulk.stream_pdf_zip([(first, 1), (second, 2)], ["ewyp"], 2):
+        # Żadna sesja DB nie jest otwarta, gdy strumień czeka na klienta.
+        assert open_sessions == []
+
+    assert routed == [first, second]
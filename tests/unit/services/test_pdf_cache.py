@@ -0,0 +1,107 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import pdf_cache
+from app.services.pdf_cache import DbPdfCache, DiskPdfCache, VersionKeyIndex, pdf_cache_key
+
+
+def test_cache_key_depends_only_on_fields_the_template_reads():
+    payload = {"injured_person": {"first_name": "Jan"}, "response_method": "email"}
+    key = pdf_cache_key("ewyp", payload)
+    assert key == pdf_cache_key("ewyp", {**payload, "response_method": "post"})
+    assert key != pdf_cache_key("ewyp", {**payload, "injured_person": {"first_name": "Anna"}})
+    assert key != pdf_cache_key("notification", payload)
+    # Szablon statyczny: jeden klucz dla wszystkich payloadów.
+    assert pdf_cache_key("notification", payload) == pdf_cache_key("notification", {})
+
+
+def test_version_key_index_remembers_and_evicts():
+    index = VersionKeyIndex(max_entries=2)
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    key = index.remember(first, 1, "ewyp", {})
+    assert index.get(first, 1, "ewyp") == key
+    index.remember(second, 1, "ewyp", {})
+    index.get(first, 1, "ewyp")
+    index.remember(third, 1, "ewyp", {})
+    assert index.get(second, 1, "ewyp") is None
+    assert index.get(first, 1, "ewyp") == key
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_roundtrip(tmp_path):
+    cache = DiskPdfCache(tmp_path, max_bytes=1024)
+    assert await cache.get("ab" * 32) is None
+    await cache.put("ab" * 32, b"%PDF-1")
+    assert await cache.get("ab" * 32) == b"%PDF-1"
+
+    # Nowa instancja (np. po restarcie) odtwarza indeks z katalogu
+    assert await DiskPdfCache(tmp_path, max_bytes=1024).get("ab" * 32) == b"%PDF-1"
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskPdfCache(tmp_path, max_bytes=25)
+    keys = ["a" * 64, "b" * 64, "c" * 64]
+    await cache.put(keys[0], b"x" * 10)
+    await cache.put(keys[1], b"y" * 10)
+    await cache.get(keys[0])  # "a" świeżo użyte, "b" najstarsze
+    await cache.put(keys[2], b"z" * 10)
+
+    assert await cache.get(keys[1]) is None
+    assert await cache.get(keys[0]) == b"x" * 10
+    assert await cache.get(keys[2]) == b"z" * 10
+
+
+class _Row:
+    def __init__(self, data, last_access):
+        self.data = data
+        self.last_access = last_access
+
+
+class _DbSession:
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_args):
+        return None
+
+    async def execute(self, statement):
+        self.statements.append(str(statement).split()[0])
+        row = self.row
+
+        class _Result:
+            def one_or_none(self):
+                return row
+
+        return _Result()
+
+    async def commit(self):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_db_cache_hit_touches_last_access_only_when_stale(monkeypatch):
+    now = datetime.now(timezone.utc)
+    fresh = _DbSession(_Row(b"%PDF", now - timedelta(seconds=30)))
+    monkeypatch.setattr(pdf_cache, "AsyncSessionLocal", lambda: fresh)
+    assert await DbPdfCache(max_bytes=100).get("k") == b"%PDF"
+    assert fresh.statements == ["SELECT"]
+
+    stale = _DbSession(_Row(b"%PDF", now - timedelta(hours=1)))
+    monkeypatch.setattr(pdf_cache, "AsyncSessionLocal", lambda: stale)
+    assert await DbPdfCache(max_bytes=100).get("k") == b"%PDF"
+    assert stale.statements == ["SELECT", "UPDATE"]
+
+
+@pytest.mark.asyncio
+async def test_db_cache_put_does_not_scan_table(monkeypatch):
+    db = _DbSession(None)
+    monkeypatch.setattr(pdf_cache, "AsyncSessionLocal", lambda: db)
+    await DbPdfCache(max_bytes=100).put("k", b"%PDF")
+    assert db.statements == ["INSERT"]
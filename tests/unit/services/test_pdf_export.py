@@ -0,0 +1,119 @@
+from app.models.ewyp import EWYPFormSchema
+from app.services.pdf_export import _render_ewyp_html, _render_notification_html
+
+
+def _form(**injured):
+    return EWYPFormSchema(
+        injured_person=injured,
+        injured_address={"city": "Łódź"},
+        accident_info={"first_aid_provided": False, "machine_involved": True},
+        witnesses=[{"first_name": "Anna", "address": {"city": "Kraków"}}],
+        attachments=["a.pdf", "b.pdf"],
+    )
+
+
+def test_ewyp_html_escapes_user_text():
+    html = _render_ewyp_html(_form(first_name="<script>alert(1)</script>", last_name="O'Brien & Co"))
+    assert "<script>" not in html
+    assert "&lt;script&gt;alert(1)&lt;/script&gt;" in html
+    assert "O&#39;Brien &amp; Co" in html
+
+
+def test_ewyp_html_fills_fields():
+    html = _render_ewyp_html(_form(first_name="Jan", pesel="80010212345"))
+    assert "80010212345" in html
+    assert "Łódź" in html
+    assert "Kraków" in html
+    assert "a.pdf, b.pdf" in html
+    assert "NIE" in html and "TAK" in html
+    assert "None" not in html
+
+
+def test_stylesheets_not_inlined():
+    form = _form(first_name="Jan")
+    assert "<style>" not in _render_ewyp_html(form)
+    assert "<style>" not in _render_notification_html(form)
+
+
+def _field_samples(model, prefix=""):
+    """Każde pole liściowe schematu z przykładową wartością (listy świadków: 3 elementy)."""
+    import datetime
+    import types
+    import typing
+
+    from pydantic import BaseModel
+
+    samples = {}
+    for name, field in model.model_fields.items():
+        path = f"{prefix}{name}"
+        annotation = field.annotation
+        inner = annotation
+        if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+            inner = next(a for a in typing.get_args(annotation) if a is not type(None))
+        if typing.get_origin(inner) is list:
+            item = typing.get_args(inner)[0]
+            if isinstance(item, type) and issubclass(item, BaseModel):
+                for idx in range(3):
+                    samples.update(_field_samples(item, f"{path}.{idx}."))
+            else:
+                samples[path] = [f"{path}-a", f"{path}-b"]
+        elif isinstance(inner, type) and issubclass(inner, BaseModel):
+            samples.update(_field_samples(inner, f"{path}."))
+        elif inner is bool:
+            samples[path] = True
+        elif inner is datetime.date:
+            samples[path] = "2024-02-03"
+        elif inner is datetime.time:
+            samples[path] = "07:08"
+        elif inner is str:
+            samples[path] = f"<{path}>"
+    return samples
+
+
+def _build_payload(samples):
+    payload: dict = {}
+    for path, value in samples.items():
+        parts = path.split(".")
+        node = payload
+        for part, nxt in zip(parts, parts[1:], strict=False):
+            default = [] if nxt.isdigit() else {}
+            if isinstance(node, list):
+                while len(node) <= int(part):
+                    node.append({})
+                node = node[int(part)]
+            else:
+                node = node.setdefault(part, default)
+        if isinstance(node, list):
+            node.append(value)
+        else:
+            node[parts[-1]] = value
+    return payload
+
+
+def _mutate(value):
+    if isinstance(value, bool):
+        return not value
+    if isinstance(value, list):
+        return [*value, "extra"]
+    if value == "2024-02-03":
+        return "2025-06-07"
+    if value == "07:08":
+        return "09:10"
+    return f"{value}-changed"
+
+
+def test_template_fields_match_rendered_html():
+    """Wykrywa zależności szablonów: zmiana pola zmienia HTML wtedy i tylko wtedy, gdy jest w TEMPLATE_FIELDS."""
+    from app.services.pdf_export import TEMPLATE_FIELDS
+
+    renderers = {"ewyp": _render_ewyp_html, "notification": _render_notification_html}
+    samples = _field_samples(EWYPFormSchema)
+    base_payload = _build_payload(samples)
+    for template, render in renderers.items():
+        base_html = render(EWYPFormSchema(**base_payload))
+        detected = set()
+        for path, value in samples.items():
+            changed = _build_payload({**samples, path: _mutate(value)})
+            if render(EWYPFormSchema(**changed)) != base_html:
+                detected.add(path)
+        assert detected == set(TEMPLATE_FIELDS[template]), template
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import pdf_pool
+from app.services.pdf_pool import PdfQueueFullError, PdfRenderPool, PdfRenderTimeoutError
+
+
+@pytest.fixture
+def slow_renderer(monkeypatch):
+    def _slow(_payload):
+        time.sleep(0.3)
+        return b"%PDF"
+
+    monkeypatch.setitem(pdf_pool.PDF_RENDERERS, "slow", _slow)
+    monkeypatch.setitem(pdf_pool.PDF_RENDERERS, "fast", lambda _payload: b"%PDF-fast")
+
+
+@pytest.mark.asyncio
+async def test_render_returns_bytes(slow_renderer):
+    pool = PdfRenderPool(workers=0, queue_size=1, timeout_seconds=5)
+    assert await pool.render("fast", {}) == b"%PDF-fast"
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_full_rejects_immediately(slow_renderer):
+    pool = PdfRenderPool(workers=0, queue_size=1, timeout_seconds=5)
+    running = [asyncio.create_task(pool.render("slow", {})) for _ in range(pool.capacity)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(PdfQueueFullError):
+        await pool.render("fast", {})
+
+    assert await asyncio.gather(*running) == [b"%PDF"] * pool.capacity
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_keeps_slot_until_render_finishes(slow_renderer):
+    pool = PdfRenderPool(workers=0, queue_size=0, timeout_seconds=0.05)
+    with pytest.raises(PdfRenderTimeoutError):
+        await pool.render("slow", {})
+    assert pool.pending == 1
+
+    await asyncio.sleep(0.4)
+    assert pool.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_template():
+    pool = PdfRenderPool(workers=0, queue_size=0, timeout_seconds=1)
+    with pytest.raises(ValueError):
+        await pool.render("missing", {})
@@ -0,0 +1,65 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.services import pdf_prerender
+from app.services.pdf_prerender import PdfPrerenderer, parse_prerender_rules
+
+
+def test_parse_rules():
+    assert parse_prerender_rules("") == {}
+    assert parse_prerender_rules("corrected:ewyp, corrected:notification,raw:ewyp,raw:ewyp") == {
+        "corrected": ["ewyp", "notification"],
+        "raw": ["ewyp"],
+    }
+    with pytest.raises(ValueError):
+        parse_prerender_rules("corrected:unknown")
+    with pytest.raises(ValueError):
+        parse_prerender_rules("corrected")
+
+
+def test_schedule_filters_by_source_and_drops_when_full():
+    prerenderer = PdfPrerenderer({"corrected": ["ewyp", "notification"]}, queue_size=3, min_interval_seconds=0)
+    session_id = uuid.uuid4()
+    prerenderer.schedule(session_id, 1, "raw", {})
+    assert prerenderer._queue.qsize() == 0
+
+    prerenderer.schedule(session_id, 1, "corrected", {})
+    prerenderer.schedule(session_id, 2, "corrected", {})  # drugi szablon nie mieści się w kolejce
+    assert prerenderer._queue.qsize() == 3
+
+
+@pytest.mark.asyncio
+async def test_prerender_waits_for_idle_worker_and_fills_cache(monkeypatch):
+    cache: dict[str, bytes] = {}
+    renders = []
+
+    async def _lookup(key, _template):
+        return cache.get(key)
+
+    async def _store(key, _template, data):
+        cache[key] = data
+
+    async def _render(template, payload):
+        renders.append(template)
+        return b"pdf"
+
+    monkeypatch.setattr(pdf_prerender, "lookup_pdf", _lookup)
+    monkeypatch.setattr(pdf_prerender, "store_pdf", _store)
+    monkeypatch.setattr(pdf_prerender, "render_pdf", _render)
+    monkeypatch.setattr(pdf_prerender, "_IDLE_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(pdf_prerender.pdf_pool, "pending", pdf_prerender.pdf_pool.capacity)
+
+    prerenderer = PdfPrerenderer({}, queue_size=1, min_interval_seconds=0)
+    session_id = uuid.uuid4()
+    task = asyncio.create_task(prerenderer.prerender_one(session_id, 1, "ewyp", {}))
+    await asyncio.sleep(0.05)
+    assert renders == []  # pula zajęta przez pobrania interaktywne
+
+    pdf_prerender.pdf_pool.pending = 0
+    await asyncio.wait_for(task, 1)
+    assert cache == {pdf_prerender.version_keys.get(session_id, 1, "ewyp"): b"pdf"}
+
+    await prerenderer.prerender_one(session_id, 1, "ewyp", {})
+    assert renders == ["ewyp"]  # już w cache
@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.pending_validations import expire_stale_pending
+from app.services.validation_upgrades import PENDING_EXPIRED_RESULT
+
+
+class _Scalars:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class _CapturingDb:
+    def __init__(self, field_ids, log_ids):
+        self._returning = [field_ids, log_ids]
+        self.statements = []
+        self.params = []
+        self.committed = False
+
+    async def scalars(self, statement):
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.statements.append(str(compiled))
+        self.params.append(compiled.params)
+        return _Scalars(self._returning.pop(0))
+
+    async def commit(self):
+        self.committed = True
+
+
+@pytest.mark.asyncio
+async def test_stale_pending_rows_get_objection():
+    db = _CapturingDb([uuid.uuid4(), uuid.uuid4()], [uuid.uuid4(), uuid.uuid4(), uuid.uuid4()])
+    cutoff = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    assert await expire_stale_pending(db, cutoff) == (2, 3)
+
+    fields_sql, logs_sql = db.statements
+    assert fields_sql.startswith("UPDATE field_validations SET status=")
+    assert "WHERE field_validations.status = %(status_1)s::VARCHAR AND field_validations.created_at <" in fields_sql
+    assert logs_sql.startswith("UPDATE validation_logs SET status=")
+    assert "WHERE validation_logs.status = %(status_1)s::VARCHAR AND validation_logs.created_at <" in logs_sql
+    assert {params["status"] for params in db.params} == {PENDING_EXPIRED_RESULT.status}
+    assert db.committed
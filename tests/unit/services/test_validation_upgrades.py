@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app.agent.validator import AgentResult
+from app.services import validation_upgrades
+from app.services.validation_upgrades import LLM_FAILURE_RESULT, ValidationUpgrader
+
+
+def test_has_room_counts_queued_and_running():
+    upgrader = ValidationUpgrader(concurrency=1, max_backlog=2)
+
+    async def _store(_result):
+        return None
+
+    assert upgrader.has_room(2)
+    upgrader.schedule("valid3", "x", None, _store)
+    assert upgrader.backlog == 1
+    assert upgrader.has_room(1)
+    assert not upgrader.has_room(2)
+
+
+@pytest.mark.asyncio
+async def test_run_stores_llm_verdicts_and_falls_back_on_errors(monkeypatch):
+    async def _llm(field_type, value, context=None):
+        if value == "boom":
+            raise RuntimeError("model down")
+        return AgentResult(status="success", justification=f"{field_type}:{value}")
+
+    monkeypatch.setattr(validation_upgrades, "run_llm_validation", _llm)
+    stored: dict[str, AgentResult] = {}
+
+    def _store(key):
+        async def _save(result):
+            stored[key] = result
+
+        return _save
+
+    upgrader = ValidationUpgrader(concurrency=2, max_backlog=10)
+    upgrader.schedule("valid3", "dentysta", None, _store("ok"))
+    upgrader.schedule("valid3", "boom", None, _store("failed"))
+    task = asyncio.create_task(upgrader.run())
+    for _ in range(100):
+        if len(stored) == 2:
+            break
+        await asyncio.sleep(0.01)
+    task.cancel()
+
+    assert stored == {
+        "ok": AgentResult(status="success", justification="valid3:dentysta"),
+        "failed": LLM_FAILURE_RESULT,
+    }
+    assert upgrader.backlog == 0
@@ -0,0 +1,51 @@
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Moduły, których sam import aplikacji (serwer, export_openapi.py, zbieranie testów) nie może ładować.
+LAZY_MODULES = ("langchain_openai", "langchain_core", "openai", "jinja2", "weasyprint")
+
+# Budżet względem importu samego FastAPI, by nie zależał od szybkości maszyny. Zmierzone:
+# przed leniwymi importami app.main ~5-6x fastapi (1,6-2,3 s), po zmianie ~1,7-3x (0,7-1 s).
+IMPORT_BUDGET_VS_FASTAPI = 4.0
+
+
+def _python(*args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True, timeout=120
+    )
+
+
+def _import_seconds(module: str, runs: int = 3) -> float:
+    """Minimum z kilku pomiarów -X importtime (łączny czas importu modułu)."""
+    best = float("inf")
+    for _ in range(runs):
+        stderr = _python("-X", "importtime", "-c", f"import {module}").stderr
+        match = re.search(rf"\|\s*(\d+) \| {re.escape(module)}$", stderr, re.MULTILINE)
+        assert match, stderr[-500:]
+        best = min(best, int(match.group(1)) / 1e6)
+    return best
+
+
+def test_app_import_defers_llm_stack_and_config():
+    code = (
+        "import json, sys, app.main\n"
+        "from app.agent.config_loader import config_loader\n"
+        f"print(json.dumps([[m for m in {LAZY_MODULES!r} if m in sys.modules], config_loader._loaded]))"
+    )
+    loaded, config_read = json.loads(_python("-c", code).stdout.strip().splitlines()[-1])
+    assert loaded == []
+    assert config_read is False
+
+
+def test_app_import_time_within_budget():
+    fastapi_seconds = _import_seconds("fastapi")
+    app_seconds = _import_seconds("app.main")
+    assert app_seconds <= IMPORT_BUDGET_VS_FASTAPI * fastapi_seconds, (
+        f"import app.main took {app_seconds:.3f}s = {app_seconds / fastapi_seconds:.1f}x fastapi "
+        f"({fastapi_seconds:.3f}s), budget {IMPORT_BUDGET_VS_FASTAPI}x"
+    )